@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# ======================================================
+# 설정
+# ======================================================
+SCRIPT_DIR = Path(__file__).parent
+AUTOTUNE_FILENAME = "autotune.json"
+AUTOTUNE_VERSION = 1
+WARMUP_BATCHES = 3            # 측정에서 제외하는 첫 배치 수
+MEASURE_BATCHES = 10          # 처리량 측정 배치 수
+CALIBRATION_TIMEOUT = 900     # 후보 하나당 최대 시간 (s)
+RAM_CACHE_MARGIN = 0.6        # RAM 캐시는 가용 메모리의 이 비율 안에서만 시도
+
+BATCH_CANDIDATES = [8, 16, 32, 64]
+CACHE_CANDIDATES = [False, "disk", "ram"]
+
+
+class CalibrationDone(Exception):
+    """측정이 끝나면 학습 루프를 빠져나오기 위해 사용"""
+
+
+# ======================================================
+# 측정 (서브프로세스 안에서 실행)
+# ======================================================
+def calibrate(config, data, imgsz, model_path, output):
+    """
+    후보 설정 하나로 학습을 시작해 WARMUP 이후 MEASURE_BATCHES 배치의 처리량 측정
+    - 학습 처리량: 측정 구간 전체 이미지/초
+    - 데이터 대기: 이전 배치 종료 → 다음 배치 시작 사이 (dataloader가 따라오지 못한 시간)
+    """
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(config["threads"])
+    model = YOLO(model_path)
+    timing = {"batches": 0, "wait": 0.0, "compute": 0.0, "last_end": None, "start": None, "setup": None}
+    setup_start = time.perf_counter()
+
+    def on_train_epoch_start(trainer):
+        # 에포크 경계(검증 등)는 데이터 대기에서 제외
+        timing["last_end"] = None
+
+    def on_train_batch_start(trainer):
+        now = time.perf_counter()
+        if timing["setup"] is None:
+            timing["setup"] = now - setup_start
+        if timing["last_end"] is not None and timing["batches"] >= WARMUP_BATCHES:
+            timing["wait"] += now - timing["last_end"]
+        timing["batch_start"] = now
+
+    def on_train_batch_end(trainer):
+        now = time.perf_counter()
+        timing["batches"] += 1
+        if timing["batches"] == WARMUP_BATCHES:
+            timing["start"] = now
+        elif timing["batches"] > WARMUP_BATCHES:
+            timing["compute"] += now - timing["batch_start"]
+        timing["last_end"] = now
+
+        if timing["batches"] >= WARMUP_BATCHES + MEASURE_BATCHES:
+            elapsed = now - timing["start"]
+            result = {
+                "images_per_sec": MEASURE_BATCHES * trainer.batch_size / elapsed,
+                "data_wait": timing["wait"] / elapsed,
+                "compute": timing["compute"] / elapsed,
+                "setup_seconds": timing["setup"],
+                "effective_workers": trainer.args.workers,
+                "effective_cache": getattr(trainer.train_loader.dataset, "cache", None),
+            }
+            with open(output, 'w') as f:
+                json.dump(result, f)
+            raise CalibrationDone()
+
+    model.add_callback("on_train_epoch_start", on_train_epoch_start)
+    model.add_callback("on_train_batch_start", on_train_batch_start)
+    model.add_callback("on_train_batch_end", on_train_batch_end)
+
+    with tempfile.TemporaryDirectory() as project:
+        try:
+            model.train(
+                data=data, imgsz=imgsz, epochs=100, device='cpu',
+                batch=config["batch"], workers=config["workers"], cache=config["cache"],
+                project=project, name="calibration", exist_ok=True,
+                val=False, plots=False, save=False, verbose=False,
+            )
+        except CalibrationDone:
+            pass
+
+
+def run_calibration(config, data, imgsz, model_path):
+    """
+    후보 설정 하나를 새 프로세스에서 측정 (스레드 환경변수 적용 + os.wait4로 최대 RSS 측정)
+    Returns: config + 측정 결과 (실패 시 status="failed"/"timeout")
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+
+    env = os.environ.copy()
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        env[var] = str(config["threads"])
+
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--calibrate", json.dumps(config),
+           "--data", data, "--imgsz", str(imgsz), "--model", model_path, "--output", output]
+    start = time.perf_counter()
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=stderr)
+        timer = threading.Timer(CALIBRATION_TIMEOUT, process.kill)
+        timer.start()
+        try:
+            # wait4: 종료 상태와 함께 자식 프로세스의 최대 RSS(ru_maxrss, Linux는 KB)를 얻음
+            _, status, rusage = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        error_lines = stderr.read().decode(errors="replace").strip().splitlines()
+
+    result = {**config, "seconds": time.perf_counter() - start, "peak_rss_mb": rusage.ru_maxrss / 1024}
+    try:
+        with open(output, 'r') as f:
+            result.update(json.load(f))
+        result["status"] = "ok"
+    except (OSError, ValueError):
+        timed_out = result["seconds"] >= CALIBRATION_TIMEOUT
+        result["status"] = "timeout" if timed_out else "failed"
+        result["error"] = error_lines[-1] if error_lines else f"exit {process.returncode}"
+    finally:
+        Path(output).unlink(missing_ok=True)
+    return result
+
+
+# ======================================================
+# 메모리 추정
+# ======================================================
+def available_memory_mb():
+    """가용 메모리 (MB)"""
+    import psutil
+
+    return psutil.virtual_memory().available / (1 << 20)
+
+
+def ram_cache_mb(data, imgsz):
+    """
+    RAM 캐시 크기 추정 - 학습 이미지 수 × (긴 변을 imgsz로 줄인 uint8 이미지)
+    첫 이미지의 가로세로비를 전체에 적용
+    """
+    import cv2
+    import yaml
+
+    with open(data, 'r') as f:
+        data_cfg = yaml.safe_load(f)
+    root = Path(data_cfg.get("path", Path(data).parent))
+    train = Path(data_cfg["train"])
+    train = train if train.is_absolute() else root / train
+
+    if train.suffix == ".txt":
+        with open(train, 'r') as f:
+            images = [line.strip() for line in f if line.strip()]
+    else:
+        images = [str(p) for p in train.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg")]
+    if not images:
+        return 0.0
+
+    height, width = cv2.imread(images[0]).shape[:2]
+    scale = imgsz / max(height, width)
+    return len(images) * (height * scale) * (width * scale) * 3 / (1 << 20)
+
+
+# ======================================================
+# 단계별 탐색
+# ======================================================
+def thread_candidates(cores):
+    """전체 코어 → 절반 → 1/4 (중복 제거)"""
+    return sorted({max(cores // d, 1) for d in (1, 2, 4)}, reverse=True)
+
+
+def worker_candidates(cores):
+    """dataloader worker 후보"""
+    return sorted({0, 2, min(4, cores), max(cores // 2, 1)})
+
+
+def best_of(results):
+    """성공한 측정 중 처리량 최고 (없으면 None)"""
+    ok = [r for r in results if r["status"] == "ok"]
+    return max(ok, key=lambda r: r["images_per_sec"]) if ok else None
+
+
+def autotune(data, imgsz, model_path, base_batch=16):
+    """
+    스레드 → 배치 → worker → 캐시 순서로 한 축씩 측정하여 처리량 최고 설정 선택
+    Returns: 결과 dict (chosen + 전체 측정 기록)
+    """
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    memory_mb = available_memory_mb()
+    trials = []
+
+    def measure(config, stage):
+        print(f"  [{stage}] threads={config['threads']} batch={config['batch']} "
+              f"workers={config['workers']} cache={config['cache']} ...", end=" ", flush=True)
+        result = {**run_calibration(config, data, imgsz, model_path), "stage": stage}
+        if result["status"] == "ok":
+            print(f"{result['images_per_sec']:.1f} img/s (데이터 대기 {result['data_wait'] * 100:.0f}%, "
+                  f"RSS {result['peak_rss_mb']:.0f}MB)")
+        else:
+            print(f"{result['status']} ({result.get('error', '')})")
+        trials.append(result)
+        return result
+
+    best = {"threads": cores, "batch": base_batch, "workers": 0, "cache": False}
+
+    # 1) 스레드 수
+    results = [measure({**best, "threads": t}, "threads") for t in thread_candidates(cores)]
+    chosen = best_of(results)
+    if chosen is None:
+        raise RuntimeError("기본 설정으로도 학습을 시작할 수 없습니다 (calibration 실패)")
+    best["threads"] = chosen["threads"]
+
+    # 2) 배치 크기 - 가용 메모리를 넘을 것으로 예상되면 더 큰 배치는 생략
+    results = [chosen]
+    for batch in BATCH_CANDIDATES:
+        if batch == best["batch"]:
+            continue
+        projected = chosen["peak_rss_mb"] * batch / chosen["batch"]
+        if batch > chosen["batch"] and projected > memory_mb:
+            print(f"  [batch] batch={batch} 생략 (예상 RSS {projected:.0f}MB > 가용 {memory_mb:.0f}MB)")
+            continue
+        results.append(measure({**best, "batch": batch}, "batch"))
+    chosen = best_of(results)
+    best["batch"] = chosen["batch"]
+
+    # 3) dataloader worker - 트레이너가 worker 수를 바꿔 버리면(CPU 학습 시 0으로 고정하는 버전) 나머지 생략
+    results = [chosen]
+    for workers in worker_candidates(cores):
+        if workers == best["workers"]:
+            continue
+        result = measure({**best, "workers": workers}, "workers")
+        results.append(result)
+        if result["status"] == "ok" and result["effective_workers"] != workers:
+            print(f"  [workers] 트레이너가 worker 수를 {result['effective_workers']}로 고정 → 생략")
+            break
+    chosen = best_of(results)
+    best["workers"] = chosen["effective_workers"]
+
+    # 4) 이미지 캐시 - RAM은 예상 크기가 가용 메모리 안에 들어갈 때만
+    cache_mb = ram_cache_mb(data, imgsz)
+    results = [chosen]
+    for cache in CACHE_CANDIDATES:
+        if cache == best["cache"]:
+            continue
+        if cache == "ram" and cache_mb + chosen["peak_rss_mb"] > memory_mb * RAM_CACHE_MARGIN:
+            print(f"  [cache] ram 생략 (예상 {cache_mb:.0f}MB + 학습 {chosen['peak_rss_mb']:.0f}MB > "
+                  f"가용 {memory_mb:.0f}MB × {RAM_CACHE_MARGIN})")
+            continue
+        results.append(measure({**best, "cache": cache}, "cache"))
+    chosen = best_of(results)
+    best["cache"] = chosen["cache"]
+
+    return {
+        "version": AUTOTUNE_VERSION,
+        "data": str(data),
+        "imgsz": imgsz,
+        "model": model_path,
+        "cores": cores,
+        "available_memory_mb": round(memory_mb),
+        "ram_cache_mb": round(cache_mb),
+        "chosen": best,
+        "images_per_sec": chosen["images_per_sec"],
+        "trials": trials,
+    }
+
+
+# ======================================================
+# 저장 / 로드
+# ======================================================
+def save_autotune(path, result):
+    """autotune.json 저장"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def load_autotune(path, data, imgsz, model_path):
+    """같은 데이터/이미지 크기/모델/코어 수로 측정한 기존 결과 (없거나 다르면 None)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        result = json.load(f)
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    key = (AUTOTUNE_VERSION, str(data), imgsz, model_path, cores)
+    if (result.get("version"), result.get("data"), result.get("imgsz"), result.get("model"), result.get("cores")) != key:
+        return None
+    return result
+
+
+def apply_threads(threads):
+    """현재 프로세스의 torch/BLAS 스레드 수 설정"""
+    import torch
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    torch.set_num_threads(threads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CPU 학습 처리량 자동 튜닝 (train_yolo.py --autotune 내부용)')
+    parser.add_argument('--calibrate', type=str, required=True, help='측정할 설정 JSON')
+    parser.add_argument('--data', type=str, required=True)
+    parser.add_argument('--imgsz', type=int, required=True)
+    parser.add_argument('--model', type=str, required=True)
+    parser.add_argument('--output', type=str, required=True)
+    args = parser.parse_args()
+
+    calibrate(json.loads(args.calibrate), args.data, args.imgsz, args.model, args.output)
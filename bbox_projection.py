@@ -0,0 +1,199 @@
+import json
+import os
+
+import numpy as np
+
+# ======================================================
+# 설정
+# ======================================================
+BOXES_FILENAME = "boxes.json"   # 씬 폴더에 HDF5와 함께 저장
+SUPPORT_DIRECTIONS = 512        # 메쉬 축약에 쓰는 방향 수
+OCCLUSION_GRID = 64             # 가림 추정용 래스터 해상도
+MIN_DEPTH = 1e-3                # 카메라 앞쪽 판정 거리 (m)
+
+
+# ======================================================
+# 메쉬 축약
+# ======================================================
+def fibonacci_directions(n):
+    """구 위에 고르게 분포한 단위 방향 벡터 n개"""
+    i = np.arange(n) + 0.5
+    phi = np.arccos(1 - 2 * i / n)
+    theta = np.pi * (1 + 5 ** 0.5) * i
+    return np.stack([np.cos(theta) * np.sin(phi), np.sin(theta) * np.sin(phi), np.cos(phi)], axis=1)
+
+
+def reduce_vertices(vertices, num_directions=SUPPORT_DIRECTIONS):
+    """
+    여러 방향의 support point(방향별 최외곽 정점)만 남겨 메쉬 정점 축약
+    투영 bbox의 극점은 convex hull 정점이므로 방향을 촘촘히 잡으면 오차가 거의 없음
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if len(vertices) <= num_directions:
+        return vertices
+    support = np.argmax(vertices @ fibonacci_directions(num_directions).T, axis=0)
+    return vertices[np.unique(support)]
+
+
+# ======================================================
+# 투영
+# ======================================================
+def world_to_camera(points, cam2world):
+    """
+    월드 좌표 → OpenCV 카메라 좌표 (x 오른쪽, y 아래, z 앞)
+    points: (P, 3), cam2world: (C, 4, 4) Blender/OpenGL 카메라 → (C, P, 3)
+    """
+    world2cam = np.linalg.inv(cam2world)
+    homogeneous = np.concatenate([points, np.ones((len(points), 1))], axis=1)
+    cam_points = np.einsum('cij,pj->cpi', world2cam, homogeneous)[..., :3]
+    return cam_points * np.array([1.0, -1.0, -1.0])
+
+
+def project_boxes(local_vertices, object_poses, cam2world, K, resolution):
+    """
+    모든 객체 × 모든 카메라에 대해 정점을 한 번에 투영하여 2D bbox 계산
+
+    Args:
+        local_vertices: 객체별 로컬 정점 리스트 [(V_i, 3), ...]
+        object_poses: (N, 4, 4) 객체 local2world
+        cam2world: (C, 4, 4) 카메라 포즈
+        K: (3, 3) 카메라 내부 파라미터
+        resolution: [width, height]
+
+    Returns: dict
+        "boxes": (C, N, 4) 이미지 경계로 자른 [x_min, y_min, x_max, y_max]
+        "in_view": (C, N) bool - 카메라 앞 & 이미지와 겹침
+        "truncation": (C, N) 이미지 안에 남은 bbox 면적 비율
+        "depth": (C, N) 객체 중심까지 깊이
+    """
+    object_poses = np.asarray(object_poses, dtype=np.float64)
+    cam2world = np.asarray(cam2world, dtype=np.float64)
+    K = np.asarray(K, dtype=np.float64)
+    width, height = resolution
+
+    num_cams, num_objects = len(cam2world), len(local_vertices)
+    if num_objects == 0:
+        empty = np.zeros((num_cams, 0))
+        return {"boxes": np.zeros((num_cams, 0, 4)), "in_view": empty.astype(bool),
+                "truncation": empty, "depth": empty}
+
+    # 전체 정점을 이어 붙여 월드 좌표로 변환
+    counts = np.array([len(v) for v in local_vertices])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    owner = np.repeat(np.arange(num_objects), counts)
+    local = np.concatenate(local_vertices, axis=0)
+    world = np.einsum('pij,pj->pi', object_poses[owner][:, :3, :3], local) + object_poses[owner][:, :3, 3]
+
+    cam_points = world_to_camera(world, cam2world)
+    z = cam_points[..., 2]
+    front = z > MIN_DEPTH
+    safe_z = np.where(front, z, 1.0)
+    u = K[0, 0] * cam_points[..., 0] / safe_z + K[0, 1] * cam_points[..., 1] / safe_z + K[0, 2]
+    v = K[1, 1] * cam_points[..., 1] / safe_z + K[1, 2]
+
+    # 객체별 min/max (카메라 뒤 정점 제외)
+    x_min = np.minimum.reduceat(np.where(front, u, np.inf), offsets, axis=1)
+    y_min = np.minimum.reduceat(np.where(front, v, np.inf), offsets, axis=1)
+    x_max = np.maximum.reduceat(np.where(front, u, -np.inf), offsets, axis=1)
+    y_max = np.maximum.reduceat(np.where(front, v, -np.inf), offsets, axis=1)
+    any_front = np.add.reduceat(front, offsets, axis=1) > 0
+
+    full_area = np.where(any_front, (x_max - x_min) * (y_max - y_min), 0.0)
+    boxes = np.stack([
+        np.clip(x_min, 0, width), np.clip(y_min, 0, height),
+        np.clip(x_max, 0, width), np.clip(y_max, 0, height),
+    ], axis=-1)
+    boxes = np.where(any_front[..., None], boxes, 0.0)
+    clipped_area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+
+    # 객체 중심(정점 평균)까지 깊이
+    depth = np.add.reduceat(z, offsets, axis=1) / counts
+
+    return {
+        "boxes": boxes,
+        "in_view": any_front & (clipped_area > 0),
+        "truncation": np.divide(clipped_area, full_area, out=np.zeros_like(clipped_area), where=full_area > 0),
+        "depth": depth,
+    }
+
+
+def estimate_visibility(boxes, in_view, depth, resolution, grid=OCCLUSION_GRID):
+    """
+    가림 정도 추정 - 가까운 객체의 bbox가 덮는 셀을 저해상도 격자에 누적
+    실제 실루엣보다 bbox가 크므로 가림을 다소 과대평가함
+
+    Returns: (C, N) bbox 중 가려지지 않은 비율
+    """
+    width, height = resolution
+    num_cams, num_objects = in_view.shape
+    visible = np.zeros((num_cams, num_objects))
+
+    cells = np.floor(boxes / np.array([width, height, width, height]) * grid).astype(int)
+    cells[..., 2:] = np.maximum(np.ceil(boxes[..., 2:] / np.array([width, height]) * grid).astype(int), cells[..., :2] + 1)
+    cells = np.clip(cells, 0, grid)
+
+    for cam in range(num_cams):
+        covered = np.zeros((grid, grid), dtype=bool)
+        for obj in np.argsort(np.where(in_view[cam], depth[cam], np.inf)):
+            if not in_view[cam, obj]:
+                break
+            x0, y0, x1, y1 = cells[cam, obj]
+            region = covered[y0:y1, x0:x1]
+            if region.size:
+                visible[cam, obj] = 1.0 - region.mean()
+            region[...] = True
+
+    return visible
+
+
+def compute_analytic_boxes(local_vertices, object_poses, category_ids, cam2world, K, resolution,
+                           min_visibility=0.1, min_area=16.0):
+    """
+    카메라별 라벨용 bbox 계산 (보이지 않거나 너무 작은 객체 제외)
+
+    Returns: 카메라별 (M, 6) 배열 리스트 - [category_id, x_min, y_min, x_max, y_max, visibility]
+    """
+    result = project_boxes(local_vertices, object_poses, cam2world, K, resolution)
+    occlusion_visible = estimate_visibility(result["boxes"], result["in_view"], result["depth"], resolution)
+    visibility = result["truncation"] * occlusion_visible
+
+    boxes = result["boxes"]
+    area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    keep = result["in_view"] & (visibility >= min_visibility) & (area >= min_area)
+
+    category_ids = np.asarray(category_ids, dtype=np.float64)
+    per_camera = []
+    for cam in range(len(boxes)):
+        rows = np.concatenate([
+            category_ids[keep[cam], None],
+            boxes[cam][keep[cam]],
+            visibility[cam][keep[cam], None],
+        ], axis=1)
+        per_camera.append(rows)
+    return per_camera
+
+
+# ======================================================
+# 저장 / 로드
+# ======================================================
+def write_boxes(scene_dir, per_camera, resolution):
+    """카메라별 bbox를 boxes.json으로 저장"""
+    path = os.path.join(scene_dir, BOXES_FILENAME)
+    content = {
+        "resolution": [int(resolution[0]), int(resolution[1])],
+        "cameras": [np.round(rows, 3).tolist() for rows in per_camera],
+    }
+    with open(path, 'w') as f:
+        json.dump(content, f, separators=(",", ":"))
+    return path
+
+
+def read_boxes(scene_dir):
+    """boxes.json 로드 → (카메라별 (M, 6) 배열 리스트, resolution) / 없으면 None"""
+    path = os.path.join(scene_dir, BOXES_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        content = json.load(f)
+    cameras = [np.asarray(rows, dtype=np.float64).reshape(-1, 6) for rows in content["cameras"]]
+    return cameras, content["resolution"]
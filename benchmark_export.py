@@ -0,0 +1,274 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import yaml
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+from ultralytics.nn.autobackend import AutoBackend
+from ultralytics.utils import ops
+
+# ======================================================
+# 설정
+# ======================================================
+DEFAULT_WEIGHTS = "runs/detect/train/weights/best.pt"
+DEFAULT_DATA = "dataset/yolo/data.yaml"
+OUTPUT_DIR = "runs/benchmark"
+RESULTS_FILENAME = "benchmark.json"
+BEST_FILENAME = "best_deployment.json"
+
+# 포맷 이름: (ultralytics export format, export 추가 인자)
+# dynamic 인자가 없는 포맷(TorchScript)은 입력 배치 크기가 고정되므로 배치 크기마다 따로 export
+FORMATS = {
+    "torchscript": ("torchscript", {}),
+    "onnx": ("onnx", {"dynamic": True, "simplify": True}),
+    "openvino": ("openvino", {"dynamic": True}),
+    "openvino_int8": ("openvino", {"dynamic": True, "int8": True}),
+}
+BATCH_SIZES = [1, 4, 8]
+WARMUP_ITERATIONS = 5
+MAP_TOLERANCE = 0.01     # 기준(.pt) 대비 허용 mAP50-95 하락
+
+
+# ======================================================
+# 내보내기
+# ======================================================
+def export_formats(weights, formats, imgsz, data, batch_sizes):
+    """
+    best.pt → CPU 추론 포맷들로 export
+    Returns: {포맷 이름: {배치 크기: 경로} 또는 None (실패)} - 동적 배치 포맷은 모든 배치 크기가 같은 경로
+    """
+    exported = {"torch": {batch: str(weights) for batch in batch_sizes}}
+    for name in formats:
+        export_format, extra = FORMATS[name]
+        dynamic = extra.get("dynamic", False)
+        paths = {}
+        for batch in ([1] if dynamic else batch_sizes):
+            label = name if dynamic else f"{name} (batch {batch})"
+            print(f"  [EXPORT] {label}...", end=" ", flush=True)
+            start = time.perf_counter()
+            try:
+                # INT8 양자화는 calibration 이미지로 data의 val split 사용
+                path = Path(YOLO(weights).export(format=export_format, imgsz=imgsz, device='cpu', batch=batch,
+                                                 data=data if extra.get("int8") else None, **extra))
+                if not dynamic:
+                    # 배치 크기마다 같은 파일 이름으로 export되므로 덮어쓰지 않게 이름 변경
+                    batch_path = path.with_name(f"{path.stem}_b{batch}{path.suffix}")
+                    path.replace(batch_path)
+                    path = batch_path
+                paths[batch] = str(path)
+                print(f"✓ {path} ({time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                print(f"실패: {e}")
+        if dynamic and paths:
+            paths = {batch: paths[1] for batch in batch_sizes}
+        exported[name] = paths or None
+    return exported
+
+
+# ======================================================
+# 지연 시간 측정
+# ======================================================
+def val_images(data, max_images):
+    """data.yaml의 val 이미지 경로 목록"""
+    with open(data, 'r') as f:
+        data_cfg = yaml.safe_load(f)
+    root = Path(data_cfg.get("path", Path(data).parent))
+    val = Path(data_cfg["val"])
+    val = val if val.is_absolute() else root / val
+    images = sorted(p for p in val.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+    return images[:max_images]
+
+
+def preprocess(image_paths, imgsz):
+    """letterbox → (N, 3, imgsz, imgsz) uint8 (측정 중 이미지 디코딩 제외)"""
+    letterbox = LetterBox(new_shape=(imgsz, imgsz), auto=False)
+    images = [letterbox(image=cv2.imread(str(p))) for p in image_paths]
+    return np.ascontiguousarray(np.stack(images)[..., ::-1].transpose(0, 3, 1, 2))
+
+
+def benchmark_latency(paths, images, batch_sizes, iterations):
+    """
+    포맷 하나의 배치 크기별 지연 시간 (전처리 텐서 변환 + 추론 + NMS)
+    Args:
+        paths: {배치 크기: 모델 경로} (export되지 않은 배치 크기는 건너뜀)
+    Returns: {배치 크기: {"p50_ms", "p90_ms", "p99_ms", "images_per_sec"}}
+    """
+    results = {}
+    for batch in batch_sizes:
+        if len(images) < batch or batch not in paths:
+            continue
+        try:
+            backend = AutoBackend(paths[batch], device=torch.device('cpu'), fp16=False, batch=batch, verbose=False)
+            backend.warmup(imgsz=(batch, 3, *images.shape[2:]))
+
+            latencies = []
+            num_batches = len(images) // batch
+            for i in range(WARMUP_ITERATIONS + iterations):
+                chunk = images[(i % num_batches) * batch:(i % num_batches + 1) * batch]
+                start = time.perf_counter()
+                x = torch.from_numpy(chunk).float() / 255.0
+                preds = backend(x)
+                ops.non_max_suppression(preds[0] if isinstance(preds, (list, tuple)) else preds)
+                if i >= WARMUP_ITERATIONS:
+                    latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            print(f"    batch={batch} 실패: {e}")
+            continue
+
+        latencies = np.array(latencies) * 1000
+        results[batch] = {
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p90_ms": float(np.percentile(latencies, 90)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "images_per_sec": float(batch * len(latencies) / (latencies.sum() / 1000)),
+        }
+    return results
+
+
+def evaluate_map(path, data, imgsz):
+    """포맷별 val mAP (export 결과가 정확도를 유지하는지 확인)"""
+    metrics = YOLO(path, task="detect").val(data=data, imgsz=imgsz, batch=1, device='cpu', plots=False, verbose=False)
+    return {"map50": float(metrics.box.map50), "map50_95": float(metrics.box.map)}
+
+
+# ======================================================
+# 비교 / 선택
+# ======================================================
+def select_deployment(results, select_batch, tolerance=MAP_TOLERANCE):
+    """기준(.pt) 대비 mAP 하락이 허용 범위인 포맷 중 select_batch 지연 시간(p50)이 가장 짧은 것"""
+    baseline = results.get("torch", {}).get("map50_95")
+    candidates = [
+        (name, r) for name, r in results.items()
+        if r.get("latency", {}).get(select_batch) and r.get("map50_95") is not None
+        and (baseline is None or r["map50_95"] >= baseline - tolerance)
+    ]
+    if not candidates:
+        return None
+    name, r = min(candidates, key=lambda item: item[1]["latency"][select_batch]["p50_ms"])
+    return {
+        "format": name,
+        "path": r["batch_paths"][select_batch],
+        "batch": select_batch,
+        "p50_ms": r["latency"][select_batch]["p50_ms"],
+        "map50_95": r["map50_95"],
+        "baseline_map50_95": baseline,
+    }
+
+
+def print_table(results, batch_sizes):
+    """포맷 × 배치 크기 비교 표"""
+    header = f"  {'포맷':<16}{'mAP50':>8}{'mAP50-95':>10}"
+    for batch in batch_sizes:
+        header += f"{f'b{batch} p50/p99(ms)':>20}{f'b{batch} img/s':>12}"
+    print(header)
+    for name, r in results.items():
+        if r.get("path") is None:
+            print(f"  {name:<16}  (export 실패)")
+            continue
+        map50 = "-" if r.get("map50") is None else f"{r['map50']:.3f}"
+        map50_95 = "-" if r.get("map50_95") is None else f"{r['map50_95']:.3f}"
+        row = f"  {name:<16}{map50:>8}{map50_95:>10}"
+        for batch in batch_sizes:
+            lat = r["latency"].get(batch)
+            if batch not in r["batch_paths"]:
+                row += f"{'export 실패':>20}{'-':>12}"
+                continue
+            if lat is None:
+                row += f"{'-':>20}{'-':>12}"
+                continue
+            percentiles = f"{lat['p50_ms']:.1f}/{lat['p99_ms']:.1f}"
+            row += f"{percentiles:>20}{lat['images_per_sec']:>12.1f}"
+        print(row)
+
+
+def run_benchmark(weights=DEFAULT_WEIGHTS, data=DEFAULT_DATA, formats=("torchscript", "onnx", "openvino"),
+                  imgsz=640, batch_sizes=BATCH_SIZES, iterations=50, max_images=100, select_batch=1,
+                  output_dir=OUTPUT_DIR, threads=None):
+    """export → 포맷별 지연 시간/처리량/mAP 측정 → 비교 표 + 배포 포맷 선택"""
+    if threads is not None:
+        torch.set_num_threads(threads)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print("[1/3] 모델 내보내기...")
+    exported = export_formats(weights, formats, imgsz, data, batch_sizes)
+
+    print("\n[2/3] 지연 시간 측정...")
+    images = preprocess(val_images(data, max_images), imgsz)
+    print(f"  val 이미지 {len(images)}개, 배치 크기 {list(batch_sizes)}, 반복 {iterations}회, "
+          f"스레드 {torch.get_num_threads()}개")
+
+    results = {}
+    for name, paths in exported.items():
+        # path: mAP 검증용 (가장 작은 배치 크기 export), batch_paths: 배치 크기별 모델
+        results[name] = {"path": paths[min(paths)] if paths else None, "batch_paths": paths or {}, "latency": {}}
+        if not paths:
+            continue
+        print(f"  {name}...")
+        results[name]["latency"] = benchmark_latency(paths, images, batch_sizes, iterations)
+
+    print("\n[3/3] 포맷별 mAP 측정...")
+    for name, r in results.items():
+        if r["path"] is None:
+            continue
+        try:
+            r.update(evaluate_map(r["path"], data, imgsz))
+        except Exception as e:
+            print(f"  {name} 검증 실패: {e}")
+
+    best = select_deployment(results, select_batch)
+
+    with open(output_dir / RESULTS_FILENAME, 'w') as f:
+        json.dump({"imgsz": imgsz, "threads": torch.get_num_threads(), "formats": results}, f, indent=2)
+    if best is not None:
+        with open(output_dir / BEST_FILENAME, 'w') as f:
+            json.dump(best, f, indent=2)
+
+    return results, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='학습 모델 export + CPU 추론 지연 시간 벤치마크')
+    parser.add_argument('--weights', type=str, default=DEFAULT_WEIGHTS, help='학습된 가중치')
+    parser.add_argument('--data', type=str, default=DEFAULT_DATA, help='data.yaml (val split 사용)')
+    parser.add_argument('--formats', type=str, nargs='+', default=["torchscript", "onnx", "openvino"],
+                        choices=list(FORMATS), help='export 포맷')
+    parser.add_argument('--int8', action='store_true', help='OpenVINO INT8 양자화 포맷 추가')
+    parser.add_argument('--imgsz', type=int, default=640, help='입력 이미지 크기')
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=BATCH_SIZES, help='측정할 배치 크기')
+    parser.add_argument('--iterations', type=int, default=50, help='배치 크기별 측정 반복 수')
+    parser.add_argument('--max_images', type=int, default=100, help='측정에 사용할 val 이미지 수')
+    parser.add_argument('--select_batch', type=int, default=1, help='배포 포맷 선택 기준 배치 크기')
+    parser.add_argument('--threads', type=int, default=None, help='torch 스레드 수')
+    parser.add_argument('--output_dir', type=str, default=OUTPUT_DIR, help='결과 디렉토리')
+    args = parser.parse_args()
+
+    formats = list(args.formats) + (["openvino_int8"] if args.int8 and "openvino_int8" not in args.formats else [])
+
+    print("=" * 60)
+    print("모델 export & CPU 추론 벤치마크")
+    print("=" * 60)
+
+    results, best = run_benchmark(
+        weights=args.weights, data=args.data, formats=formats, imgsz=args.imgsz,
+        batch_sizes=args.batch_sizes, iterations=args.iterations, max_images=args.max_images,
+        select_batch=args.select_batch, output_dir=args.output_dir, threads=args.threads,
+    )
+
+    print("\n" + "=" * 60)
+    print("비교 결과")
+    print("=" * 60)
+    print_table(results, args.batch_sizes)
+    print()
+    if best is None:
+        print("[WARN] 조건을 만족하는 배포 포맷이 없습니다")
+    else:
+        print(f"✓ 배포 포맷: {best['format']} ({best['path']}) - batch {best['batch']} p50 {best['p50_ms']:.1f}ms, "
+              f"mAP50-95 {best['map50_95']:.3f}")
+        print(f"✓ 저장: {Path(args.output_dir) / BEST_FILENAME}")
+    print("=" * 60)
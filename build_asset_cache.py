@@ -0,0 +1,46 @@
+import blenderproc as bproc
+
+import argparse
+import os
+import sys
+import time
+
+# blenderproc run 환경에서도 로컬 모듈을 import 할 수 있도록 스크립트 폴더 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ycb_assets  # noqa: E402
+
+# 커맨드 라인 인자
+parser = argparse.ArgumentParser(description='YCB 에셋 .blend 캐시 생성')
+parser.add_argument('--ycb_dir', type=str, default=ycb_assets.YCB_DIR, help='YCB OBJ 디렉토리')
+parser.add_argument('--cache_dir', type=str, default=ycb_assets.CACHE_DIR, help='캐시 출력 디렉토리')
+parser.add_argument('--force', action='store_true', help='캐시가 유효해도 다시 생성')
+args = parser.parse_args()
+
+print("=" * 60)
+print("YCB 에셋 캐시 생성")
+print("=" * 60)
+print(f"OBJ: {args.ycb_dir}")
+print(f"캐시: {args.cache_dir}")
+print()
+
+reason = ycb_assets.check_asset_cache(args.cache_dir, args.ycb_dir)
+
+if reason is None and not args.force:
+    print("[SKIP] 캐시가 최신 상태입니다.")
+else:
+    if reason is not None:
+        print(f"[INFO] 캐시 생성 사유: {reason}")
+
+    bproc.init()
+
+    start = time.perf_counter()
+    objects = ycb_assets.load_ycb_objects(args.ycb_dir)
+    load_time = time.perf_counter() - start
+
+    if not objects:
+        print(f"[ERROR] OBJ 파일을 찾을 수 없습니다: {args.ycb_dir}")
+    else:
+        ycb_assets.write_asset_cache(objects, args.cache_dir, args.ycb_dir)
+        print(f"\n✓ 캐시 생성 완료 (OBJ 로드 {load_time:.2f}s, 총 {time.perf_counter() - start:.2f}s)")
+
+print("=" * 60)
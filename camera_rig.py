@@ -0,0 +1,179 @@
+import numpy as np
+
+import bbox_projection
+
+# ======================================================
+# 설정
+# ======================================================
+RIGS = ["legacy", "ring", "hemisphere"]
+POI = np.array([0.5, 0.0, 0.45])   # Point of Interest (테이블 중심)
+RAYS_PER_OBJECT = 5                 # 객체당 가시성 확인 광선 수 (중심 + 표면 근처 4점)
+
+
+# ======================================================
+# 카메라 포즈 샘플링
+# ======================================================
+def look_at(position, target, inplane_rot=0.0):
+    """
+    position에서 target을 바라보는 cam2world 행렬 (Blender 카메라: -Z 방향을 보고 Y가 위)
+    """
+    forward = np.asarray(target, dtype=np.float64) - np.asarray(position, dtype=np.float64)
+    z_axis = -forward / np.linalg.norm(forward)
+    x_axis = np.cross([0.0, 0.0, 1.0], z_axis)
+    if np.linalg.norm(x_axis) < 1e-6:
+        # 수직으로 내려다보는 경우
+        x_axis = np.array([1.0, 0.0, 0.0])
+    x_axis /= np.linalg.norm(x_axis)
+    y_axis = np.cross(z_axis, x_axis)
+
+    rotation = np.stack([x_axis, y_axis, z_axis], axis=1)
+    if inplane_rot:
+        c, s = np.cos(inplane_rot), np.sin(inplane_rot)
+        rotation = rotation @ np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+
+    cam2world = np.eye(4)
+    cam2world[:3, :3] = rotation
+    cam2world[:3, 3] = position
+    return cam2world
+
+
+def spherical_position(radius, azimuth, elevation, poi=POI):
+    """POI 중심 구면 좌표 (각도는 라디안) → 월드 좌표"""
+    return poi + radius * np.array([
+        np.cos(elevation) * np.cos(azimuth),
+        np.cos(elevation) * np.sin(azimuth),
+        np.sin(elevation),
+    ])
+
+
+def camera_elevation(cam2world, poi=POI):
+    """카메라 위치의 POI 기준 고도각 (도)"""
+    offset = np.asarray(cam2world)[:3, 3] - poi
+    return float(np.rad2deg(np.arcsin(np.clip(offset[2] / np.linalg.norm(offset), -1.0, 1.0))))
+
+
+def sample_camera_poses(rig, num_candidates, num_views, rng=np.random, radius=(0.8, 1.6), elevation=(20.0, 70.0),
+                        inplane=0.2, poi=POI, elevation_weights=None):
+    """
+    카메라 후보 포즈 샘플링 (앞쪽 후보부터 우선 채택)
+
+    - legacy: 기존 3개 뷰 (랜덤 메인 + 고정 탑뷰 + 고정 사이드뷰)
+    - ring: POI 둘레에 방위각을 균등 분할한 num_views개 + 랜덤 추가 후보
+    - hemisphere: POI 위 반구(고도 범위) 에서 면적 균등 샘플링
+
+    elevation_weights: 고도 범위를 균등 분할한 구간별 샘플링 가중치 (feedback 모드, legacy는 무시)
+
+    Returns: (num_candidates, 4, 4) cam2world 배열
+    """
+    if rig == "legacy":
+        cam_position = rng.uniform([0.8, 0.8, 0.6], [1.4, 1.4, 1.2])
+        return np.stack([
+            look_at(cam_position, poi, rng.uniform(-inplane, inplane)),  # 메인 카메라 - 랜덤 위치
+            look_at([0.5, 0.0, 1.5], poi),                                 # 탑뷰 카메라 (고정)
+            look_at([1.5, 0.0, 0.6], poi),                                 # 사이드 카메라 (고정)
+        ])
+
+    el_low, el_high = np.deg2rad(elevation[0]), np.deg2rad(elevation[1])
+    if elevation_weights is not None:
+        # 후보마다 가중치로 고도 구간을 고른 뒤 구간 안에서 샘플링
+        weights = np.asarray(elevation_weights, dtype=np.float64)
+        edges = np.linspace(el_low, el_high, len(weights) + 1)
+        bins = rng.choice(len(weights), size=num_candidates, p=weights / weights.sum())
+        el_low, el_high = edges[bins], edges[bins + 1]
+
+    if rig == "ring":
+        phase = rng.uniform(0, 2 * np.pi)
+        azimuths = phase + 2 * np.pi * np.arange(num_candidates) / max(num_views, 1)
+        azimuths[num_views:] = rng.uniform(0, 2 * np.pi, max(num_candidates - num_views, 0))
+        elevations = rng.uniform(el_low, el_high, num_candidates)
+    elif rig == "hemisphere":
+        azimuths = rng.uniform(0, 2 * np.pi, num_candidates)
+        elevations = np.arcsin(rng.uniform(np.sin(el_low), np.sin(el_high), num_candidates))
+    else:
+        raise ValueError(f"알 수 없는 카메라 리그: {rig} (가능: {', '.join(RIGS)})")
+
+    radii = rng.uniform(radius[0], radius[1], num_candidates)
+    inplane_rots = rng.uniform(-inplane, inplane, num_candidates)
+    return np.stack([
+        look_at(spherical_position(r, az, el, poi), poi, rot)
+        for r, az, el, rot in zip(radii, azimuths, elevations, inplane_rots)
+    ])
+
+
+# ======================================================
+# 렌더 전 뷰 컬링
+# ======================================================
+def raycast_visible(cam2world, world_points, objects):
+    """
+    카메라 → 객체 표면 근처 점들로 광선을 쏘아 첫 충돌 객체가 자기 자신인지 확인 (Blender 내부에서만 사용)
+    Returns: 객체별 bool 리스트
+    """
+    import blenderproc as bproc
+
+    origin = cam2world[:3, 3]
+    visible = []
+    for points, obj in zip(world_points, objects):
+        hit_self = False
+        for point in points:
+            direction = point - origin
+            distance = np.linalg.norm(direction)
+            hit, _, _, _, hit_obj, _ = bproc.object.scene_ray_cast(origin, direction / distance, distance * 1.05)
+            if hit and hit_obj is not None and hit_obj.blender_obj == obj.blender_obj:
+                hit_self = True
+                break
+        visible.append(hit_self)
+    return visible
+
+
+def ray_targets(local_vertices, object_pose, num_points=RAYS_PER_OBJECT):
+    """광선 목표점 - 객체 중심 + 표면에서 중심 쪽으로 조금 들어간 점들 (월드 좌표)"""
+    center = local_vertices.mean(axis=0)
+    step = max(len(local_vertices) // max(num_points - 1, 1), 1)
+    surface = local_vertices[::step][:num_points - 1]
+    local_points = np.concatenate([center[None], center + 0.8 * (surface - center)])
+    return local_points @ object_pose[:3, :3].T + object_pose[:3, 3]
+
+
+def select_views(candidates, objects, local_vertices, object_poses, K, resolution, num_views,
+                 min_visible_objects=1, min_area=100.0, use_raycast=True):
+    """
+    후보 카메라 중 보이는 객체가 충분한 뷰만 앞에서부터 num_views개 채택
+    1) 모든 후보 × 객체 투영 (frustum + 투영 면적) - 벡터화
+    2) 통과한 객체만 광선 검사로 실제 가시성 확인 (use_raycast=False면 bbox 가림 추정으로 대체)
+
+    Returns: (채택된 후보 인덱스 리스트, 후보별 보이는 객체 수 배열)
+    """
+    object_poses = np.asarray(object_poses, dtype=np.float64)
+    result = bbox_projection.project_boxes(local_vertices, object_poses, candidates, K, resolution)
+
+    boxes = result["boxes"]
+    area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    if not use_raycast:
+        area = area * bbox_projection.estimate_visibility(boxes, result["in_view"], result["depth"], resolution)
+    passing = result["in_view"] & (area >= min_area)
+
+    targets = None
+    selected = []
+    num_visible = np.zeros(len(candidates), dtype=int)
+
+    for cam_idx, cam2world in enumerate(candidates):
+        candidate_objects = np.flatnonzero(passing[cam_idx])
+        if len(candidate_objects) < min_visible_objects:
+            continue
+
+        if use_raycast:
+            if targets is None:
+                targets = [ray_targets(v, pose) for v, pose in zip(local_vertices, object_poses)]
+            visible = raycast_visible(
+                cam2world, [targets[i] for i in candidate_objects], [objects[i] for i in candidate_objects]
+            )
+            num_visible[cam_idx] = int(np.sum(visible))
+        else:
+            num_visible[cam_idx] = len(candidate_objects)
+
+        if num_visible[cam_idx] >= min_visible_objects:
+            selected.append(cam_idx)
+            if len(selected) >= num_views:
+                break
+
+    return selected, num_visible
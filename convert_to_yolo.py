@@ -1,3 +1,5 @@
+import argparse
+import filecmp
 import random
 from pathlib import Path
 
@@ -5,6 +7,9 @@ import cv2
 import h5py
 import numpy as np
 
+import bbox_projection
+import dedup_frames
+
 # 카테고리 매핑 (BlenderProc category_id → YOLO class_id)
 CATEGORY_TO_CLASS = {
     1: 0,  # PottedMeatCan → class 0
@@ -15,6 +20,9 @@ CATEGORY_TO_CLASS = {
 
 CLASS_NAMES = ['meat_can', 'banana', 'marker', 'soup_can']
 
+# segmentation bbox ↔ analytic bbox 매칭 최소 IoU
+MATCH_IOU = 0.1
+
 
 def extract_bbox_from_mask(mask):
     """
@@ -48,76 +56,190 @@ def bbox_to_yolo(bbox, img_width, img_height):
     return [x_center, y_center, width, height]
 
 
-def process_hdf5_to_yolo(hdf5_path, output_base_dir, scene_name, camera_idx):
+def segmentation_boxes(instance_segmaps, category_segmaps):
+    """
+    Instance segmentation 마스크에서 bbox 추출
+    Returns: [(class_id, [x_min, y_min, x_max, y_max]), ...]
+    """
+    # Instance별 bbox 추출
+    unique_instances = np.unique(instance_segmaps)
+    unique_instances = unique_instances[unique_instances > 0]  # 배경 제외
+
+    boxes = []
+
+    for inst_id in unique_instances:
+        # Instance 마스크
+        mask = (instance_segmaps == inst_id).astype(np.uint8)
+
+        # Category ID 가져오기
+        if category_segmaps is not None:
+            category_id = int(np.median(category_segmaps[mask > 0]))
+        else:
+            category_id = inst_id  # fallback
+
+        # YOLO class_id로 변환
+        if category_id not in CATEGORY_TO_CLASS:
+            continue
+
+        class_id = CATEGORY_TO_CLASS[category_id]
+
+        # Bbox 추출
+        bbox = extract_bbox_from_mask(mask)
+        if bbox is None:
+            continue
+
+        boxes.append((class_id, bbox))
+
+    return boxes
+
+
+def analytic_boxes(rows):
+    """
+    boxes.json 행 ([category_id, x_min, y_min, x_max, y_max, visibility]) → bbox 리스트
+    Returns: [(class_id, [x_min, y_min, x_max, y_max]), ...]
+    """
+    boxes = []
+    for row in rows:
+        category_id = int(row[0])
+        if category_id not in CATEGORY_TO_CLASS:
+            continue
+        boxes.append((CATEGORY_TO_CLASS[category_id], [float(v) for v in row[1:5]]))
+    return boxes
+
+
+def box_iou(a, b):
+    """두 bbox [x_min, y_min, x_max, y_max]의 IoU"""
+    inter_w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare_boxes(seg_boxes, ana_boxes, comparison):
+    """
+    같은 이미지의 segmentation bbox와 analytic bbox를 클래스별로 greedy 매칭하여 차이 누적
+    comparison: {"ious": [], "edge_errors": [], "missed": int, "extra": int}
+    """
+    unmatched = list(range(len(ana_boxes)))
+
+    for class_id, seg_bbox in seg_boxes:
+        candidates = [(box_iou(seg_bbox, ana_boxes[j][1]), j) for j in unmatched if ana_boxes[j][0] == class_id]
+        best_iou, best_j = max(candidates, default=(0.0, None))
+
+        if best_j is None or best_iou < MATCH_IOU:
+            comparison["missed"] += 1  # segmentation에는 있으나 analytic에서 걸러짐
+            continue
+
+        unmatched.remove(best_j)
+        comparison["ious"].append(best_iou)
+        comparison["edge_errors"].append(np.abs(np.subtract(seg_bbox, ana_boxes[best_j][1])).mean())
+
+    comparison["extra"] += len(unmatched)  # analytic에만 있음 (완전히 가려진 객체 등)
+
+
+def print_comparison_report(comparison):
+    """segmentation ↔ analytic bbox 차이 리포트 출력"""
+    ious = np.array(comparison["ious"])
+    edge_errors = np.array(comparison["edge_errors"])
+
+    print(f"\n{'=' * 60}")
+    print("Segmentation ↔ Analytic BBox 비교")
+    print("=" * 60)
+
+    if len(ious) == 0:
+        print("비교 가능한 이미지가 없습니다. (--label_mode both 로 생성된 데이터 필요)")
+        return
+
+    print(f"매칭된 객체: {len(ious)}개")
+    print(f"  - IoU 평균/중앙값/하위 5%: {ious.mean():.3f} / {np.median(ious):.3f} / {np.percentile(ious, 5):.3f}")
+    print(f"  - IoU < 0.5: {(ious < 0.5).mean() * 100:.1f}%, IoU < 0.75: {(ious < 0.75).mean() * 100:.1f}%")
+    print(f"  - 변 위치 평균 오차: {edge_errors.mean():.1f}px (중앙값 {np.median(edge_errors):.1f}px)")
+    print(f"Segmentation에만 있음 (analytic 누락): {comparison['missed']}개")
+    print(f"Analytic에만 있음 (가림 추정 실패): {comparison['extra']}개")
+
+
+def process_hdf5_to_yolo(hdf5_path, output_base_dir, scene_name, camera_idx, label_source="auto", comparison=None):
     """
     HDF5 파일 → YOLO 형식 변환
+
+    Args:
+        label_source: "segmentation" (instance_segmaps) / "analytic" (boxes.json) / "auto" (segmentation 우선)
+        comparison: 두 방식이 모두 있으면 차이를 누적할 dict (None이면 비교 안 함)
     """
     with h5py.File(hdf5_path, 'r') as f:
         # 데이터 로드
         colors = f['colors'][:]  # RGB (H, W, 3)
-        instance_segmaps = f['instance_segmaps'][:]  # (H, W)
 
-        # Category segmentation 로드
-        if 'category_id_segmaps' in f:
-            category_segmaps = f['category_id_segmaps'][:]
-        else:
-            category_segmaps = None
-
-        img_height, img_width = colors.shape[:2]
+        seg_boxes = None
+        if 'instance_segmaps' in f:
+            instance_segmaps = f['instance_segmaps'][:]  # (H, W)
 
-        # 파일명 생성
-        image_filename = f"{scene_name}_cam{camera_idx}.png"
-        label_filename = f"{scene_name}_cam{camera_idx}.txt"
+            # Category segmentation 로드
+            if 'category_id_segmaps' in f:
+                category_segmaps = f['category_id_segmaps'][:]
+            else:
+                category_segmaps = None
 
-        # 이미지 저장
-        image_path = output_base_dir / "images" / image_filename
-        cv2.imwrite(str(image_path), cv2.cvtColor(colors, cv2.COLOR_RGB2BGR))
+            seg_boxes = segmentation_boxes(instance_segmaps, category_segmaps)
 
-        # Instance별 bbox 추출
-        unique_instances = np.unique(instance_segmaps)
-        unique_instances = unique_instances[unique_instances > 0]  # 배경 제외
+    img_height, img_width = colors.shape[:2]
 
-        # YOLO 라벨 생성
-        yolo_labels = []
+    # 메쉬 투영 bbox (boxes.json, 해상도가 다르면 스케일)
+    ana_boxes = None
+    analytic = bbox_projection.read_boxes(Path(hdf5_path).parent)
+    if analytic is not None:
+        cameras, (box_width, box_height) = analytic
+        rows = cameras[int(camera_idx)].copy()
+        rows[:, [1, 3]] *= img_width / box_width
+        rows[:, [2, 4]] *= img_height / box_height
+        ana_boxes = analytic_boxes(rows)
 
-        for inst_id in unique_instances:
-            # Instance 마스크
-            mask = (instance_segmaps == inst_id).astype(np.uint8)
+    if label_source == "auto":
+        label_source = "segmentation" if seg_boxes is not None else "analytic"
+    boxes = seg_boxes if label_source == "segmentation" else ana_boxes
+    if boxes is None:
+        raise ValueError(f"{hdf5_path}: '{label_source}' 라벨 데이터가 없습니다.")
 
-            # Category ID 가져오기
-            if category_segmaps is not None:
-                category_id = int(np.median(category_segmaps[mask > 0]))
-            else:
-                category_id = inst_id  # fallback
+    if comparison is not None and seg_boxes is not None and ana_boxes is not None:
+        compare_boxes(seg_boxes, ana_boxes, comparison)
 
-            # YOLO class_id로 변환
-            if category_id not in CATEGORY_TO_CLASS:
-                continue
+    # 파일명 생성
+    image_filename = f"{scene_name}_cam{camera_idx}.png"
+    label_filename = f"{scene_name}_cam{camera_idx}.txt"
 
-            class_id = CATEGORY_TO_CLASS[category_id]
+    # 이미지 저장
+    image_path = output_base_dir / "images" / image_filename
+    cv2.imwrite(str(image_path), cv2.cvtColor(colors, cv2.COLOR_RGB2BGR))
 
-            # Bbox 추출
-            bbox = extract_bbox_from_mask(mask)
-            if bbox is None:
-                continue
+    # YOLO 라벨 생성
+    yolo_labels = [[class_id] + bbox_to_yolo(bbox, img_width, img_height) for class_id, bbox in boxes]
 
-            # YOLO 형식으로 변환
-            yolo_bbox = bbox_to_yolo(bbox, img_width, img_height)
+    # 라벨 파일 저장
+    label_path = output_base_dir / "labels" / label_filename
+    with open(label_path, 'w') as f:
+        for label in yolo_labels:
+            class_id, x_c, y_c, w, h = label
+            f.write(f"{class_id} {x_c:.6f} {y_c:.6f} {w:.6f} {h:.6f}\n")
 
-            # 라벨 추가
-            yolo_labels.append([class_id] + yolo_bbox)
+    return len(yolo_labels)
 
-        # 라벨 파일 저장
-        label_path = output_base_dir / "labels" / label_filename
-        with open(label_path, 'w') as f:
-            for label in yolo_labels:
-                class_id, x_c, y_c, w, h = label
-                f.write(f"{class_id} {x_c:.6f} {y_c:.6f} {w:.6f} {h:.6f}\n")
 
-        return len(yolo_labels)
+def replace_if_changed(src, dst):
+    """
+    src → dst 이동, 내용이 같으면 dst를 그대로 두어 mtime 유지
+    (다시 변환해도 dataset_stats 캐시 / dedup 인덱스가 바뀌지 않은 파일을 재계산하지 않도록)
+    Returns: 실제로 교체했는지 여부
+    """
+    if dst.exists() and filecmp.cmp(src, dst, shallow=False):
+        src.unlink()
+        return False
+    src.replace(dst)
+    return True
 
 
-def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo", train_ratio=0.8):
+def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo", train_ratio=0.8,
+                             label_source="auto", compare=False, dedup=False):
     """
     모든 HDF5 파일을 YOLO 형식으로 변환 및 train/val 분리
     
@@ -125,6 +247,9 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
         input_dir: HDF5 파일이 있는 디렉토리
         output_dir: YOLO 형식으로 저장할 디렉토리
         train_ratio: 학습 데이터 비율 (기본 0.8 = 80% train, 20% val)
+        label_source: bbox 출처 ("auto" / "segmentation" / "analytic")
+        compare: segmentation ↔ analytic bbox 차이 리포트 출력
+        dedup: 변환 후 학습 split의 근접 중복 프레임 제거 (dedup_frames)
     """
     print("=" * 60)
     print("HDF5 → YOLO 형식 변환 + Train/Val 분리")
@@ -140,7 +265,7 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
     (output_path / "labels" / "val").mkdir(parents=True, exist_ok=True)
 
     # 모든 HDF5 파일 찾기
-    hdf5_files = list(input_path.glob("scene_*/[0-9].hdf5"))
+    hdf5_files = [p for p in input_path.glob("scene_*/*.hdf5") if p.stem.isdigit()]  # 카메라 뷰 10개 이상 포함
 
     if not hdf5_files:
         print(f"✗ HDF5 파일을 찾을 수 없습니다: {input_path}")
@@ -158,6 +283,8 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
     train_files = hdf5_files[:split_idx]
     val_files = hdf5_files[split_idx:]
 
+    comparison = {"ious": [], "edge_errors": [], "missed": 0, "extra": 0} if compare else None
+
     total_images = 0
     total_objects = 0
     train_count = 0
@@ -175,14 +302,14 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
         (temp_output / "images").mkdir(exist_ok=True)
         (temp_output / "labels").mkdir(exist_ok=True)
 
-        num_objects = process_hdf5_to_yolo(hdf5_file, temp_output, scene_name, camera_idx)
+        num_objects = process_hdf5_to_yolo(hdf5_file, temp_output, scene_name, camera_idx, label_source, comparison)
 
         # train 폴더로 이동
         image_file = f"{scene_name}_cam{camera_idx}.png"
         label_file = f"{scene_name}_cam{camera_idx}.txt"
 
-        (temp_output / "images" / image_file).replace(output_path / "images" / "train" / image_file)
-        (temp_output / "labels" / label_file).replace(output_path / "labels" / "train" / label_file)
+        replace_if_changed(temp_output / "images" / image_file, output_path / "images" / "train" / image_file)
+        replace_if_changed(temp_output / "labels" / label_file, output_path / "labels" / "train" / label_file)
 
         total_images += 1
         total_objects += num_objects
@@ -196,14 +323,14 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
         scene_name = hdf5_file.parent.name
         camera_idx = hdf5_file.stem
 
-        num_objects = process_hdf5_to_yolo(hdf5_file, temp_output, scene_name, camera_idx)
+        num_objects = process_hdf5_to_yolo(hdf5_file, temp_output, scene_name, camera_idx, label_source, comparison)
 
         # val 폴더로 이동
         image_file = f"{scene_name}_cam{camera_idx}.png"
         label_file = f"{scene_name}_cam{camera_idx}.txt"
 
-        (temp_output / "images" / image_file).replace(output_path / "images" / "val" / image_file)
-        (temp_output / "labels" / label_file).replace(output_path / "labels" / "val" / label_file)
+        replace_if_changed(temp_output / "images" / image_file, output_path / "images" / "val" / image_file)
+        replace_if_changed(temp_output / "labels" / label_file, output_path / "labels" / "val" / label_file)
 
         total_images += 1
         total_objects += num_objects
@@ -224,6 +351,10 @@ def convert_all_hdf5_to_yolo(input_dir="dataset/raw", output_dir="dataset/yolo",
     print(f"총 객체: {total_objects}개")
     print(f"평균 객체/이미지: {total_objects / total_images:.1f}개\n")
 
+    if comparison is not None:
+        print_comparison_report(comparison)
+        print()
+
     # data.yaml 생성
     yaml_content = f"""# YOLO Dataset Configuration
 path: {output_path.absolute()}
@@ -240,6 +371,10 @@ names: {CLASS_NAMES}
 
     print(f"✓ data.yaml 생성: {yaml_path}")
 
+    if dedup:
+        print()
+        dedup_frames.deduplicate(output_path)
+
     print(f"\n디렉토리 구조:")
     print(f"  {output_dir}/")
     print(f"    ├── images/")
@@ -257,4 +392,16 @@ names: {CLASS_NAMES}
 
 
 if __name__ == "__main__":
-    convert_all_hdf5_to_yolo()
+    parser = argparse.ArgumentParser(description='HDF5 → YOLO 형식 변환')
+    parser.add_argument('--input_dir', type=str, default='dataset/raw', help='HDF5 디렉토리')
+    parser.add_argument('--output_dir', type=str, default='dataset/yolo', help='YOLO 출력 디렉토리')
+    parser.add_argument('--train_ratio', type=float, default=0.8, help='학습 데이터 비율')
+    parser.add_argument('--label_source', type=str, default='auto', choices=['auto', 'segmentation', 'analytic'],
+                        help='bbox 출처 (auto: segmentation 우선, 없으면 boxes.json)')
+    parser.add_argument('--compare', action='store_true',
+                        help='segmentation ↔ analytic bbox 차이 리포트 (--label_mode both 데이터)')
+    parser.add_argument('--dedup', action='store_true', help='변환 후 근접 중복 프레임 제거 (dedup_frames.py)')
+    args = parser.parse_args()
+
+    convert_all_hdf5_to_yolo(args.input_dir, args.output_dir, args.train_ratio, args.label_source, args.compare,
+                             args.dedup)
@@ -0,0 +1,344 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from convert_to_yolo import CLASS_NAMES
+
+# ======================================================
+# 설정
+# ======================================================
+CACHE_FILENAME = ".stats_cache.json"   # YOLO 데이터셋 폴더에 저장
+CACHE_VERSION = 2
+SPLITS = ("train", "val")
+SCENES_PER_BUCKET = 256                # 버킷 단위로 캐시/재계산 (새 씬은 마지막 버킷에만 추가됨)
+CHUNK_FILES = 4096                     # 한 번에 메모리에 올리는 라벨 파일 수
+MAX_CAMERAS = 16                       # 카메라 뷰별 통계 (이상은 마지막 칸에 합산)
+MAX_OBJECTS = 64                       # 이미지당 객체 수 히스토그램 상한
+
+NUM_CLASSES = len(CLASS_NAMES)
+AREA_BINS = np.logspace(-5, 0, 21)          # 정규화 bbox 면적 (w*h)
+ASPECT_BINS = np.logspace(-3, 3, 19, base=2)  # 정규화 w/h
+SIZE_BINS = np.linspace(0, 1, 21)           # 정규화 폭/높이
+
+LABEL_NAME = re.compile(r"^(?P<scene>.+?)_cam(?P<cam>\d+)\.txt$")
+SCENE_NUMBER = re.compile(r"(\d+)$")
+
+
+def empty_stats():
+    """버킷 하나의 누적 통계 (모두 정수 카운트 → 버킷끼리 더하면 합계)"""
+    return {
+        "images": np.zeros(1, dtype=np.int64),
+        "scenes": np.zeros(1, dtype=np.int64),
+        "class_counts": np.zeros(NUM_CLASSES, dtype=np.int64),
+        "class_images": np.zeros(NUM_CLASSES, dtype=np.int64),
+        "area_hist": np.zeros(len(AREA_BINS) + 1, dtype=np.int64),
+        "aspect_hist": np.zeros(len(ASPECT_BINS) + 1, dtype=np.int64),
+        "width_hist": np.zeros(len(SIZE_BINS) + 1, dtype=np.int64),
+        "height_hist": np.zeros(len(SIZE_BINS) + 1, dtype=np.int64),
+        "objects_hist": np.zeros(MAX_OBJECTS + 1, dtype=np.int64),
+        "camera_images": np.zeros(MAX_CAMERAS, dtype=np.int64),
+        "camera_class_counts": np.zeros(MAX_CAMERAS * NUM_CLASSES, dtype=np.int64),
+    }
+
+
+def add_stats(total, stats):
+    """통계 누적 (in-place)"""
+    for key, value in stats.items():
+        total[key] += value
+    return total
+
+
+# ======================================================
+# 파일 → 버킷
+# ======================================================
+def bucket_of(filename):
+    """라벨 파일이 속한 버킷 키 (씬 번호 기준, 형식이 다르면 'misc')"""
+    match = LABEL_NAME.match(filename)
+    scene_match = SCENE_NUMBER.search(match.group("scene")) if match else None
+    if scene_match is None:
+        return "misc"
+    return f"{int(scene_match.group(1)) // SCENES_PER_BUCKET:06d}"
+
+
+def scan_buckets(labels_dir):
+    """
+    라벨 폴더를 훑어 버킷별 지문 계산 (파일 이름/mtime/크기의 XOR 해시 → 순서 무관, O(버킷) 메모리)
+    Returns: {버킷 키: {"digest": hex, "files": int}}
+    """
+    buckets = {}
+    if not labels_dir.exists():
+        return buckets
+
+    with os.scandir(labels_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt"):
+                continue
+            stat = entry.stat()
+            key = bucket_of(entry.name)
+            file_hash = int.from_bytes(hashlib.blake2b(
+                f"{entry.name}:{stat.st_mtime_ns}:{stat.st_size}".encode(), digest_size=8
+            ).digest(), "little")
+            bucket = buckets.setdefault(key, {"digest": 0, "files": 0})
+            bucket["digest"] ^= file_hash
+            bucket["files"] += 1
+
+    return {key: {"digest": f"{b['digest']:016x}", "files": b["files"]} for key, b in buckets.items()}
+
+
+# ======================================================
+# 버킷 통계 계산 (벡터화)
+# ======================================================
+def _accumulate_chunk(stats, tokens, per_file_counts, cameras):
+    """청크 단위로 모은 라벨 행을 NumPy로 한 번에 집계"""
+    per_file_counts = np.asarray(per_file_counts, dtype=np.int64)
+    cameras = np.minimum(np.asarray(cameras, dtype=np.int64), MAX_CAMERAS - 1)
+
+    stats["images"] += len(per_file_counts)
+    stats["objects_hist"] += np.bincount(np.minimum(per_file_counts, MAX_OBJECTS), minlength=MAX_OBJECTS + 1)
+    stats["camera_images"] += np.bincount(cameras, minlength=MAX_CAMERAS)
+
+    if not tokens:
+        return
+
+    rows = np.array(tokens, dtype=np.float64).reshape(-1, 5)
+    classes = rows[:, 0].astype(np.int64)
+    valid = (classes >= 0) & (classes < NUM_CLASSES)
+    image_ids = np.repeat(np.arange(len(per_file_counts)), per_file_counts)[valid]
+    row_cameras = cameras[image_ids]
+    rows, classes = rows[valid], classes[valid]
+    widths, heights = rows[:, 3], rows[:, 4]
+
+    stats["class_counts"] += np.bincount(classes, minlength=NUM_CLASSES)
+    stats["area_hist"] += np.bincount(np.digitize(widths * heights, AREA_BINS), minlength=len(AREA_BINS) + 1)
+    aspect = np.divide(widths, heights, out=np.ones_like(widths), where=heights > 0)
+    stats["aspect_hist"] += np.bincount(np.digitize(aspect, ASPECT_BINS), minlength=len(ASPECT_BINS) + 1)
+    stats["width_hist"] += np.bincount(np.digitize(widths, SIZE_BINS), minlength=len(SIZE_BINS) + 1)
+    stats["height_hist"] += np.bincount(np.digitize(heights, SIZE_BINS), minlength=len(SIZE_BINS) + 1)
+    stats["camera_class_counts"] += np.bincount(
+        row_cameras * NUM_CLASSES + classes, minlength=MAX_CAMERAS * NUM_CLASSES
+    )
+
+    # 클래스가 등장한 이미지 수 (이미지×클래스 조합 중복 제거)
+    pairs = np.unique(image_ids * NUM_CLASSES + classes)
+    stats["class_images"] += np.bincount(pairs % NUM_CLASSES, minlength=NUM_CLASSES)
+
+
+def compute_bucket_stats(labels_dir, keys):
+    """
+    지정한 버킷들의 라벨 파일만 다시 읽어 통계 계산
+    모든 버킷을 합쳐 대기 중인 파일이 CHUNK_FILES개가 되면 한꺼번에 집계 → 메모리 상한 고정
+    Returns: {버킷 키: (통계, 씬 이름 리스트)}
+    """
+    keys = set(keys)
+    results = {key: empty_stats() for key in keys}
+    scenes = {key: set() for key in keys}
+    pending = {key: ([], [], []) for key in keys}
+    num_pending = 0
+
+    def flush_all():
+        for key, (tokens, counts, cameras) in pending.items():
+            if counts:
+                _accumulate_chunk(results[key], tokens, counts, cameras)
+                pending[key] = ([], [], [])
+
+    with os.scandir(labels_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt"):
+                continue
+            key = bucket_of(entry.name)
+            if key not in keys:
+                continue
+
+            match = LABEL_NAME.match(entry.name)
+            scenes[key].add(match.group("scene") if match else entry.name)
+
+            with open(entry.path, 'r') as f:
+                file_tokens = f.read().split()
+            tokens, counts, cameras = pending[key]
+            usable = len(file_tokens) - len(file_tokens) % 5
+            tokens.extend(file_tokens[:usable])
+            counts.append(usable // 5)
+            cameras.append(int(match.group("cam")) if match else 0)
+
+            num_pending += 1
+            if num_pending >= CHUNK_FILES:
+                flush_all()
+                num_pending = 0
+
+    flush_all()
+    for key in keys:
+        results[key]["scenes"] += len(scenes[key])
+    return {key: (results[key], sorted(scenes[key])) for key in keys}
+
+
+# ======================================================
+# 캐시 + 증분 갱신
+# ======================================================
+def load_cache(dataset_dir):
+    """통계 캐시 로드 (없거나 버전/빈 설정이 다르면 빈 캐시)"""
+    path = Path(dataset_dir) / CACHE_FILENAME
+    if path.exists():
+        with open(path, 'r') as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION and cache.get("classes") == CLASS_NAMES:
+            for bucket in cache["buckets"].values():
+                bucket["stats"] = {k: np.array(v, dtype=np.int64) for k, v in bucket["stats"].items()}
+            return cache
+    return {"version": CACHE_VERSION, "classes": CLASS_NAMES, "buckets": {}}
+
+
+def save_cache(dataset_dir, cache):
+    """통계 캐시 저장 (임시 파일 → rename)"""
+    path = Path(dataset_dir) / CACHE_FILENAME
+    serializable = {
+        **cache,
+        "buckets": {
+            key: {**bucket, "stats": {k: v.tolist() for k, v in bucket["stats"].items()}}
+            for key, bucket in cache["buckets"].items()
+        },
+    }
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(serializable, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def compute_stats(dataset_dir="dataset/yolo", splits=SPLITS, use_cache=True, verbose=True):
+    """
+    labels/{split}/*.txt 전체 통계 (바뀐 버킷만 다시 읽음)
+    Returns: {split: 통계, ..., "all": 합계}
+    """
+    dataset_dir = Path(dataset_dir)
+    cache = load_cache(dataset_dir) if use_cache else {"version": CACHE_VERSION, "classes": CLASS_NAMES, "buckets": {}}
+    result = {}
+    recomputed = 0
+    total_buckets = 0
+
+    for split in splits:
+        labels_dir = dataset_dir / "labels" / split
+        current = scan_buckets(labels_dir)
+        total_buckets += len(current)
+
+        changed = [
+            key for key, info in current.items()
+            if cache["buckets"].get(f"{split}/{key}", {}).get("digest") != info["digest"]
+        ]
+        if changed:
+            for key, (stats, scene_names) in compute_bucket_stats(labels_dir, changed).items():
+                cache["buckets"][f"{split}/{key}"] = {**current[key], "stats": stats, "scene_names": scene_names}
+            recomputed += len(changed)
+
+        # 사라진 버킷 제거
+        for cache_key in [k for k in cache["buckets"] if k.startswith(f"{split}/")]:
+            if cache_key.split("/", 1)[1] not in current:
+                del cache["buckets"][cache_key]
+
+        result[split] = empty_stats()
+        for key in current:
+            add_stats(result[split], cache["buckets"][f"{split}/{key}"]["stats"])
+
+    # 한 씬의 뷰가 train/val에 나뉘어 들어갈 수 있으므로 전체 씬 수는 씬 이름 합집합으로 계산
+    result["all"] = empty_stats()
+    all_scenes = set()
+    for split in splits:
+        add_stats(result["all"], result[split])
+        for cache_key, bucket in cache["buckets"].items():
+            if cache_key.startswith(f"{split}/"):
+                all_scenes.update(bucket["scene_names"])
+    result["all"]["scenes"][0] = len(all_scenes)
+
+    if use_cache:
+        save_cache(dataset_dir, cache)
+    if verbose:
+        print(f"버킷: {total_buckets}개 (다시 계산 {recomputed}개, 캐시 사용 {total_buckets - recomputed}개)")
+
+    return result
+
+
+# ======================================================
+# 리포트
+# ======================================================
+def histogram_percentile(hist, bins, q):
+    """히스토그램에서 q 분위수 근사 (해당 칸의 위쪽 경계)"""
+    total = hist.sum()
+    if total == 0:
+        return float("nan")
+    idx = int(np.searchsorted(np.cumsum(hist), q * total))
+    edges = np.concatenate([[bins[0]], bins])
+    return float(edges[min(idx, len(edges) - 1)])
+
+
+def print_report(stats, target_per_class=None):
+    """통계 리포트 출력"""
+    for split, s in stats.items():
+        images = int(s["images"][0])
+        objects = int(s["class_counts"].sum())
+        print(f"\n[{split}] 이미지 {images}개, 씬 {int(s['scenes'][0])}개, 객체 {objects}개, "
+              f"평균 객체/이미지 {objects / max(images, 1):.2f}")
+
+        print(f"  {'클래스':<12}{'객체':>10}{'비율':>8}{'이미지':>10}")
+        for c, name in enumerate(CLASS_NAMES):
+            count = int(s["class_counts"][c])
+            print(f"  {name:<12}{count:>10}{count / max(objects, 1) * 100:>7.1f}%{int(s['class_images'][c]):>10}")
+
+        print("  bbox 면적(정규화) p10/p50/p90: " + " / ".join(
+            f"{histogram_percentile(s['area_hist'], AREA_BINS, q):.4f}" for q in (0.1, 0.5, 0.9)))
+        print("  가로세로비 p10/p50/p90: " + " / ".join(
+            f"{histogram_percentile(s['aspect_hist'], ASPECT_BINS, q):.2f}" for q in (0.1, 0.5, 0.9)))
+
+        objects_hist = s["objects_hist"]
+        nonzero = np.flatnonzero(objects_hist)
+        print("  객체 수/이미지: " + ", ".join(f"{n}개×{int(objects_hist[n])}" for n in nonzero[:12]))
+
+        camera_images = s["camera_images"]
+        camera_classes = s["camera_class_counts"].reshape(MAX_CAMERAS, NUM_CLASSES)
+        for cam in np.flatnonzero(camera_images):
+            per_class = ", ".join(f"{name} {int(camera_classes[cam, c])}" for c, name in enumerate(CLASS_NAMES))
+            print(f"  cam{cam}: 이미지 {int(camera_images[cam])}개 ({per_class})")
+
+    if target_per_class:
+        s = stats["all"]
+        scenes = max(int(s["scenes"][0]), 1)
+        print(f"\n목표 클래스당 {target_per_class}개 기준 추가 필요 씬 수 (현재 씬당 평균 생산량으로 추정):")
+        for c, name in enumerate(CLASS_NAMES):
+            count = int(s["class_counts"][c])
+            per_scene = count / scenes
+            deficit = max(target_per_class - count, 0)
+            needed = int(np.ceil(deficit / per_scene)) if per_scene > 0 else "∞"
+            print(f"  {name:<12} 현재 {count:>8} / 부족 {deficit:>8} → 약 {needed} 씬")
+
+
+def stats_to_json(stats):
+    """통계 → JSON 직렬화 가능한 dict"""
+    return {
+        "classes": CLASS_NAMES,
+        "bins": {"area": AREA_BINS.tolist(), "aspect": ASPECT_BINS.tolist(), "size": SIZE_BINS.tolist()},
+        "splits": {split: {k: v.tolist() for k, v in s.items()} for split, s in stats.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='YOLO 라벨 데이터셋 통계')
+    parser.add_argument('--dataset_dir', type=str, default='dataset/yolo', help='YOLO 데이터셋 디렉토리')
+    parser.add_argument('--no_cache', action='store_true', help='캐시를 무시하고 전체 다시 계산')
+    parser.add_argument('--target_per_class', type=int, default=None, help='클래스별 목표 객체 수 (필요 씬 수 추정)')
+    parser.add_argument('--json', type=str, default=None, help='통계를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("데이터셋 통계")
+    print("=" * 60)
+
+    stats = compute_stats(args.dataset_dir, use_cache=not args.no_cache)
+    print_report(stats, args.target_per_class)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats_to_json(stats), f, indent=2)
+        print(f"\n✓ JSON 저장: {args.json}")
+    print("=" * 60)
@@ -0,0 +1,322 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# ======================================================
+# 설정
+# ======================================================
+INDEX_FILENAME = "dedup_index.json"   # YOLO 데이터셋 폴더에 저장되는 영구 인덱스
+INDEX_VERSION = 1
+HASH_BANDS = 8                         # 64bit 해시를 8bit씩 나눈 밴드 (후보 검색용)
+DEFAULT_THRESHOLD = 6                  # 해밍 거리 임계값 (< HASH_BANDS)
+DEFAULT_BOX_TOLERANCE = 0.02           # 라벨 bbox 중심/크기 허용 오차 (정규화 좌표)
+
+
+# ======================================================
+# 이미지 해시 / 라벨 시그니처
+# ======================================================
+def compute_phash(image_path):
+    """
+    DCT 기반 perceptual hash (64bit)
+    32x32 흑백 축소 → DCT → 저주파 8x8 블록을 중앙값과 비교
+    """
+    gray = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {image_path}")
+
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    block = cv2.dct(small)[:8, :8].flatten()
+    bits = block > np.median(block[1:])  # DC 성분 제외한 중앙값
+
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def read_label_signature(label_path):
+    """라벨 파일 → (class, x_c, y_c, w, h) 행을 클래스/좌표 순으로 정렬한 리스트"""
+    if not os.path.exists(label_path):
+        return []
+    rows = []
+    with open(label_path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 5:
+                rows.append([int(parts[0])] + [round(float(v), 4) for v in parts[1:]])
+    return sorted(rows)
+
+
+def labels_close(a, b, tolerance=DEFAULT_BOX_TOLERANCE):
+    """두 라벨 시그니처가 같은 클래스 구성이고 bbox가 허용 오차 이내인지"""
+    if len(a) != len(b) or [row[0] for row in a] != [row[0] for row in b]:
+        return False
+    if not a:
+        return True
+
+    # 클래스별로 가장 가까운 bbox끼리 greedy 매칭
+    remaining = list(range(len(b)))
+    for row in a:
+        best = min(
+            (j for j in remaining if b[j][0] == row[0]),
+            key=lambda j: max(abs(row[k] - b[j][k]) for k in range(1, 5)),
+        )
+        if max(abs(row[k] - b[best][k]) for k in range(1, 5)) > tolerance:
+            return False
+        remaining.remove(best)
+    return True
+
+
+def hamming(a, b):
+    """두 64bit 해시의 해밍 거리"""
+    return bin(a ^ b).count("1")
+
+
+def hash_bands(value):
+    """64bit 해시 → (밴드 번호, 밴드 값) 리스트"""
+    width = 64 // HASH_BANDS
+    mask = (1 << width) - 1
+    return [(band, (value >> (band * width)) & mask) for band in range(HASH_BANDS)]
+
+
+# ======================================================
+# 영구 인덱스
+# ======================================================
+def file_digest(path, chunk_size=1 << 20):
+    """파일 내용 해시 (이미지 디코딩/DCT 없이 바이트만 읽음)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_index(dataset_dir):
+    """인덱스 로드 (없거나 버전이 다르면 빈 인덱스)"""
+    path = Path(dataset_dir) / INDEX_FILENAME
+    if path.exists():
+        with open(path, 'r') as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index
+    return {"version": INDEX_VERSION, "entries": {}}
+
+
+def save_index(dataset_dir, index):
+    """인덱스 저장 (임시 파일 → rename)"""
+    path = Path(dataset_dir) / INDEX_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def update_index(dataset_dir, index, split="train"):
+    """
+    새로 추가되었거나 바뀐 이미지만 해시 계산, 사라진 이미지는 제거
+    - mtime/크기가 같으면 그대로 사용
+    - 다르면 파일 내용 해시를 비교 → convert_to_yolo가 같은 이미지를 다시 쓴 경우 phash 재계산 생략
+    Returns: (새로 해시한 이미지 수, 제거된 항목 수)
+    """
+    dataset_dir = Path(dataset_dir)
+    entries = index["entries"]
+    seen = set()
+    hashed = 0
+
+    for image_path in sorted((dataset_dir / "images" / split).glob("*.png")):
+        stem = image_path.stem
+        seen.add(stem)
+        stat = image_path.stat()
+        entry = entries.get(stem)
+
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            continue
+
+        label_path = dataset_dir / "labels" / split / f"{stem}.txt"
+        digest = file_digest(image_path)
+        if entry and entry.get("digest") == digest and entry["size"] == stat.st_size:
+            # 내용은 같고 다시 쓰기만 됨 - 라벨만 다시 읽음
+            entry["mtime"] = stat.st_mtime_ns
+            entry["labels"] = read_label_signature(label_path)
+            continue
+
+        entries[stem] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            "phash": f"{compute_phash(image_path):016x}",
+            "labels": read_label_signature(label_path),
+            "duplicate_of": None,
+        }
+        hashed += 1
+
+    # 중복으로 처리되어 duplicates/ 로 옮겨진 항목은 유지
+    removed = [stem for stem, entry in entries.items() if stem not in seen and not entry.get("moved")]
+    for stem in removed:
+        del entries[stem]
+
+    return hashed, len(removed)
+
+
+def assign_duplicates(index, threshold=DEFAULT_THRESHOLD, tolerance=DEFAULT_BOX_TOLERANCE, keep_per_cluster=1):
+    """
+    씬 이름 순으로 훑으며 대표 이미지와 해시/라벨이 모두 가까우면 중복으로 표시
+    밴드 버킷으로 후보만 비교하므로 전체 쌍 비교(O(n²))를 피함
+    keep_per_cluster > 1 이면 클러스터당 그만큼은 남겨 완전 삭제 대신 가중치만 낮춤
+
+    Returns: 중복 이미지 stem 리스트
+    """
+    if threshold >= HASH_BANDS:
+        raise ValueError(f"threshold는 {HASH_BANDS} 미만이어야 합니다 (밴드 검색 보장 범위)")
+
+    buckets = {}
+    cluster_sizes = {}
+    duplicates = []
+
+    for stem in sorted(index["entries"]):
+        entry = index["entries"][stem]
+        if entry.get("moved"):
+            continue  # 이미 학습 세트에서 빠진 항목
+        value = int(entry["phash"], 16)
+
+        candidates = {rep for key in hash_bands(value) for rep in buckets.get(key, ())}
+        match = None
+        for rep in sorted(candidates):
+            rep_entry = index["entries"][rep]
+            if hamming(value, int(rep_entry["phash"], 16)) <= threshold and \
+                    labels_close(entry["labels"], rep_entry["labels"], tolerance):
+                match = rep
+                break
+
+        if match is None:
+            entry["duplicate_of"] = None
+            cluster_sizes[stem] = 1
+            for key in hash_bands(value):
+                buckets.setdefault(key, []).append(stem)
+            continue
+
+        cluster_sizes[match] += 1
+        if cluster_sizes[match] <= keep_per_cluster:
+            entry["duplicate_of"] = None
+        else:
+            entry["duplicate_of"] = match
+            duplicates.append(stem)
+
+    return duplicates
+
+
+# ======================================================
+# 적용 (목록 / 이동)
+# ======================================================
+def write_train_list(dataset_dir, index, split="train"):
+    """중복을 제외한 학습 이미지 목록 파일 생성 + data.yaml의 train 경로 갱신"""
+    dataset_dir = Path(dataset_dir)
+    list_path = dataset_dir / "images" / f"{split}_dedup.txt"
+
+    with open(list_path, 'w') as f:
+        for stem, entry in sorted(index["entries"].items()):
+            if entry["duplicate_of"] is None and not entry.get("moved"):
+                f.write(f"{(dataset_dir / 'images' / split / f'{stem}.png').absolute()}\n")
+
+    yaml_path = dataset_dir / "data.yaml"
+    if yaml_path.exists():
+        content = yaml_path.read_text()
+        content = re.sub(rf"^{split}: .*$", f"{split}: images/{list_path.name}", content, flags=re.MULTILINE)
+        yaml_path.write_text(content)
+
+    return list_path
+
+
+def move_duplicates(dataset_dir, index, split="train"):
+    """중복 이미지/라벨을 duplicates/ 폴더로 이동 (되돌릴 수 있음)"""
+    dataset_dir = Path(dataset_dir)
+    moved = 0
+    for kind in ("images", "labels"):
+        (dataset_dir / "duplicates" / kind).mkdir(parents=True, exist_ok=True)
+
+    for stem, entry in index["entries"].items():
+        if entry["duplicate_of"] is None or entry.get("moved"):
+            continue
+        for kind, ext in (("images", "png"), ("labels", "txt")):
+            src = dataset_dir / kind / split / f"{stem}.{ext}"
+            if src.exists():
+                shutil.move(str(src), str(dataset_dir / "duplicates" / kind / src.name))
+        entry["moved"] = True
+        moved += 1
+    return moved
+
+
+def epoch_seconds_from_results(results_csv):
+    """Ultralytics results.csv의 누적 time 열에서 epoch당 평균 시간 계산 (없으면 None)"""
+    if not os.path.exists(results_csv):
+        return None
+    with open(results_csv, 'r') as f:
+        rows = list(csv.DictReader(f))
+    times = [float(row[key]) for row in rows for key in row if key.strip() == "time"]
+    if len(times) < 1:
+        return None
+    return times[-1] / len(times)
+
+
+def deduplicate(dataset_dir="dataset/yolo", threshold=DEFAULT_THRESHOLD, tolerance=DEFAULT_BOX_TOLERANCE,
+                keep_per_cluster=1, action="list", results_csv="runs/detect/train/results.csv", epoch_seconds=None):
+    """
+    학습 split의 근접 중복 프레임 제거 (val은 건드리지 않음)
+
+    Args:
+        action: "list" - 중복 제외 목록(train_dedup.txt)으로 data.yaml 갱신 / "move" - 추가로 duplicates/ 로 이동
+        keep_per_cluster: 클러스터당 남길 이미지 수 (1 = 제거, 2 이상 = 가중치 낮춤)
+        epoch_seconds: epoch당 학습 시간 (없으면 results_csv에서 추정)
+    """
+    print("=" * 60)
+    print("근접 중복 프레임 제거 (perceptual hash)")
+    print("=" * 60)
+
+    index = load_index(dataset_dir)
+    hashed, removed = update_index(dataset_dir, index)
+    print(f"인덱스: {len(index['entries'])}개 (새로 해시 {hashed}개, 제거 {removed}개)")
+
+    duplicates = assign_duplicates(index, threshold, tolerance, keep_per_cluster)
+    total = sum(1 for entry in index["entries"].values() if not entry.get("moved"))
+    kept = total - len(duplicates)
+
+    if action == "move":
+        moved = move_duplicates(dataset_dir, index)
+        print(f"중복 {moved}개를 duplicates/ 로 이동")
+
+    list_path = write_train_list(dataset_dir, index)
+    print(f"학습 목록: {list_path} (data.yaml train 경로 갱신)")
+
+    save_index(dataset_dir, index)
+
+    ratio = len(duplicates) / total if total else 0.0
+    print(f"\n학습 이미지: {total}개 → {kept}개 (중복 {len(duplicates)}개, {ratio * 100:.1f}%)")
+
+    epoch_seconds = epoch_seconds or epoch_seconds_from_results(results_csv)
+    if epoch_seconds:
+        print(f"예상 절감: epoch당 약 {epoch_seconds * ratio:.1f}s ({epoch_seconds:.1f}s → {epoch_seconds * (1 - ratio):.1f}s)")
+    else:
+        print(f"예상 절감: epoch당 학습 시간의 약 {ratio * 100:.1f}% (--epoch_seconds 지정 시 초 단위로 표시)")
+    print("=" * 60)
+
+    return duplicates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='YOLO 데이터셋 근접 중복 프레임 제거')
+    parser.add_argument('--dataset_dir', type=str, default='dataset/yolo', help='YOLO 데이터셋 디렉토리')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f'해밍 거리 임계값 (0~{HASH_BANDS - 1})')
+    parser.add_argument('--box_tolerance', type=float, default=DEFAULT_BOX_TOLERANCE, help='라벨 bbox 허용 오차')
+    parser.add_argument('--keep_per_cluster', type=int, default=1, help='클러스터당 남길 이미지 수')
+    parser.add_argument('--action', type=str, default='list', choices=['list', 'move'], help='중복 처리 방식')
+    parser.add_argument('--epoch_seconds', type=float, default=None, help='epoch당 학습 시간 (절감량 계산용)')
+    args = parser.parse_args()
+
+    deduplicate(args.dataset_dir, args.threshold, args.box_tolerance, args.keep_per_cluster, args.action,
+                epoch_seconds=args.epoch_seconds)
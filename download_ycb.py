@@ -1,7 +1,11 @@
+import argparse
+import fnmatch
 import os
-import requests
+import shutil
 import tarfile
-from pathlib import Path
+import time
+
+import downloader
 
 # ======================================================
 # 사용자 설정
@@ -18,77 +22,89 @@ YCB_OBJECTS = [
 ]
 
 BASE_URL = "http://ycb-benchmarks.s3-website-us-east-1.amazonaws.com/data/berkeley"
+MANIFEST_PATH = os.path.join(OUTPUT_FOLDER, "manifest.json")  # 아카이브별 크기/SHA-256
+
+# 압축 해제할 멤버 (오브젝트 폴더 기준 상대 경로 glob)
+DEFAULT_INCLUDE = ["poisson/textured.*", "poisson/texture_map.png"]
+
+# 커맨드 라인 인자
+parser = argparse.ArgumentParser(description='YCB 오브젝트 다운로드 (스트리밍 압축 해제)')
+parser.add_argument('--include', type=str, action='append', default=None,
+                    help=f'압축 해제할 멤버 glob, 여러 번 지정 가능 (기본값: {" ".join(DEFAULT_INCLUDE)})')
+parser.add_argument('--workers', type=int, default=downloader.DEFAULT_WORKERS, help='동시 다운로드 수')
+args = parser.parse_args()
+
+include_patterns = args.include or DEFAULT_INCLUDE
 
 print(f"[INFO] 출력 폴더: {OUTPUT_FOLDER}")
+print(f"[INFO] 압축 해제 대상: {', '.join(include_patterns)}")
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 
 # ======================================================
-# 다운로드 및 압축 해제 함수
+# 스트리밍 압축 해제 (다운로드/재시도/검증은 downloader)
 # ======================================================
-def download_and_extract(object_name):
-    """YCB 오브젝트를 다운로드하고 압축 해제"""
-    
-    # URL 생성
-    tar_filename = f"{object_name}_berkeley_meshes.tgz"
-    url = f"{BASE_URL}/{object_name}/{tar_filename}"
-    
-    # 로컬 경로
-    tar_path = os.path.join(OUTPUT_FOLDER, tar_filename)
-    extract_path = os.path.join(OUTPUT_FOLDER, object_name)
-    
-    # 이미 압축 해제된 폴더가 있으면 스킵
-    obj_file = os.path.join(extract_path, "poisson", "textured.obj")
-    if os.path.exists(obj_file):
-        print(f"[SKIP] {object_name} - 이미 존재합니다.")
-        return
-    
-    print(f"[INFO] 다운로드 중: {object_name}")
-    print(f"       URL: {url}")
-    
-    # 다운로드
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(tar_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = (downloaded / total_size) * 100
-                    print(f"\r       진행률: {percent:.1f}%", end='')
-        
-        print()  # 줄바꿈
-        print(f"[INFO] 다운로드 완료: {tar_filename}")
-        
-    except requests.exceptions.RequestException as e:
-        print(f"[ERROR] 다운로드 실패: {e}")
-        return
-    
-    # 압축 해제
-    print(f"[INFO] 압축 해제 중: {tar_filename}")
-    try:
-        with tarfile.open(tar_path, 'r:gz') as tar:
-            tar.extractall(path=OUTPUT_FOLDER)
-        print(f"[DONE] 압축 해제 완료: {object_name}")
-        
-        # tar 파일 삭제
-        os.remove(tar_path)
-        print(f"[INFO] tar 파일 삭제: {tar_filename}")
-        
-    except Exception as e:
-        print(f"[ERROR] 압축 해제 실패: {e}")
-        return
-    
-    # OBJ 파일 확인
-    if os.path.exists(obj_file):
-        print(f"[OK] OBJ 파일 확인: {obj_file}")
-    else:
-        print(f"[WARN] OBJ 파일을 찾을 수 없습니다: {obj_file}")
+def staging_path(object_name):
+    return os.path.join(OUTPUT_FOLDER, f".{object_name}.partial")
+
+
+def make_extractor(object_name):
+    """
+    응답 스트림에서 필요한 멤버만 임시 폴더로 압축 해제하는 consume 함수
+    아카이브는 디스크에 저장하지 않음 (재시도 시 임시 폴더를 비우고 처음부터)
+    """
+    def extract(reader):
+        staging = staging_path(object_name)
+        shutil.rmtree(staging, ignore_errors=True)
+        written = 0
+        members = 0
+
+        try:
+            with tarfile.open(fileobj=reader, mode='r|gz') as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+
+                    # "<object_name>/poisson/textured.obj" → "poisson/textured.obj"
+                    parts = member.name.split("/")
+                    relative = "/".join(parts[1:]) if parts[0] == object_name else member.name
+                    if ".." in relative.split("/") or os.path.isabs(relative):
+                        continue
+                    if not any(fnmatch.fnmatch(relative, pattern) for pattern in include_patterns):
+                        continue
+
+                    target = os.path.join(staging, object_name, relative)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with tar.extractfile(member) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, downloader.CHUNK_SIZE)
+                    written += member.size
+                    members += 1
+        except (tarfile.TarError, EOFError) as e:
+            raise downloader.DownloadError(f"압축 해제 실패: {e}") from e
+
+        return {"written": written, "members": members}
+
+    return extract
+
+
+def make_finalizer(object_name):
+    """검증을 통과한 임시 폴더를 최종 위치로 rename (중단되어도 반쯤 풀린 폴더가 남지 않음)"""
+    def finalize(result):
+        staging = staging_path(object_name)
+        extract_path = os.path.join(OUTPUT_FOLDER, object_name)
+        shutil.rmtree(extract_path, ignore_errors=True)
+        os.replace(os.path.join(staging, object_name), extract_path)
+        shutil.rmtree(staging, ignore_errors=True)
+
+        print(f"[DONE] {object_name}: {result['members']}개 파일, "
+              f"다운로드 {result['size'] / 1e6:.1f}MB → 기록 {result['written'] / 1e6:.1f}MB")
+
+        # OBJ 파일 확인
+        obj_file = os.path.join(extract_path, "poisson", "textured.obj")
+        if not os.path.exists(obj_file):
+            print(f"[WARN] OBJ 파일을 찾을 수 없습니다: {obj_file}")
+
+    return finalize
 
 
 # ======================================================
@@ -98,11 +114,30 @@ print("==========================================")
 print(f"총 {len(YCB_OBJECTS)}개의 YCB 오브젝트 다운로드 시작")
 print("==========================================")
 
-for obj_name in YCB_OBJECTS:
-    print()
-    download_and_extract(obj_name)
+# 이미 압축 해제된 오브젝트는 스킵 (textured.obj 존재 여부)
+jobs = [
+    {
+        "name": f"{obj_name}_berkeley_meshes.tgz",
+        "url": f"{BASE_URL}/{obj_name}/{obj_name}_berkeley_meshes.tgz",
+        "path": os.path.join(OUTPUT_FOLDER, obj_name, "poisson", "textured.obj"),
+        "stream": make_extractor(obj_name),
+        "finalize": make_finalizer(obj_name),
+    }
+    for obj_name in YCB_OBJECTS
+]
+
+total_start = time.perf_counter()
+succeeded, failed = downloader.download_all(jobs, manifest_path=MANIFEST_PATH, max_workers=args.workers)
+results = [info for info in succeeded.values() if info is not None]
 
 print()
 print("==========================================")
-print("✓ 모든 YCB 오브젝트 다운로드 완료")
+if failed:
+    print(f"✗ {len(failed)}개 오브젝트 다운로드 실패: {', '.join(sorted(failed))}")
+else:
+    print("✓ 모든 YCB 오브젝트 다운로드 완료")
+if results:
+    print(f"  다운로드: {sum(r['size'] for r in results) / 1e6:.1f}MB, "
+          f"디스크 기록: {sum(r['written'] for r in results) / 1e6:.1f}MB, "
+          f"총 {time.perf_counter() - total_start:.1f}s")
 print("==========================================")
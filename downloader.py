@@ -0,0 +1,317 @@
+import hashlib
+import http.client
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ======================================================
+# 설정
+# ======================================================
+DEFAULT_WORKERS = 4          # 동시 다운로드 수
+DEFAULT_RETRIES = 3          # 파일당 재시도 횟수
+CHUNK_SIZE = 1 << 16         # 64KB
+TIMEOUT = 60                 # 소켓 타임아웃 (초)
+PART_SUFFIX = ".part"        # 이어받기용 임시 파일 확장자
+
+
+class DownloadError(Exception):
+    """다운로드/검증 실패"""
+
+
+# ======================================================
+# Manifest (파일별 크기/체크섬)
+# ======================================================
+def load_manifest(manifest_path):
+    """manifest 로드 → {파일 이름: {"size": int, "sha256": str}}"""
+    if manifest_path is None or not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path, manifest):
+    """manifest 저장 (임시 파일 → rename)"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def file_info(path, chunk_size=1 << 20):
+    """파일 크기 + SHA-256"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return {"size": size, "sha256": digest.hexdigest()}
+
+
+def verify_file(path, expected):
+    """
+    파일을 manifest 항목과 비교
+    Returns: None (일치) 또는 불일치 사유 문자열
+    """
+    if not expected:
+        return None
+
+    actual_size = os.path.getsize(path)
+    if "size" in expected and actual_size != expected["size"]:
+        return f"크기 불일치 ({actual_size} != {expected['size']})"
+
+    if "sha256" in expected:
+        actual = file_info(path)["sha256"]
+        if actual != expected["sha256"]:
+            return f"체크섬 불일치 ({actual[:12]}… != {expected['sha256'][:12]}…)"
+
+    return None
+
+
+# ======================================================
+# 단일 파일 다운로드
+# ======================================================
+def open_url(url, offset=0, timeout=TIMEOUT):
+    """URL 열기 (offset > 0 이면 HTTP Range 요청)"""
+    request = urllib.request.Request(url)
+    if offset > 0:
+        request.add_header("Range", f"bytes={offset}-")
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def remote_size(url, timeout=TIMEOUT):
+    """HEAD 요청으로 원격 파일 크기 조회 (알 수 없으면 None)"""
+    request = urllib.request.Request(url, method="HEAD")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content_length = response.headers.get("Content-Length")
+    except (urllib.error.URLError, http.client.HTTPException, OSError):
+        return None
+    return int(content_length) if content_length is not None else None
+
+
+def _total_size(response, offset):
+    """응답 헤더에서 전체 파일 크기 계산 (알 수 없으면 None)"""
+    content_range = response.headers.get("Content-Range")
+    if content_range:
+        match = re.match(r"bytes \d+-\d+/(\d+)", content_range)
+        if match:
+            return int(match.group(1))
+
+    content_length = response.headers.get("Content-Length")
+    if content_length is None:
+        return None
+    return int(content_length) + (offset if response.status == 206 else 0)
+
+
+def with_retries(attempt_fn, url, retries=DEFAULT_RETRIES):
+    """
+    attempt_fn()을 네트워크/검증 오류 시 지수 백오프로 재시도 (4xx는 재시도해도 같은 결과 → 즉시 실패)
+    Returns: attempt_fn 반환값
+    """
+    last_error = None
+    for attempt in range(1, retries + 1):
+        try:
+            return attempt_fn()
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500:
+                raise DownloadError(f"{url}: HTTP {e.code}") from e
+            last_error = e
+        except (urllib.error.URLError, http.client.HTTPException, OSError, DownloadError) as e:
+            last_error = e
+        if attempt < retries:
+            time.sleep(min(2 ** (attempt - 1), 10))
+
+    raise DownloadError(f"{url}: {last_error}")
+
+
+def download_file(url, dest, expected=None, retries=DEFAULT_RETRIES, timeout=TIMEOUT):
+    """
+    URL → dest 다운로드
+    - dest.part 임시 파일에 받으며, 중단되었으면 HTTP Range로 이어받음
+    - 크기/체크섬 검증 후 dest로 원자적 rename (실패 시 dest는 건드리지 않음)
+
+    Returns: {"size": int, "sha256": str}
+    """
+    expected = expected or {}
+    part_path = f"{dest}{PART_SUFFIX}"
+
+    def attempt():
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if "size" in expected and offset > expected["size"]:
+            os.remove(part_path)
+            offset = 0
+
+        if "size" not in expected or offset < expected["size"]:
+            try:
+                response = open_url(url, offset=offset, timeout=timeout)
+            except urllib.error.HTTPError as e:
+                # 416: 이미 끝까지 받은 상태 → 검증 단계로
+                if e.code != 416 or offset == 0:
+                    raise
+                response = None
+
+            if response is not None:
+                with response:
+                    # 서버가 Range를 무시하면 처음부터 다시 받음
+                    if offset > 0 and response.status != 206:
+                        offset = 0
+                    total = _total_size(response, offset)
+
+                    with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                            f.write(chunk)
+
+                received = os.path.getsize(part_path)
+                if total is not None and received < total:
+                    raise DownloadError(f"연결 끊김 ({received}/{total} bytes)")
+
+        reason = verify_file(part_path, expected)
+        if reason is not None:
+            # 손상된 임시 파일은 버리고 처음부터 다시 받음
+            os.remove(part_path)
+            raise DownloadError(reason)
+
+        info = file_info(part_path)
+        os.replace(part_path, dest)
+        return info
+
+    return with_retries(attempt, url, retries)
+
+
+class HashingReader:
+    """읽은 바이트 수와 SHA-256을 함께 계산하는 파일 객체 래퍼"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def drain(self):
+        """소비자가 읽지 않은 나머지 바이트까지 읽어 해시 완성"""
+        for _ in iter(lambda: self.read(CHUNK_SIZE), b''):
+            pass
+
+
+def stream_download(url, consume, expected=None, retries=DEFAULT_RETRIES, timeout=TIMEOUT, finalize=None):
+    """
+    URL 응답을 디스크에 저장하지 않고 consume(reader)로 바로 처리 (예: 스트리밍 압축 해제)
+    - consume은 실패 시 예외를 던지고, 재시도마다 처음부터 다시 호출됨 (결과는 임시 위치에 기록)
+    - 받은 바이트 수를 Content-Length와, 해시를 expected와 비교 (끝이 잘린 스트림 감지)
+    - 검증을 통과한 뒤에만 finalize(result) 호출 (임시 위치 → 최종 위치)
+
+    Returns: {"size": int, "sha256": str, **consume 반환값}
+    """
+    expected = expected or {}
+
+    def attempt():
+        with open_url(url, timeout=timeout) as response:
+            total = _total_size(response, 0)
+            reader = HashingReader(response)
+            result = consume(reader)
+            reader.drain()
+
+        info = {"size": reader.size, "sha256": reader.sha256.hexdigest()}
+        if total is not None and info["size"] != total:
+            raise DownloadError(f"연결 끊김 ({info['size']}/{total} bytes)")
+        if expected.get("size") not in (None, info["size"]):
+            raise DownloadError(f"크기 불일치 ({info['size']} != {expected['size']})")
+        if expected.get("sha256") not in (None, info["sha256"]):
+            raise DownloadError("체크섬 불일치")
+        result = {**info, **(result or {})}
+        if finalize is not None:
+            finalize(result)
+        return result
+
+    return with_retries(attempt, url, retries)
+
+
+# ======================================================
+# 여러 파일 동시 다운로드
+# ======================================================
+def download_all(jobs, manifest_path=None, max_workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES):
+    """
+    여러 파일을 제한된 스레드 풀로 동시에 다운로드
+
+    Args:
+        jobs: [{"name": 파일 이름, "url": URL, "path": 저장 경로, ("size"/"sha256": 기대값)}]
+              "stream": consume(reader) 가 있으면 파일로 저장하지 않고 스트림으로 처리 (stream_download)
+                        이때 "path"는 완료 표시 경로 (있으면 건너뜀), "finalize"는 검증 후 호출
+        manifest_path: 크기/체크섬 manifest 경로 (없으면 첫 다운로드 결과를 기록)
+        max_workers: 동시 다운로드 수
+
+    Returns: ({성공한 이름: 결과 (건너뛴 스트림 작업은 None)}, {실패한 이름: 오류 메시지})
+    """
+    manifest = load_manifest(manifest_path)
+
+    def expected_for(job):
+        expected = dict(manifest.get(job["name"], {}))
+        expected.update({key: job[key] for key in ("size", "sha256") if key in job})
+        return expected
+
+    def run(job):
+        expected = expected_for(job)
+
+        if "stream" in job:
+            if os.path.exists(job["path"]):
+                print(f"[SKIP] {job['name']} 이미 존재")
+                return job["name"], None, "skip"
+            print(f"[DOWNLOAD] {job['name']} (스트리밍)")
+            info = stream_download(job["url"], job["stream"], expected=expected, retries=retries,
+                                   finalize=job.get("finalize"))
+            return job["name"], info, "download"
+
+        if os.path.exists(job["path"]):
+            # manifest 항목이 없는 기존 파일은 원격 Content-Length와 비교 (잘린 파일 방지)
+            # HEAD 요청이 실패하면(오프라인 등) 경고만 하고 기존 파일을 그대로 사용
+            if "size" not in expected:
+                size = remote_size(job["url"])
+                if size is not None:
+                    expected["size"] = size
+                else:
+                    print(f"[WARN] {job['name']} manifest 항목 없음, 원격 크기 확인 불가 → 기존 파일 사용")
+            reason = verify_file(job["path"], expected)
+            if reason is None:
+                print(f"[SKIP] {job['name']} 이미 존재")
+                known = "size" in expected and "sha256" in expected
+                return job["name"], expected if known else file_info(job["path"]), "skip"
+            print(f"[WARN] {job['name']} 검증 실패 ({reason}) → 다시 다운로드")
+
+        print(f"[DOWNLOAD] {job['name']}")
+        start = time.perf_counter()
+        info = download_file(job["url"], job["path"], expected=expected, retries=retries)
+        elapsed = time.perf_counter() - start
+        print(f"[OK] {job['name']} 다운로드 완료 ({info['size'] / 1e6:.1f}MB, {elapsed:.1f}s)")
+        return job["name"], info, "download"
+
+    succeeded = {}
+    failed = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                name, info, _ = future.result()
+            except Exception as e:
+                print(f"[ERROR] {job['name']} 다운로드 실패: {e}")
+                failed[job["name"]] = str(e)
+                continue
+            if info is not None:
+                manifest[name] = {"size": info["size"], "sha256": info["sha256"]}
+            succeeded[name] = info
+
+    if manifest_path is not None:
+        save_manifest(manifest_path, manifest)
+
+    return succeeded, failed
@@ -0,0 +1,28 @@
+import json
+
+# ======================================================
+# feedback.json 형식 (generate_dataset이 Blender 안에서 읽으므로 json 외 의존성 없음)
+# ======================================================
+FEEDBACK_FILENAME = "feedback.json"
+FEEDBACK_VERSION = 1
+
+
+def write_feedback(path, feedback):
+    """feedback.json 저장"""
+    with open(path, 'w') as f:
+        json.dump(feedback, f, indent=2)
+    return path
+
+
+def read_feedback(path):
+    """feedback.json 로드"""
+    with open(path, 'r') as f:
+        feedback = json.load(f)
+    if feedback.get("version") != FEEDBACK_VERSION:
+        raise ValueError(f"지원하지 않는 피드백 버전: {feedback.get('version')} ({path})")
+    return feedback
+
+
+def feedback_instance_counts(feedback):
+    """피드백 → generate_dataset 인스턴스 개수 분포 {클래스 이름: (min, max)}"""
+    return {name: tuple(info["instances"]) for name, info in feedback["classes"].items()}
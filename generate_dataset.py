@@ -2,19 +2,112 @@ import blenderproc as bproc
 
 import argparse
 import os
+import random
+import sys
+import time
 
+import bpy
 import numpy as np
 
+# blenderproc run 환경에서도 로컬 모듈을 import 할 수 있도록 스크립트 폴더 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bbox_projection  # noqa: E402
+import camera_rig  # noqa: E402
+import feedback_io  # noqa: E402
+import job_queue  # noqa: E402
+import material_pool  # noqa: E402
+import scene_spec  # noqa: E402
+import ycb_assets  # noqa: E402
+
+# seconds-to-first-render 측정 시작
+startup_start = time.perf_counter()
+
 # 커맨드 라인 인자
 parser = argparse.ArgumentParser(description='BlenderProc 데이터셋 생성')
 parser.add_argument('--num_scenes', type=int, default=5, help='생성할 씬 수')
 parser.add_argument('--output_dir', type=str, default='dataset/raw', help='출력 디렉토리')
+parser.add_argument('--start_index', type=int, default=0, help='첫 씬 번호 (기존 씬 뒤에 이어서 생성할 때)')
+parser.add_argument('--asset_cache', type=str, default=ycb_assets.CACHE_DIR, help='YCB .blend 에셋 캐시 디렉토리')
+parser.add_argument('--no_asset_cache', action='store_true', help='에셋 캐시를 사용하지 않고 매번 OBJ 로드')
+parser.add_argument('--instances', type=str, default='1',
+                    help='클래스별 인스턴스 개수 분포 (예: "1-3" 또는 "Banana=0-4,PottedMeatCan=2")')
+parser.add_argument('--queue_dir', type=str, default=None,
+                    help='작업 큐 디렉토리 (job_queue.py init) - 지정 시 큐에서 씬 번호를 받아 생성 (여러 노드 동시 실행 가능)')
+parser.add_argument('--seed', type=int, default=None, help='씬별 시드 = seed + 씬 번호 (큐 모드는 큐 시드 사용)')
+parser.add_argument('--inject_crash', type=float, default=0.0, help='테스트용 - 씬마다 worker가 강제 종료될 확률')
+parser.add_argument('--feedback', type=str, default=None,
+                    help='scene_feedback.py 출력 (클래스별 인스턴스 범위/카메라 고도 가중치로 --instances 대체)')
+parser.add_argument('--replay_from', type=str, default=None,
+                    help='씬 스펙(scene.json) 디렉토리 - 지정 시 물리/랜덤 샘플링 없이 다시 렌더링')
+parser.add_argument('--material_pool', type=int, default=0,
+                    help='재질 풀 크기 (0이면 사용 안 함 - 테이블 단색 랜덤화만)')
+parser.add_argument('--material_seed', type=int, default=0, help='재질 풀 / 텍스처 아틀라스 시드')
+parser.add_argument('--texture_dir', type=str, default=None, help='아틀라스에 넣을 텍스처 이미지 폴더 (선택)')
+parser.add_argument('--randomize_objects', type=float, default=0.0,
+                    help='YCB 객체마다 풀 재질을 입힐 확률 (재질 풀 사용 시)')
+parser.add_argument('--samples', type=int, default=128, help='렌더링 최대 샘플 수')
+parser.add_argument('--resolution', type=int, nargs=2, default=None, metavar=('W', 'H'),
+                    help='렌더 해상도 (화각 유지, 기본값: BlenderProc 기본 해상도 또는 스펙 해상도)')
+parser.add_argument('--label_mode', type=str, default='segmentation', choices=['segmentation', 'analytic', 'both'],
+                    help='bbox 라벨 방식 - segmentation 패스 / 메쉬 투영(analytic, segmentation 패스 생략) / 둘 다')
+parser.add_argument('--camera_rig', type=str, default='legacy', choices=camera_rig.RIGS,
+                    help='카메라 배치 (legacy: 랜덤+탑뷰+사이드뷰 / ring / hemisphere)')
+parser.add_argument('--num_views', type=int, default=3, help='씬당 렌더링할 뷰 수 (ring/hemisphere)')
+parser.add_argument('--camera_radius', type=float, nargs=2, default=[0.8, 1.6], metavar=('MIN', 'MAX'),
+                    help='POI로부터 카메라 거리 범위 (m)')
+parser.add_argument('--camera_elevation', type=float, nargs=2, default=[20.0, 70.0], metavar=('MIN', 'MAX'),
+                    help='카메라 고도각 범위 (도)')
+parser.add_argument('--camera_candidates', type=int, default=24, help='씬당 검사할 카메라 후보 수 (ring/hemisphere)')
+parser.add_argument('--min_visible_objects', type=int, default=1, help='뷰 채택에 필요한 최소 가시 객체 수')
+parser.add_argument('--min_object_area', type=float, default=100.0, help='가시 객체로 인정할 최소 투영 면적 (px)')
+parser.add_argument('--view_culling', action='store_true',
+                    help='렌더 전 뷰 컬링 켜기 (ring/hemisphere 전용 - 채택된 뷰만 프레임 번호를 앞에서부터 채움)')
+parser.add_argument('--extra_outputs', type=str, nargs='*', default=[], choices=['normals', 'diffuse'],
+                    help='추가 출력 채널')
 args = parser.parse_args()
 
+try:
+    instance_counts = ycb_assets.parse_instance_counts(
+        args.instances, [info["name"] for info in ycb_assets.YCB_OBJECTS_INFO]
+    )
+except ValueError as e:
+    parser.error(f"--instances: {e}")
+
+# 피드백 모드: 부족한 클래스를 더 많이, 잘 보이는 고도에서 생성
+elevation_weights = None
+if args.feedback is not None:
+    feedback = feedback_io.read_feedback(args.feedback)
+    instance_counts = feedback_io.feedback_instance_counts(feedback)
+    args.camera_elevation = feedback["camera"]["elevation"]
+    elevation_weights = feedback["camera"]["elevation_weights"]
+
+if args.queue_dir is not None and args.replay_from is not None:
+    parser.error("--queue_dir 과 --replay_from 은 함께 사용할 수 없습니다")
+
+# 리플레이 모드: 스펙 목록으로 씬 수/인스턴스 풀 크기 결정
+replay_specs = None
+if args.replay_from is not None:
+    replay_dirs = scene_spec.find_scene_specs(os.path.join(os.path.dirname(__file__), args.replay_from))
+    if not replay_dirs:
+        parser.error(f"--replay_from: 씬 스펙을 찾을 수 없습니다: {args.replay_from}")
+    replay_specs = [scene_spec.read_scene_spec(scene_dir) for scene_dir in replay_dirs]
+    args.num_scenes = len(replay_specs)
+    instance_counts = {name: (0, n) for name, n in scene_spec.max_instances_per_class(replay_specs).items()}
+
+    # 재질 배정이 기록된 스펙이면 같은 설정으로 재질 풀 재생성
+    pool_config = next((spec["materials"]["pool"] for spec in replay_specs if "materials" in spec), None)
+    if pool_config is not None:
+        args.material_pool = pool_config["atlas"] + pool_config["procedural"]
+        args.material_seed = pool_config["seed"]
+
 print("=" * 60)
-print("BlenderProc 데이터셋 생성")
+print("BlenderProc 데이터셋 생성" + (" (리플레이)" if replay_specs is not None else ""))
 print("=" * 60)
-print(f"씬 수: {args.num_scenes}")
+print(f"씬 수: {args.num_scenes}" if args.queue_dir is None else f"작업 큐: {args.queue_dir} ({job_queue.worker_name()})")
+if replay_specs is not None:
+    print(f"스펙: {args.replay_from}")
+elif args.feedback is not None:
+    print(f"피드백: {args.feedback} (예상 필요 씬 수: {feedback['scenes_needed']})")
 print(f"출력: {args.output_dir}")
 print()
 
@@ -64,68 +157,117 @@ table.replace_materials(table_mat)
 table.enable_rigidbody(False)
 ground.enable_rigidbody(False)
 
+# 재질 풀: 시작 시 한 번 생성 → 씬마다 재할당만
+pool = None
+if args.material_pool > 0:
+    material_start = time.perf_counter()
+    num_atlas = args.material_pool // 2
+    pool = material_pool.build_material_pool(num_atlas, args.material_pool - num_atlas, seed=args.material_seed,
+                                              texture_dir=args.texture_dir)
+    print(f"✓ 재질 풀: {len(pool['materials'])}개 ({time.perf_counter() - material_start:.2f}s, "
+          f"아틀라스: {'캐시' if pool['atlas_cached'] else '새로 생성'})")
+    if replay_specs is not None and pool_config is not None and pool_config["atlas_key"] != pool["config"]["atlas_key"]:
+        print("  [WARN] 스펙과 아틀라스 설정이 다릅니다 (--texture_dir 확인) → 텍스처가 원본과 다를 수 있음")
+
 # ====================================
 # YCB 객체 로드
 # ====================================
 print("[3/6] YCB 객체 로드...")
-ycb_dir = os.path.join(os.path.dirname(__file__), "assets", "ycb_obj")
-
-ycb_objects_info = [
-    {"name": "PottedMeatCan", "file": "010_potted_meat_can.obj", "category_id": 1, "color": [0.8, 0.6, 0.4, 1.0]},
-    {"name": "Banana", "file": "011_banana.obj", "category_id": 2, "color": [0.9, 0.8, 0.2, 1.0]},
-    {"name": "LargeMarker", "file": "040_large_marker.obj", "category_id": 3, "color": [0.2, 0.3, 0.8, 1.0]},
-    {"name": "TomatoSoupCan", "file": "005_tomato_soup_can.obj", "category_id": 4, "color": [0.9, 0.2, 0.2, 1.0]},
-]
-
-ycb_objects = []
-for obj_info in ycb_objects_info:
-    obj_path = os.path.join(ycb_dir, obj_info["file"])
-
-    if os.path.exists(obj_path):
-        # 재질 생성
-        mat = bproc.material.create(f'{obj_info["name"]}_Mat')
-        mat.set_principled_shader_value("Base Color", obj_info["color"])
-        mat.set_principled_shader_value("Roughness", 0.5)
-
-        # OBJ 로드
-        loaded_objs = bproc.loader.load_obj(obj_path)
-
-        for idx, obj in enumerate(loaded_objs):
-            obj.set_name(f"{obj_info['name']}_{idx}" if len(loaded_objs) > 1 else obj_info["name"])
-            obj.set_cp("category_id", obj_info["category_id"])
-            obj.clear_materials()
-            obj.add_material(mat)
-            obj.enable_rigidbody(True, mass=0.1, friction=1.0, linear_damping=0.99, angular_damping=0.99)
-            ycb_objects.append(obj)
+load_start = time.perf_counter()
+ycb_assets_by_class, asset_source = ycb_assets.load_ycb_assets(
+    ycb_dir=ycb_assets.YCB_DIR,
+    cache_dir=args.asset_cache,
+    use_cache=not args.no_asset_cache
+)
+ycb_objects = [obj for objs in ycb_assets_by_class.values() for obj in objs]
 
-        print(f"  ✓ {obj_info['name']}: {len(loaded_objs)}개 메쉬")
+print(f"✓ 총 {len(ycb_objects)}개 객체 로드 완료 ({time.perf_counter() - load_start:.2f}s, 에셋: {asset_source})")
 
-print(f"✓ 총 {len(ycb_objects)}개 객체 로드 완료")
+# 인스턴스 풀 생성 (linked duplicate - 메쉬 데이터 공유)
+pool_start = time.perf_counter()
+instance_pool = ycb_assets.create_instance_pool(ycb_assets_by_class, instance_counts)
+num_pool_objects = sum(len(meshes) for instances in instance_pool.values() for meshes in instances)
+num_meshes = len({obj.get_mesh().name for instances in instance_pool.values() for meshes in instances for obj in meshes})
+print(f"✓ 인스턴스 풀: {num_pool_objects}개 객체 / {num_meshes}개 메쉬 데이터 ({time.perf_counter() - pool_start:.2f}s)")
+for name, (low, high) in instance_counts.items():
+    print(f"  - {name}: {low}~{high}개")
 
 # ====================================
 # 렌더링 설정
 # ====================================
 print("[4/6] 렌더링 설정...")
-bproc.renderer.set_max_amount_of_samples(128)
-bproc.renderer.enable_segmentation_output(
-    map_by=["category_id", "instance"],
-    default_values={"category_id": 0}
-)
+bproc.renderer.set_max_amount_of_samples(args.samples)
+if args.label_mode != 'analytic':
+    bproc.renderer.enable_segmentation_output(
+        map_by=["category_id", "instance"],
+        default_values={"category_id": 0}
+    )
 bproc.renderer.enable_depth_output(activate_antialiasing=False)
+if 'normals' in args.extra_outputs:
+    bproc.renderer.enable_normals_output()
+if 'diffuse' in args.extra_outputs:
+    bproc.renderer.enable_diffuse_color_output()
+
+# 기본 카메라 내부 파라미터 (해상도 변경 시 화각 유지)
+default_resolution = [bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_y]
+default_K = bproc.camera.get_intrinsics_as_K_matrix()
+if args.resolution is not None:
+    default_K = np.array(scene_spec.scale_intrinsics(default_K, default_resolution, args.resolution))
+    default_resolution = list(args.resolution)
 
 # ====================================
-# 씬 생성 루프
+# 씬 샘플링 / 적용 / 렌더링
 # ====================================
-print(f"\n[5/6] {args.num_scenes}개 씬 생성 & 렌더링 중...")
+lights = {"key_light": key_light, "fill_light": fill_light}
+
+# (클래스, 인스턴스, 메쉬 이름) → 풀 객체
+# part 인덱스는 로드 순서(OBJ / 에셋 캐시)에 따라 달라질 수 있으므로 스펙은 인스턴스 0의 객체 이름으로 메쉬를 지정
+pool_by_mesh = {
+    (name, instance, instances[0][part].get_name()): obj
+    for name, instances in instance_pool.items()
+    for instance, meshes in enumerate(instances)
+    for part, obj in enumerate(meshes)
+}
+
+
+def object_key(obj_spec):
+    """스펙 객체 키 "클래스/인스턴스/메쉬" (재질 배정에 사용)"""
+    return f"{obj_spec['class']}/{obj_spec['instance']}/{obj_spec['mesh']}"
+
+
+def pool_object(obj_spec):
+    """스펙 객체 → 풀 객체 ("mesh"가 없는 이전 스펙은 part 인덱스로 찾음)"""
+    if "mesh" not in obj_spec:
+        return instance_pool[obj_spec["class"]][obj_spec["instance"]][obj_spec["part"]]
+    key = (obj_spec["class"], obj_spec["instance"], obj_spec["mesh"])
+    if key not in pool_by_mesh:
+        raise ValueError(f"스펙의 메쉬를 인스턴스 풀에서 찾을 수 없습니다: {object_key(obj_spec)}")
+    return pool_by_mesh[key]
+
 
-for scene_idx in range(args.num_scenes):
-    print(f"\n  Scene {scene_idx + 1}/{args.num_scenes}")
+surfaces = {"table": table, "ground": ground}
+pool_objects = {f"{name}/{instance}/{mesh}": obj for (name, instance, mesh), obj in pool_by_mesh.items()}
 
+# 물리 결과 하나에서 쓸 만한 뷰가 없을 때 배치/물리를 다시 시도하는 횟수
+MAX_SCENE_ATTEMPTS = 3
+
+
+def sample_layout_and_views(final_attempt=False):
+    """
+    인스턴스/배치/물리 샘플링 후 카메라 후보를 렌더 전에 컬링
+    Returns: (물리 이후 객체 포즈 리스트, 채택된 카메라 포즈 리스트)
+    """
     # 카메라 포즈 초기화 (이전 씬의 카메라 제거)
     bproc.utility.reset_keyframes()
 
+    # 씬별 인스턴스 개수 샘플링 & 활성화
+    build_start = time.perf_counter()
+    scene_counts = ycb_assets.sample_instance_counts(instance_counts)
+    scene_objects = ycb_assets.activate_instances(instance_pool, scene_counts)
+    print(f"    객체 {len(scene_objects)}개: " + ", ".join(f"{name}×{n}" for name, n in scene_counts.items()))
+
     # 객체 랜덤 배치
-    for obj in ycb_objects:
+    for obj in scene_objects:
         random_pos = np.random.uniform([0.3, -0.25, 0.42], [0.7, 0.25, 0.6])
         obj.set_location(random_pos)
         random_rot = np.random.uniform([0, 0, 0], [360, 360, 360])
@@ -137,53 +279,228 @@ for scene_idx in range(args.num_scenes):
         max_simulation_time=1.0,
         check_object_interval=0.25
     )
+    print(f"    씬 구성 + 물리: {time.perf_counter() - build_start:.2f}s")
+
+    # 물리 이후 최종 포즈 기록
+    objects = []
+    pose_objects = []
+    for name, instances in instance_pool.items():
+        for inst_idx, meshes in enumerate(instances[:scene_counts[name]]):
+            for part, obj in enumerate(meshes):
+                objects.append({
+                    "class": name,
+                    "instance": inst_idx,
+                    "part": part,
+                    "mesh": instances[0][part].get_name(),
+                    "category_id": obj.get_cp("category_id"),
+                    "matrix_world": obj.get_local2world_mat(),
+                })
+                pose_objects.append(obj)
+
+    # 카메라 후보 샘플링
+    num_views = 3 if args.camera_rig == 'legacy' else args.num_views
+    candidates = camera_rig.sample_camera_poses(
+        args.camera_rig,
+        num_candidates=max(args.camera_candidates, num_views),
+        num_views=num_views,
+        radius=args.camera_radius,
+        elevation=args.camera_elevation,
+        elevation_weights=elevation_weights,
+    )
+    # legacy 리그는 프레임 번호 = 뷰(메인/탑/사이드)가 고정이므로 컬링하지 않음
+    if not args.view_culling or args.camera_rig == 'legacy':
+        return objects, list(candidates[:num_views]), list(range(num_views))
+
+    # 렌더 전 뷰 컬링 (투영 frustum/면적 검사 + 광선 가시성 검사)
+    cull_start = time.perf_counter()
+    view_ids, num_visible = camera_rig.select_views(
+        candidates,
+        pose_objects,
+        [local_vertices(obj) for obj in pose_objects],
+        [obj["matrix_world"] for obj in objects],
+        default_K,
+        default_resolution,
+        num_views=num_views,
+        min_visible_objects=args.min_visible_objects,
+        min_area=args.min_object_area,
+    )
+    print(f"    카메라: 후보 {len(candidates)}개 중 {len(view_ids)}개 채택 ({time.perf_counter() - cull_start:.2f}s)")
+
+    # 마지막 시도에서도 실패하면 가장 많이 보이는 후보 하나라도 사용
+    if not view_ids and final_attempt:
+        best = int(np.argmax(num_visible))
+        print(f"    [WARN] 조건을 만족하는 뷰 없음 → 가시 객체 {num_visible[best]}개인 후보 사용")
+        view_ids = [best]
+
+    return objects, [candidates[i] for i in view_ids], view_ids
+
+
+def sample_scene(scene_name):
+    """인스턴스/배치/물리/조명/색상/카메라를 샘플링하여 씬 스펙 생성"""
+    for attempt in range(1, MAX_SCENE_ATTEMPTS + 1):
+        objects, camera_poses, view_ids = sample_layout_and_views(final_attempt=attempt == MAX_SCENE_ATTEMPTS)
+        if camera_poses:
+            break
+        print(f"    [RETRY] 쓸 만한 카메라 뷰 없음 → 배치/물리 다시 시도 ({attempt}/{MAX_SCENE_ATTEMPTS})")
 
     # 조명 랜덤화
-    key_light.set_energy(np.random.uniform(1.5, 3.0))
-    fill_light.set_energy(np.random.uniform(0.5, 1.5))
+    light_energies = {
+        "key_light": np.random.uniform(1.5, 3.0),
+        "fill_light": np.random.uniform(0.5, 1.5),
+    }
 
     # 테이블 색상 랜덤화
     random_color = np.random.uniform([0.3, 0.3, 0.3], [0.8, 0.8, 0.8])
-    table_mat.set_principled_shader_value("Base Color", [*random_color, 1.0])
 
-    # 다중 카메라 포즈 (3개 뷰)
-    poi = np.array([0.5, 0.0, 0.45])  # Point of Interest (테이블 중심)
+    # 재질 풀 배정 (테이블/바닥 + 일부 객체)
+    materials = None
+    if pool is not None:
+        object_keys = [object_key(o) for o in objects]
+        materials = material_pool.sample_assignment(pool, list(surfaces), object_keys, args.randomize_objects)
+
+    return scene_spec.make_scene_spec(
+        scene_name,
+        objects=objects,
+        lights=light_energies,
+        table_color=[*random_color, 1.0],
+        camera_K=default_K,
+        resolution=default_resolution,
+        camera_poses=camera_poses,
+        view_ids=view_ids,
+        render={"samples": args.samples},
+        materials=materials,
+    )
+
+
+def apply_scene(spec):
+    """씬 스펙을 Blender 씬에 그대로 적용 (물리/랜덤 샘플링 없음)"""
+    bproc.utility.reset_keyframes()
 
-    # 1. 메인 카메라 - 랜덤 위치
-    cam_position = np.random.uniform([0.8, 0.8, 0.6], [1.4, 1.4, 1.2])
-    rotation_matrix = bproc.camera.rotation_from_forward_vec(
-        poi - cam_position,
-        inplane_rot=np.random.uniform(-0.2, 0.2)
+    # 인스턴스 활성화 & 최종 포즈 적용
+    counts = {}
+    for obj_spec in spec["objects"]:
+        counts[obj_spec["class"]] = max(counts.get(obj_spec["class"], 0), obj_spec["instance"] + 1)
+    ycb_assets.activate_instances(instance_pool, counts)
+
+    for obj_spec in spec["objects"]:
+        obj = pool_object(obj_spec)
+        obj.set_local2world_mat(np.array(obj_spec["matrix_world"]))
+
+    # 조명 / 테이블 색상 / 재질 풀 배정
+    for name, energy in spec["lights"].items():
+        lights[name].set_energy(energy)
+    table_mat.set_principled_shader_value("Base Color", spec["table_color"])
+    if pool is not None and "materials" in spec:
+        material_pool.apply_assignment(pool, spec["materials"], surfaces, pool_objects)
+
+    # 카메라 내부 파라미터 & 포즈
+    camera = spec["camera"]
+    bproc.camera.set_intrinsics_from_K_matrix(np.array(camera["K"]), *camera["resolution"])
+    for pose in camera["poses"]:
+        bproc.camera.add_camera_pose(np.array(pose))
+
+
+# 메쉬별 축약 정점 캐시 (linked duplicate는 메쉬를 공유하므로 클래스당 한 번만 계산)
+vertex_cache = {}
+
+
+def local_vertices(obj):
+    """객체 로컬 좌표 정점 (support point로 축약)"""
+    mesh = obj.get_mesh()
+    if mesh.name not in vertex_cache:
+        co = np.empty(len(mesh.vertices) * 3)
+        mesh.vertices.foreach_get("co", co)
+        vertex_cache[mesh.name] = bbox_projection.reduce_vertices(co.reshape(-1, 3))
+    return vertex_cache[mesh.name]
+
+
+def compute_scene_boxes(spec):
+    """씬 스펙의 최종 포즈 + 카메라로 메쉬 정점을 투영하여 카메라별 bbox 계산"""
+    objs = [pool_object(o) for o in spec["objects"]]
+    return bbox_projection.compute_analytic_boxes(
+        [local_vertices(obj) for obj in objs],
+        [o["matrix_world"] for o in spec["objects"]],
+        [o["category_id"] for o in spec["objects"]],
+        spec["camera"]["poses"],
+        spec["camera"]["K"],
+        spec["camera"]["resolution"],
     )
-    cam_matrix = bproc.math.build_transformation_mat(cam_position, rotation_matrix)
-    bproc.camera.add_camera_pose(cam_matrix)
-
-    # 2. 탑뷰 카메라 - 위에서 내려다봄 (고정)
-    cam_position = np.array([0.5, 0.0, 1.5])
-    rotation_matrix = bproc.camera.rotation_from_forward_vec(poi - cam_position)
-    cam_matrix = bproc.math.build_transformation_mat(cam_position, rotation_matrix)
-    bproc.camera.add_camera_pose(cam_matrix)
-
-    # 3. 사이드 카메라 - 옆에서 바라봄 (고정)
-    cam_position = np.array([1.5, 0.0, 0.6])
-    rotation_matrix = bproc.camera.rotation_from_forward_vec(poi - cam_position)
-    cam_matrix = bproc.math.build_transformation_mat(cam_position, rotation_matrix)
-    bproc.camera.add_camera_pose(cam_matrix)
-
-    # 렌더링
+
+
+def render_scene(spec, scene_output_dir):
+    """렌더링 후 HDF5 + 씬 스펙 (+ analytic bbox) 저장"""
     data = bproc.renderer.render()
+    # 프레임별 원래 뷰(후보) 번호 - 컬링으로 프레임 번호가 당겨져도 어떤 뷰였는지 알 수 있도록
+    data["view_id"] = [np.array([view_id]) for view_id in scene_spec.view_ids(spec)]
 
     # 개별 HDF5 파일로 저장
-    scene_output_dir = os.path.join(output_dir, f"scene_{scene_idx:04d}")
     os.makedirs(scene_output_dir, exist_ok=True)
-
     bproc.writer.write_hdf5(
         scene_output_dir,
         data,
         append_to_existing_output=False
     )
+    if args.label_mode != 'segmentation':
+        bbox_projection.write_boxes(scene_output_dir, compute_scene_boxes(spec), spec["camera"]["resolution"])
+
+    # 씬 스펙은 마지막에 기록 (큐 재시도 시 완료 표시로 사용)
+    scene_spec.write_scene_spec(scene_output_dir, spec)
 
-    print(f"    ✓ 렌더링 & 저장 완료: scene_{scene_idx:04d}/ (3개 카메라 뷰)")
+# ====================================
+# 씬 생성 루프
+# ====================================
+if args.queue_dir is not None:
+    # 큐 모드: 다른 worker와 겹치지 않게 lease 받은 씬 번호만 생성
+    print(f"\n[5/6] 작업 큐에서 씬 받아 생성 & 렌더링 중...")
+    scene_numbers = job_queue.iterate_scenes(args.queue_dir)
+    base_seed = job_queue.read_config(args.queue_dir)["seed"]
+else:
+    print(f"\n[5/6] {args.num_scenes}개 씬 생성 & 렌더링 중...")
+    scene_numbers = range(args.start_index, args.start_index + args.num_scenes)
+    base_seed = args.seed
+
+num_rendered = 0
+setup_seconds = []
+for scene_number in scene_numbers:
+    scene_idx = scene_number - args.start_index
+    print(f"\n  Scene {scene_number}" + (f" ({scene_idx + 1}/{args.num_scenes})" if args.queue_dir is None else ""))
+
+    # 이전 시도(다른 worker 포함)에서 이미 완료된 씬은 건너뜀
+    if args.queue_dir is not None and os.path.exists(
+            os.path.join(output_dir, f"scene_{scene_number:04d}", scene_spec.SPEC_FILENAME)):
+        print("    이미 완료된 씬 → 건너뜀")
+        continue
+
+    # 씬별 시드 - 재시도하거나 다른 노드에서 생성해도 같은 씬
+    if base_seed is not None:
+        np.random.seed((base_seed + scene_number) % (1 << 32))
+        random.seed(base_seed + scene_number)
+
+    if replay_specs is not None:
+        # 리플레이: 저장된 스펙 사용 (해상도/샘플 수만 덮어씀)
+        spec = replay_specs[scene_idx]
+        if args.resolution is not None:
+            spec["camera"]["K"] = scene_spec.scale_intrinsics(
+                spec["camera"]["K"], spec["camera"]["resolution"], args.resolution
+            )
+            spec["camera"]["resolution"] = list(args.resolution)
+        spec["render"]["samples"] = args.samples
+    else:
+        spec = sample_scene(f"scene_{scene_number:04d}")
+
+    setup_start = time.perf_counter()
+    apply_scene(spec)
+    setup_seconds.append(time.perf_counter() - setup_start)
+
+    # 렌더링 & 저장
+    job_queue.maybe_crash(args.inject_crash)
+    render_scene(spec, os.path.join(output_dir, spec["scene"]))
+    num_rendered += 1
+
+    if num_rendered == 1:
+        print(f"    [TIMING] seconds-to-first-render: {time.perf_counter() - startup_start:.2f}s (에셋: {asset_source})")
+
+    print(f"    ✓ 렌더링 & 저장 완료: {spec['scene']}/ ({len(spec['camera']['poses'])}개 카메라 뷰)")
 
 print(f"\n✓ 모든 씬 생성 완료")
 
@@ -194,18 +511,26 @@ print("\n" + "=" * 60)
 print("✓ 데이터 생성 완료!")
 print("=" * 60)
 print(f"출력 디렉토리: {output_dir}")
-print(f"생성된 씬: {args.num_scenes}개")
+print(f"생성된 씬: {num_rendered}개")
+if setup_seconds:
+    print(f"씬 적용 시간 (포즈/조명/재질): 평균 {np.mean(setup_seconds) * 1000:.1f}ms"
+          + (f" (재질 풀 {len(pool['materials'])}개)" if pool is not None else ""))
 print(f"\n각 씬마다 다음 데이터가 저장됨:")
-print(f"  - RGB 이미지 (3개 카메라)")
-print(f"  - Instance Segmentation (3개 카메라)")
-print(f"  - Depth Map (3개 카메라)")
+print(f"  - RGB 이미지 (씬당 카메라 뷰 수만큼)")
+if args.label_mode != 'analytic':
+    print(f"  - Instance Segmentation")
+if args.label_mode != 'segmentation':
+    print(f"  - Analytic BBox (boxes.json)")
+print(f"  - Depth Map")
 print(f"  - Category ID")
+print(f"  - 씬 스펙 (최종 포즈/조명/색상/카메라)")
 print(f"\n디렉토리 구조:")
 print(f"  {args.output_dir}/")
 print(f"    ├── scene_0000/")
 print(f"    │   ├── 0.hdf5 (메인 카메라)")
 print(f"    │   ├── 1.hdf5 (탑뷰 카메라)")
-print(f"    │   └── 2.hdf5 (사이드 카메라)")
+print(f"    │   ├── 2.hdf5 (사이드 카메라)")
+print(f"    │   └── scene.json (씬 스펙 - 리플레이용)")
 print(f"    ├── scene_0001/")
 print(f"    └── ...")
 print("\n다음 단계: python convert_to_yolo.py")
@@ -0,0 +1,361 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# ======================================================
+# 설정
+# ======================================================
+# 공유 파일시스템의 큐 디렉토리 구조
+#   queue.json       큐 설정 (lease 시간, 재시도 횟수, 시드)
+#   pending/         대기 중인 작업 (씬 번호 구간 하나 = 파일 하나)
+#   leases/          실행 중인 작업 - 파일 mtime이 heartbeat
+#   done/ failed/    완료 / 재시도 초과
+# 작업 이동은 모두 같은 파일시스템 안의 os.rename (원자적) 이므로 여러 노드가 동시에 claim 해도 한 곳만 성공
+QUEUE_CONFIG = "queue.json"
+STATES = ("pending", "leases", "done", "failed")
+DEFAULT_CHUNK = 5
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+
+class LeaseLost(Exception):
+    """heartbeat가 늦어 lease가 만료되어 다른 worker에게 넘어감"""
+
+
+def worker_name():
+    """노드/프로세스별 worker ID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def job_name(start, end):
+    """씬 번호 구간 [start, end) → 작업 파일 이름"""
+    return f"{start:06d}-{end:06d}.json"
+
+
+def job_range(name):
+    """작업 파일 이름 → range(start, end)"""
+    start, end = Path(name).stem.split("-")
+    return range(int(start), int(end))
+
+
+# ======================================================
+# 큐 생성 / 상태
+# ======================================================
+def init_queue(queue_dir, num_scenes, chunk=DEFAULT_CHUNK, start_index=0, lease_seconds=DEFAULT_LEASE_SECONDS,
+               max_attempts=DEFAULT_MAX_ATTEMPTS, seed=0):
+    """
+    큐 생성 (이미 있으면 설정을 유지하고 빠진 구간만 추가)
+    Returns: 큐 설정 dict
+    """
+    queue_dir = Path(queue_dir)
+    for state in STATES:
+        (queue_dir / state).mkdir(parents=True, exist_ok=True)
+
+    config_path = queue_dir / QUEUE_CONFIG
+    if config_path.exists():
+        config = read_config(queue_dir)
+    else:
+        config = {"lease_seconds": lease_seconds, "max_attempts": max_attempts, "seed": seed}
+        with open(config_path, 'w') as f:
+            json.dump(config, f, indent=2)
+
+    existing = {p.name for state in STATES for p in (queue_dir / state).iterdir()}
+    for start in range(start_index, start_index + num_scenes, chunk):
+        name = job_name(start, min(start + chunk, start_index + num_scenes))
+        if name not in existing:
+            _write_json(queue_dir / "pending" / name, {"attempts": 0, "history": []})
+    return config
+
+
+def read_config(queue_dir):
+    """queue.json 로드"""
+    with open(Path(queue_dir) / QUEUE_CONFIG, 'r') as f:
+        return json.load(f)
+
+
+def queue_status(queue_dir):
+    """상태별 작업 수"""
+    return {state: len(os.listdir(Path(queue_dir) / state)) for state in STATES}
+
+
+def _write_json(path, content):
+    """임시 파일 → rename (읽는 쪽이 쓰다 만 파일을 보지 않도록)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+# ======================================================
+# lease
+# ======================================================
+def reap_expired(queue_dir, lease_seconds, max_attempts):
+    """
+    heartbeat가 lease_seconds 이상 끊긴 작업 회수 → pending (재시도 초과면 failed)
+    Returns: 회수한 작업 수
+    """
+    queue_dir = Path(queue_dir)
+    now = time.time()
+    reaped = 0
+    for lease in (queue_dir / "leases").glob("*.json"):
+        try:
+            if now - lease.stat().st_mtime < lease_seconds:
+                continue
+            job = _read_json(lease)
+            target = "failed" if job["attempts"] >= max_attempts else "pending"
+            os.rename(lease, queue_dir / target / lease.name)
+        except (FileNotFoundError, ValueError):
+            continue  # 다른 worker가 먼저 회수/완료했거나 쓰는 중
+        print(f"  [QUEUE] lease 만료: {lease.name} ({job.get('worker')}) → {target}")
+        reaped += 1
+    return reaped
+
+
+def claim(queue_dir, worker):
+    """
+    대기 작업 하나를 lease (없으면 None)
+    mtime을 먼저 갱신한 뒤 rename 하므로 이동 직후 바로 만료로 판정되지 않음
+    """
+    queue_dir = Path(queue_dir)
+    for pending in sorted((queue_dir / "pending").glob("*.json")):
+        lease = queue_dir / "leases" / pending.name
+        try:
+            os.utime(pending)
+            os.rename(pending, lease)
+        except FileNotFoundError:
+            continue  # 다른 worker가 먼저 가져감
+
+        job = _read_json(lease)
+        job["attempts"] += 1
+        job["worker"] = worker
+        job["history"].append({"worker": worker, "claimed": time.time()})
+        _write_json(lease, job)
+        return lease.name
+    return None
+
+
+def heartbeat(queue_dir, name):
+    """lease 갱신 (mtime) - 이미 회수되었으면 LeaseLost"""
+    try:
+        os.utime(Path(queue_dir) / "leases" / name)
+    except FileNotFoundError:
+        raise LeaseLost(name)
+
+
+def finish(queue_dir, name, success, error=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    작업 종료 - 성공이면 done, 실패면 재시도 가능 시 pending / 아니면 failed
+    Returns: 이동한 상태 (lease를 이미 잃었으면 None)
+    """
+    queue_dir = Path(queue_dir)
+    lease = queue_dir / "leases" / name
+    try:
+        job = _read_json(lease)
+    except FileNotFoundError:
+        return None
+
+    if success:
+        target = "done"
+    else:
+        job["history"][-1]["error"] = str(error)
+        _write_json(lease, job)
+        target = "failed" if job["attempts"] >= max_attempts else "pending"
+    try:
+        os.rename(lease, queue_dir / target / name)
+    except FileNotFoundError:
+        return None
+    return target
+
+
+class Heartbeat(threading.Thread):
+    """작업 처리 중 주기적으로 lease 갱신하는 백그라운드 스레드"""
+
+    def __init__(self, queue_dir, name, interval):
+        super().__init__(daemon=True)
+        self.queue_dir = queue_dir
+        self.name_ = name
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                heartbeat(self.queue_dir, self.name_)
+            except LeaseLost:
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+
+
+# ======================================================
+# worker 루프
+# ======================================================
+def iterate_scenes(queue_dir, worker=None, poll_seconds=POLL_SECONDS):
+    """
+    큐에서 작업을 받아 씬 번호를 하나씩 yield (모든 작업이 done/failed가 될 때까지)
+    - 대기 작업이 없어도 다른 worker의 lease가 남아 있으면 만료될 때까지 기다렸다가 회수
+    - 호출 쪽이 예외로 중단하면 (GeneratorExit) 작업을 실패로 돌려놓음
+    """
+    worker = worker or worker_name()
+    config = read_config(queue_dir)
+    lease_seconds, max_attempts = config["lease_seconds"], config["max_attempts"]
+
+    while True:
+        reap_expired(queue_dir, lease_seconds, max_attempts)
+        name = claim(queue_dir, worker)
+        if name is None:
+            if queue_status(queue_dir)["leases"] == 0:
+                return
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"  [QUEUE] {worker}: {name} lease")
+        beat = Heartbeat(queue_dir, name, max(lease_seconds / 3, 0.1))
+        beat.start()
+        try:
+            for scene_idx in job_range(name):
+                if beat.lost:
+                    raise LeaseLost(name)
+                yield scene_idx
+        except LeaseLost:
+            print(f"  [QUEUE] {worker}: {name} lease 만료됨 → 다음 작업")
+            continue
+        except GeneratorExit:
+            finish(queue_dir, name, False, error="worker stopped", max_attempts=max_attempts)
+            raise
+        finally:
+            beat.stop()
+
+        print(f"  [QUEUE] {worker}: {name} → {finish(queue_dir, name, True)}")
+
+
+def scene_seed(queue_dir, scene_idx):
+    """씬별 시드 (큐 시드 + 씬 번호) - 재시도/다른 노드에서도 같은 씬이 나옴"""
+    return read_config(queue_dir)["seed"] + scene_idx
+
+
+# 강제 종료 전용 난수 - 씬별 시드로 고정되는 전역 random과 분리 (재시도마다 결과가 달라야 복구 경로가 테스트됨)
+_crash_rng = random.Random(int.from_bytes(os.urandom(8), "little") ^ os.getpid())
+
+
+def maybe_crash(probability, rng=None):
+    """테스트용 worker 강제 종료 (heartbeat 없이 죽은 상황 재현)"""
+    rng = rng or _crash_rng
+    if probability > 0 and rng.random() < probability:
+        print(f"  [CRASH] 강제 종료 (pid {os.getpid()})", flush=True)
+        os._exit(17)
+
+
+# ======================================================
+# 로컬 시뮬레이션 (Blender 없이 큐 동작 확인)
+# ======================================================
+def simulate_worker(queue_dir, output_dir, scene_seconds, crash_probability):
+    """가짜 렌더링 worker - 씬마다 잠깐 대기 후 완료 표시 파일 기록 (중간에 무작위 강제 종료)"""
+    output_dir = Path(output_dir)
+    rng = random.Random(os.getpid())
+    for scene_idx in iterate_scenes(queue_dir, poll_seconds=0.2):
+        marker = output_dir / f"scene_{scene_idx:04d}.json"
+        if marker.exists():
+            continue  # 이전 시도에서 이미 완료된 씬
+        time.sleep(scene_seconds)
+        maybe_crash(crash_probability, rng)
+        _write_json(marker, {"seed": scene_seed(queue_dir, scene_idx), "worker": worker_name()})
+
+
+def simulate(queue_dir, num_scenes, workers, chunk, crash_probability, scene_seconds=0.05, lease_seconds=2.0):
+    """
+    로컬 worker 프로세스 여러 개로 큐 실행 + 강제 종료 주입
+    죽은 worker는 다시 띄우고, 모든 씬이 완료되었는지 확인
+    """
+    queue_dir = Path(queue_dir)
+    output_dir = queue_dir / "simulated_scenes"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    init_queue(queue_dir, num_scenes, chunk=chunk, lease_seconds=lease_seconds, max_attempts=10)
+
+    cmd = [sys.executable, str(Path(__file__).resolve()), "simulate-worker", "--queue_dir", str(queue_dir),
+           "--scene_seconds", str(scene_seconds), "--crash_probability", str(crash_probability)]
+    processes = [subprocess.Popen(cmd) for _ in range(workers)]
+    crashes = 0
+    start = time.perf_counter()
+
+    while processes:
+        time.sleep(0.1)
+        for process in list(processes):
+            if process.poll() is None:
+                continue
+            processes.remove(process)
+            if process.returncode != 0:
+                crashes += 1
+                status = queue_status(queue_dir)
+                if status["pending"] + status["leases"] > 0:
+                    processes.append(subprocess.Popen(cmd))  # 죽은 worker 대신 새 worker
+
+    status = queue_status(queue_dir)
+    finished = sorted(int(p.stem.split("_")[1]) for p in output_dir.glob("scene_*.json"))
+    missing = sorted(set(range(num_scenes)) - set(finished))
+    print(f"\n시뮬레이션: {time.perf_counter() - start:.1f}s, worker 강제 종료 {crashes}회")
+    print(f"큐 상태: {status}")
+    print(f"완료 씬: {len(finished)}/{num_scenes}" + (f" (누락: {missing})" if missing else ""))
+    return not missing and status["failed"] == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='공유 디렉토리 기반 씬 생성 작업 큐')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help='큐 생성 (씬 번호 구간 작업 등록)')
+    init_parser.add_argument('--queue_dir', type=str, required=True)
+    init_parser.add_argument('--num_scenes', type=int, required=True)
+    init_parser.add_argument('--start_index', type=int, default=0)
+    init_parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help='작업 하나의 씬 수')
+    init_parser.add_argument('--lease_seconds', type=float, default=DEFAULT_LEASE_SECONDS,
+                             help='heartbeat 없이 이 시간이 지나면 다른 worker가 회수')
+    init_parser.add_argument('--max_attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    init_parser.add_argument('--seed', type=int, default=0, help='씬별 시드 = seed + 씬 번호')
+
+    status_parser = subparsers.add_parser("status", help='상태별 작업 수')
+    status_parser.add_argument('--queue_dir', type=str, required=True)
+
+    simulate_parser = subparsers.add_parser("simulate", help='Blender 없이 로컬 worker + 강제 종료로 큐 테스트')
+    simulate_parser.add_argument('--queue_dir', type=str, required=True)
+    simulate_parser.add_argument('--num_scenes', type=int, default=100)
+    simulate_parser.add_argument('--workers', type=int, default=4)
+    simulate_parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK)
+    simulate_parser.add_argument('--crash_probability', type=float, default=0.05, help='씬마다 worker가 죽을 확률')
+
+    worker_parser = subparsers.add_parser("simulate-worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument('--queue_dir', type=str, required=True)
+    worker_parser.add_argument('--scene_seconds', type=float, default=0.05)
+    worker_parser.add_argument('--crash_probability', type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    if args.command == "init":
+        init_queue(args.queue_dir, args.num_scenes, chunk=args.chunk, start_index=args.start_index,
+                   lease_seconds=args.lease_seconds, max_attempts=args.max_attempts, seed=args.seed)
+        print(f"✓ 큐 생성: {args.queue_dir} {queue_status(args.queue_dir)}")
+    elif args.command == "status":
+        print(queue_status(args.queue_dir))
+    elif args.command == "simulate":
+        ok = simulate(args.queue_dir, args.num_scenes, args.workers, args.chunk, args.crash_probability)
+        print("✓ 모든 씬 완료" if ok else "[ERROR] 완료되지 않은 씬이 있습니다")
+        sys.exit(0 if ok else 1)
+    elif args.command == "simulate-worker":
+        simulate_worker(args.queue_dir, Path(args.queue_dir) / "simulated_scenes",
+                        args.scene_seconds, args.crash_probability)
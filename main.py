@@ -1,10 +1,12 @@
 import os
 import sys
 import subprocess
-import urllib.request
 import argparse
 from pathlib import Path
 
+import downloader
+import job_queue
+
 # ======================================================
 # 설정 변수
 # ======================================================
@@ -40,6 +42,8 @@ USD_FILES = [
 SCRIPT_DIR = Path(__file__).parent
 USD_DIR = SCRIPT_DIR / "assets" / "ycb_usd"
 OBJ_DIR = SCRIPT_DIR / "assets" / "ycb_obj"
+USD_MANIFEST = USD_DIR / "manifest.json"  # 파일별 크기/SHA-256 (첫 다운로드 시 기록)
+QUEUE_DIR = SCRIPT_DIR / "dataset" / "queue"  # 로컬 worker 여러 개로 생성할 때 쓰는 작업 큐
 
 # ======================================================
 # 1. USD 파일 다운로드
@@ -53,22 +57,15 @@ def download_usd_files():
     # 디렉토리 생성
     USD_DIR.mkdir(parents=True, exist_ok=True)
     
-    for file_info in USD_FILES:
-        file_name = file_info["name"]
-        file_url = file_info["url"]
-        file_path = USD_DIR / file_name
-        
-        if file_path.exists():
-            print(f"[SKIP] {file_name} 이미 존재")
-            continue
-        
-        print(f"[DOWNLOAD] {file_name}")
-        try:
-            urllib.request.urlretrieve(file_url, file_path)
-            print(f"[OK] {file_name} 다운로드 완료")
-        except Exception as e:
-            print(f"[ERROR] {file_name} 다운로드 실패: {e}")
-            return False
+    # 동시 다운로드 + 이어받기 + 크기/체크섬 검증
+    jobs = [
+        {**file_info, "path": str(USD_DIR / file_info["name"])}
+        for file_info in USD_FILES
+    ]
+    _, failed = downloader.download_all(jobs, manifest_path=str(USD_MANIFEST))
+    
+    if failed:
+        return False
     
     print("\n✓ USD 파일 다운로드 완료\n")
     return True
@@ -109,8 +106,8 @@ def convert_usd_to_obj(blender_path=BLENDER_PATH):
 # ======================================================
 # 3. BlenderProc 데이터셋 생성
 # ======================================================
-def generate_dataset(num_scenes=10):
-    """BlenderProc로 데이터셋 생성"""
+def generate_dataset(num_scenes=10, workers=1):
+    """BlenderProc로 데이터셋 생성 (workers > 1이면 작업 큐로 나눠서 동시 실행)"""
     print("\n" + "="*60)
     print("STEP 3: BlenderProc 데이터셋 생성")
     print("="*60)
@@ -121,12 +118,30 @@ def generate_dataset(num_scenes=10):
         print(f"[ERROR] {generate_script} 파일을 찾을 수 없습니다.")
         return False
     
-    cmd = ["blenderproc", "run", str(generate_script), "--num_scenes", str(num_scenes)]
-    
-    print(f"[RUN] {' '.join(cmd)}")
-    
-    # Blender는 정상 종료시에도 -1을 반환할 수 있으므로 exit code 무시
-    subprocess.run(cmd, capture_output=False)
+    if workers <= 1:
+        cmd = ["blenderproc", "run", str(generate_script), "--num_scenes", str(num_scenes)]
+        
+        print(f"[RUN] {' '.join(cmd)}")
+        
+        # Blender는 정상 종료시에도 -1을 반환할 수 있으므로 exit code 무시
+        subprocess.run(cmd, capture_output=False)
+    else:
+        # 작업 큐 생성 (이미 있으면 남은 작업부터 이어서) → 로컬 worker 여러 개 실행
+        job_queue.init_queue(QUEUE_DIR, num_scenes, chunk=max(1, num_scenes // (workers * 4)))
+        cmd = ["blenderproc", "run", str(generate_script), "--queue_dir", str(QUEUE_DIR)]
+        
+        print(f"[RUN] {' '.join(cmd)} (× {workers} workers)")
+        print(f"      다른 노드에서도 같은 명령으로 worker 추가 가능 (공유 파일시스템)")
+        
+        # 죽은 worker가 남긴 lease는 만료 후 다른 worker가 회수하므로, 작업이 남아 있으면 worker를 다시 띄움
+        for _ in range(job_queue.DEFAULT_MAX_ATTEMPTS):
+            processes = [subprocess.Popen(cmd) for _ in range(workers)]
+            for process in processes:
+                process.wait()
+            status = job_queue.queue_status(QUEUE_DIR)
+            print(f"큐 상태: {status}")
+            if status["pending"] + status["leases"] == 0:
+                break
     
     # 출력 파일이 생성되었는지 확인
     output_dir = SCRIPT_DIR / "dataset" / "raw"
@@ -194,6 +209,33 @@ def train_yolo():
         return False
 
 
+# ======================================================
+# 6. 모델 export & CPU 추론 벤치마크
+# ======================================================
+def benchmark_model():
+    """학습된 모델을 CPU 추론 포맷으로 export 후 지연 시간/mAP 비교"""
+    print("\n" + "="*60)
+    print("STEP 6: 모델 export & CPU 추론 벤치마크")
+    print("="*60)
+    
+    benchmark_script = SCRIPT_DIR / "benchmark_export.py"
+    
+    if not benchmark_script.exists():
+        print(f"[ERROR] {benchmark_script} 파일을 찾을 수 없습니다.")
+        return False
+    
+    cmd = [sys.executable, str(benchmark_script)]
+    
+    print(f"[RUN] {' '.join(cmd)}")
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=False)
+        print("\n✓ 벤치마크 완료\n")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] 벤치마크 스크립트 실행 실패: {e}")
+        return False
+
+
 # ======================================================
 # 메인 실행
 # ======================================================
@@ -207,8 +249,10 @@ def main():
 예제:
   python main.py
   python main.py --num-scenes 20
+  python main.py --num-scenes 100 --workers 4
   python main.py --blender-path "C:/Program Files/Blender Foundation/Blender 4.2/blender.exe"
   python main.py --skip-download --skip-convert
+  python main.py --skip-download --skip-convert --skip-generate --skip-yolo-convert --skip-train
         """
     )
     
@@ -224,6 +268,12 @@ def main():
         default=10,
         help='생성할 씬 개수 (기본값: 10)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='데이터셋 생성 worker 수 (2 이상이면 작업 큐 사용, 기본값: 1)'
+    )
     parser.add_argument(
         '--skip-download',
         action='store_true',
@@ -249,6 +299,11 @@ def main():
         action='store_true',
         help='학습 단계 건너뛰기'
     )
+    parser.add_argument(
+        '--skip-benchmark',
+        action='store_true',
+        help='export & 벤치마크 단계 건너뛰기'
+    )
     
     args = parser.parse_args()
     
@@ -263,9 +318,10 @@ def main():
     steps = [
         ("USD 파일 다운로드", download_usd_files, args.skip_download),
         ("USD → OBJ 변환", lambda: convert_usd_to_obj(args.blender_path), args.skip_convert),
-        ("BlenderProc 데이터셋 생성", lambda: generate_dataset(num_scenes=args.num_scenes), args.skip_generate),
+        ("BlenderProc 데이터셋 생성", lambda: generate_dataset(num_scenes=args.num_scenes, workers=args.workers), args.skip_generate),
         ("HDF5 → YOLO 변환", convert_to_yolo, args.skip_yolo_convert),
         ("YOLO 모델 학습", train_yolo, args.skip_train),
+        ("모델 export & 벤치마크", benchmark_model, args.skip_benchmark),
     ]
     
     for i, (step_name, step_func, skip) in enumerate(steps, 1):
@@ -293,6 +349,8 @@ def main():
     print("\n학습된 모델 위치:")
     print("  - runs/detect/train/weights/best.pt")
     print("  - runs/detect/train/weights/last.pt")
+    print("\n배포 포맷 선택 결과:")
+    print("  - runs/benchmark/best_deployment.json")
     print("="*60 + "\n")
 
 
@@ -0,0 +1,329 @@
+import blenderproc as bproc
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import bpy
+import numpy as np
+
+# ======================================================
+# 설정
+# ======================================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(SCRIPT_DIR, "assets", "material_cache")
+POOL_VERSION = 1
+ATLAS_GRID = 4            # 아틀라스 한 변의 타일 수 (4 → 16개 텍스처)
+ATLAS_TILE = 256          # 타일 한 변 픽셀 수
+TILE_PADDING = 0.02       # 타일 경계 번짐 방지 여백 (타일 크기 대비)
+PATTERNS = ["wood", "marble", "tiles", "fabric", "noise"]
+PROCEDURAL_TEXTURES = ["ShaderNodeTexNoise", "ShaderNodeTexVoronoi", "ShaderNodeTexWave", "ShaderNodeTexChecker"]
+TEXTURE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+# ======================================================
+# 텍스처 아틀라스 (NumPy로 생성 → PNG 캐시)
+# ======================================================
+def value_noise(rng, size, cells):
+    """격자 랜덤값을 smoothstep 보간한 2D 노이즈 (size×size, 0~1)"""
+    grid = rng.random((cells + 1, cells + 1))
+    coords = np.linspace(0, cells, size, endpoint=False)
+    i = coords.astype(int)
+    f = coords - i
+    f = f * f * (3 - 2 * f)
+    top = grid[i][:, i] * (1 - f)[None, :] + grid[i][:, i + 1] * f[None, :]
+    bottom = grid[i + 1][:, i] * (1 - f)[None, :] + grid[i + 1][:, i + 1] * f[None, :]
+    return top * (1 - f)[:, None] + bottom * f[:, None]
+
+
+def fractal_noise(rng, size, octaves=4, base_cells=4):
+    """옥타브를 겹친 노이즈 (0~1)"""
+    noise = sum(value_noise(rng, size, base_cells << o) / (1 << o) for o in range(octaves))
+    return (noise - noise.min()) / max(noise.max() - noise.min(), 1e-6)
+
+
+def procedural_tile(rng, pattern, size):
+    """패턴 하나를 두 랜덤 색으로 칠한 타일 (size×size×3, 0~1)"""
+    y, x = np.mgrid[0:size, 0:size] / size
+    noise = fractal_noise(rng, size)
+
+    if pattern == "wood":
+        t = 0.5 + 0.5 * np.sin((y * rng.uniform(6, 14) + 3 * noise) * 2 * np.pi)
+    elif pattern == "marble":
+        t = 0.5 + 0.5 * np.sin((x * rng.uniform(2, 5) + 6 * noise) * np.pi)
+    elif pattern == "tiles":
+        n = rng.integers(3, 7)
+        grout = ((x * n) % 1 < 0.06) | ((y * n) % 1 < 0.06)
+        t = np.where(grout, 1.0, 0.3 * noise)
+    elif pattern == "fabric":
+        f = rng.uniform(20, 40)
+        t = np.abs(np.sin(x * f * np.pi) * np.sin(y * f * np.pi)) * 0.7 + 0.3 * noise
+    else:
+        t = noise
+
+    color_a, color_b = rng.random(3), rng.random(3)
+    return color_a * (1 - t[..., None]) + color_b * t[..., None]
+
+
+def texture_tile(path, size):
+    """이미지 파일 → size×size 타일 (nearest 리샘플, 0~1 RGB)"""
+    image = bpy.data.images.load(path, check_existing=False)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+
+    pixels = pixels.reshape(height, width, 4)[..., :3]
+    rows = (np.arange(size) * height / size).astype(int)
+    cols = (np.arange(size) * width / size).astype(int)
+    return pixels[rows][:, cols]
+
+
+def list_textures(texture_dir):
+    """사용자 텍스처 이미지 목록 (없으면 빈 리스트)"""
+    if texture_dir is None or not os.path.isdir(texture_dir):
+        return []
+    return sorted(
+        os.path.join(texture_dir, name) for name in os.listdir(texture_dir)
+        if name.lower().endswith(TEXTURE_EXTENSIONS)
+    )
+
+
+def atlas_key(seed, texture_dir):
+    """아틀라스 캐시 키 - 설정 + 사용자 텍스처 (이름/크기/mtime)"""
+    textures = [(os.path.basename(p), os.path.getsize(p), int(os.path.getmtime(p))) for p in list_textures(texture_dir)]
+    content = json.dumps({"version": POOL_VERSION, "seed": seed, "grid": ATLAS_GRID, "tile": ATLAS_TILE,
+                          "textures": textures}, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def load_or_build_atlas(seed=0, texture_dir=None, cache_dir=CACHE_DIR):
+    """
+    텍스처 아틀라스 이미지 로드 (캐시가 없으면 생성 후 PNG로 저장)
+    사용자 텍스처를 앞쪽 타일부터 채우고 남은 칸은 절차적 패턴으로 채움
+    Returns: (bpy 이미지, 캐시 사용 여부)
+    """
+    path = os.path.join(cache_dir, f"atlas_{atlas_key(seed, texture_dir)}.png")
+    if os.path.exists(path):
+        return bpy.data.images.load(path, check_existing=True), True
+
+    rng = np.random.default_rng(seed)
+    textures = list_textures(texture_dir)[:ATLAS_GRID * ATLAS_GRID]
+    size = ATLAS_GRID * ATLAS_TILE
+    atlas = np.ones((size, size, 4), dtype=np.float32)
+
+    for idx in range(ATLAS_GRID * ATLAS_GRID):
+        if idx < len(textures):
+            tile = texture_tile(textures[idx], ATLAS_TILE)
+        else:
+            tile = procedural_tile(rng, PATTERNS[idx % len(PATTERNS)], ATLAS_TILE)
+        row, col = divmod(idx, ATLAS_GRID)
+        atlas[row * ATLAS_TILE:(row + 1) * ATLAS_TILE, col * ATLAS_TILE:(col + 1) * ATLAS_TILE, :3] = tile
+
+    # 여러 worker가 캐시를 공유하므로 임시 파일에 저장한 뒤 rename (반쯤 쓰인 PNG를 읽지 않도록)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.png"
+    image = bpy.data.images.new(os.path.basename(path), size, size, alpha=False)
+    image.pixels.foreach_set(atlas.ravel())
+    image.filepath_raw = tmp_path
+    image.file_format = 'PNG'
+    image.save()
+    os.replace(tmp_path, path)
+    image.filepath_raw = path
+    return image, False
+
+
+# ======================================================
+# 재질 풀 생성 (시작 시 한 번)
+# ======================================================
+def _principled(material):
+    return material.get_the_one_node_with_type("BsdfPrincipled")
+
+
+def create_atlas_material(name, atlas, tile_idx, repeat):
+    """아틀라스 타일 하나를 UV 반복으로 입히는 재질 (모든 아틀라스 재질이 이미지 하나를 공유)"""
+    material = bproc.material.create(name)
+    row, col = divmod(tile_idx, ATLAS_GRID)
+    tile_scale = (1.0 - 2 * TILE_PADDING) / ATLAS_GRID
+
+    tex_coord = material.new_node("ShaderNodeTexCoord")
+    scale = material.new_node("ShaderNodeVectorMath")
+    scale.operation = 'MULTIPLY'
+    scale.inputs[1].default_value = (repeat, repeat, 1.0)
+    fraction = material.new_node("ShaderNodeVectorMath")
+    fraction.operation = 'FRACTION'
+    to_tile = material.new_node("ShaderNodeVectorMath")
+    to_tile.operation = 'MULTIPLY_ADD'
+    to_tile.inputs[1].default_value = (tile_scale, tile_scale, 1.0)
+    to_tile.inputs[2].default_value = ((col + TILE_PADDING) / ATLAS_GRID, (row + TILE_PADDING) / ATLAS_GRID, 0.0)
+    image = material.new_node("ShaderNodeTexImage")
+    image.image = atlas
+
+    material.link(tex_coord.outputs["UV"], scale.inputs[0])
+    material.link(scale.outputs["Vector"], fraction.inputs[0])
+    material.link(fraction.outputs["Vector"], to_tile.inputs[0])
+    material.link(to_tile.outputs["Vector"], image.inputs["Vector"])
+    material.link(image.outputs["Color"], _principled(material).inputs["Base Color"])
+    return material
+
+
+def create_procedural_material(name, texture_type, rng):
+    """Blender 절차적 텍스처 + 두 색 ColorRamp 재질 (이미지 없음)"""
+    material = bproc.material.create(name)
+    tex_coord = material.new_node("ShaderNodeTexCoord")
+    texture = material.new_node(texture_type)
+    texture.inputs["Scale"].default_value = rng.uniform(2.0, 20.0)
+    material.link(tex_coord.outputs["Object"], texture.inputs["Vector"])
+
+    color_a, color_b = [*rng.random(3), 1.0], [*rng.random(3), 1.0]
+    if texture_type == "ShaderNodeTexChecker":
+        texture.inputs["Color1"].default_value = color_a
+        texture.inputs["Color2"].default_value = color_b
+        color_output = texture.outputs["Color"]
+    else:
+        ramp = material.new_node("ShaderNodeValToRGB")
+        ramp.color_ramp.elements[0].color = color_a
+        ramp.color_ramp.elements[1].color = color_b
+        factor = texture.outputs["Distance"] if texture_type == "ShaderNodeTexVoronoi" else texture.outputs["Fac"]
+        material.link(factor, ramp.inputs["Fac"])
+        color_output = ramp.outputs["Color"]
+
+    material.link(color_output, _principled(material).inputs["Base Color"])
+    return material
+
+
+def build_material_pool(num_atlas=16, num_procedural=16, seed=0, texture_dir=None, cache_dir=CACHE_DIR):
+    """
+    재질 풀 생성 - 씬마다는 이 재질들을 재할당만 함
+    Returns: {"materials": {이름: Material}, "config": 풀 설정 (씬 스펙에 기록), "atlas": bpy 이미지, "atlas_cached": bool}
+    """
+    rng = np.random.default_rng(seed)
+    atlas, atlas_cached = load_or_build_atlas(seed, texture_dir, cache_dir)
+
+    materials = {}
+    for idx in range(num_atlas):
+        name = f"PoolAtlas_{idx:02d}"
+        materials[name] = create_atlas_material(name, atlas, idx % (ATLAS_GRID * ATLAS_GRID), rng.uniform(1.0, 4.0))
+    for idx in range(num_procedural):
+        name = f"PoolProc_{idx:02d}"
+        materials[name] = create_procedural_material(name, PROCEDURAL_TEXTURES[idx % len(PROCEDURAL_TEXTURES)], rng)
+
+    for material in materials.values():
+        material.blender_obj.use_fake_user = True        # 사용하지 않는 씬에서도 삭제되지 않도록
+        _principled(material).inputs["Roughness"].default_value = rng.uniform(0.3, 0.9)
+
+    config = {"version": POOL_VERSION, "atlas": num_atlas, "procedural": num_procedural, "seed": seed,
+              "atlas_key": atlas_key(seed, texture_dir)}
+    return {"materials": materials, "config": config, "atlas": atlas, "atlas_cached": atlas_cached}
+
+
+# ======================================================
+# 씬별 재할당 (객체 단위 material slot)
+# ======================================================
+def set_object_material(obj, material):
+    """
+    객체 단위로 재질 지정 (slot.link='OBJECT')
+    linked duplicate는 메쉬를 공유하므로 메쉬 재질을 바꾸면 모든 복제본이 바뀜 → 객체 slot만 변경
+    """
+    for slot in obj.blender_obj.material_slots:
+        slot.link = 'OBJECT'
+        slot.material = material.blender_obj
+
+
+def reset_object_material(obj):
+    """객체 단위 재질 해제 → 메쉬 원래 재질 사용"""
+    for slot in obj.blender_obj.material_slots:
+        slot.link = 'DATA'
+
+
+def sample_assignment(pool, surfaces, object_keys, object_probability, rng=np.random):
+    """
+    씬별 재질 배정 샘플링
+    Args:
+        surfaces: 항상 재질을 바꾸는 표면 이름 리스트 (예: ["table", "ground"])
+        object_keys: 객체 키 리스트 (예: "Banana/0/Banana", 클래스/인스턴스/메쉬 이름)
+        object_probability: 객체마다 풀 재질을 입힐 확률
+    Returns: {"pool": 풀 설정, "surfaces": {표면: 재질}, "objects": {객체 키: 재질}}
+    """
+    names = list(pool["materials"])
+    return {
+        "pool": pool["config"],
+        "surfaces": {surface: names[rng.randint(len(names))] for surface in surfaces},
+        "objects": {key: names[rng.randint(len(names))] for key in object_keys if rng.random() < object_probability},
+    }
+
+
+def apply_assignment(pool, assignment, surfaces, objects):
+    """
+    재질 배정 적용 - 노드/이미지 생성 없이 slot 재질 포인터만 바꿈
+    Args:
+        surfaces: {표면 이름: MeshObject}
+        objects: {객체 키: MeshObject} (배정되지 않은 객체는 원래 재질로 복원)
+    """
+    materials = pool["materials"]
+    for surface, obj in surfaces.items():
+        name = assignment["surfaces"].get(surface)
+        if name is None:
+            reset_object_material(obj)
+        else:
+            set_object_material(obj, materials[name])
+    for key, obj in objects.items():
+        name = assignment["objects"].get(key)
+        if name is None:
+            reset_object_material(obj)
+        else:
+            set_object_material(obj, materials[name])
+
+
+# ======================================================
+# 벤치마크: 풀 재할당 vs 씬마다 재질 생성
+# ======================================================
+def benchmark(iterations=50, seed=0, texture_dir=None):
+    """씬 하나당 재질 랜덤화 비용 비교 (blenderproc run material_pool.py)"""
+    bproc.init()
+    table = bproc.object.create_primitive('CUBE', scale=[0.8, 0.8, 0.05])
+    ground = bproc.object.create_primitive('PLANE', scale=[10, 10, 1])
+    for obj in (table, ground):
+        obj.replace_materials(bproc.material.create(f"{obj.get_name()}Mat"))
+    surfaces = {"table": table, "ground": ground}
+
+    start = time.perf_counter()
+    pool = build_material_pool(seed=seed, texture_dir=texture_dir)
+    print(f"풀 생성: {time.perf_counter() - start:.2f}s (재질 {len(pool['materials'])}개, "
+          f"아틀라스 {'캐시' if pool['atlas_cached'] else '새로 생성'})")
+    atlas_path = bpy.path.abspath(pool["atlas"].filepath)
+
+    rng = np.random.RandomState(seed)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        apply_assignment(pool, sample_assignment(pool, list(surfaces), [], 0.0, rng), surfaces, {})
+    pooled_ms = (time.perf_counter() - start) / iterations * 1000
+
+    # 비교: 씬마다 이미지 로드 + 노드 트리 생성 (풀 없이 그대로 구현했을 때)
+    start = time.perf_counter()
+    for it in range(iterations):
+        created = []
+        for surface, obj in surfaces.items():
+            atlas = bpy.data.images.load(atlas_path, check_existing=False)
+            material = create_atlas_material(f"Naive_{surface}_{it}", atlas, rng.randint(ATLAS_GRID ** 2), 2.0)
+            set_object_material(obj, material)
+            created.append((material, atlas))
+        for material, atlas in created:
+            bpy.data.materials.remove(material.blender_obj)
+            bpy.data.images.remove(atlas)
+    naive_ms = (time.perf_counter() - start) / iterations * 1000
+
+    print(f"씬당 재질 랜덤화 - 풀 재할당: {pooled_ms:.3f}ms / 씬마다 생성: {naive_ms:.1f}ms "
+          f"({naive_ms / max(pooled_ms, 1e-6):.0f}배)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='재질 풀 벤치마크 (blenderproc run material_pool.py)')
+    parser.add_argument('--iterations', type=int, default=50, help='측정 반복 (씬 수)')
+    parser.add_argument('--seed', type=int, default=0, help='풀 시드')
+    parser.add_argument('--texture_dir', type=str, default=None, help='아틀라스에 넣을 텍스처 이미지 폴더')
+    args = parser.parse_args()
+
+    benchmark(args.iterations, args.seed, args.texture_dir)
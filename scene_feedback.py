@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import camera_rig
+import dataset_stats
+import scene_spec
+import ycb_assets
+from convert_to_yolo import CATEGORY_TO_CLASS, CLASS_NAMES
+from feedback_io import FEEDBACK_FILENAME, FEEDBACK_VERSION, write_feedback
+
+# ======================================================
+# 설정
+# ======================================================
+METRICS_FILENAME = "class_metrics.json"    # train_yolo.py가 학습 폴더에 저장하는 클래스별 mAP
+DEFAULT_METRICS = "runs/detect/train/" + METRICS_FILENAME
+RECENT_SCENES = 500                        # 수율/고도 통계에 사용하는 최근 씬 수
+ELEVATION_BINS = 5
+MIN_WEIGHT = 0.1                           # 고도 구간 최소 가중치 (탐색 유지)
+
+# YCB 클래스 이름 → YOLO class_id
+YCB_TO_CLASS = {info["name"]: CATEGORY_TO_CLASS[info["category_id"]] for info in ycb_assets.YCB_OBJECTS_INFO}
+
+
+# ======================================================
+# 입력 수집
+# ======================================================
+def load_class_metrics(path):
+    """train_yolo.py가 저장한 클래스별 mAP50-95 → 배열 (없으면 None)"""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        metrics = json.load(f)
+    by_name = dict(zip(metrics["names"], metrics["map50_95"]))
+    return np.array([by_name.get(name, np.nan) for name in CLASS_NAMES], dtype=np.float64)
+
+
+def find_label(labels_dir, scene_name, cam_idx):
+    """씬/카메라에 해당하는 YOLO 라벨 파일 (train/val 중 존재하는 쪽)"""
+    for split in dataset_stats.SPLITS:
+        path = labels_dir / split / f"{scene_name}_cam{cam_idx}.txt"
+        if path.exists():
+            return path
+    return None
+
+
+def collect_view_yield(raw_dir, dataset_dir, elevation, num_bins, recent=RECENT_SCENES):
+    """
+    최근 씬 스펙 + 라벨로 클래스별 수율(라벨 수 / 배치된 인스턴스×뷰)과 고도 구간별 클래스 라벨 수 계산
+
+    Returns: dict
+        "spawned": (C,) 배치된 인스턴스×뷰 수
+        "labeled": (C,) 라벨이 생성된 객체 수
+        "bin_views": (B,) 고도 구간별 뷰 수
+        "bin_labels": (B, C) 고도 구간별 클래스 라벨 수
+        "views_per_scene": 씬당 평균 뷰 수
+    """
+    num_classes = len(CLASS_NAMES)
+    labels_dir = Path(dataset_dir) / "labels"
+    edges = np.linspace(elevation[0], elevation[1], num_bins + 1)
+
+    spawned = np.zeros(num_classes, dtype=np.int64)
+    labeled = np.zeros(num_classes, dtype=np.int64)
+    bin_views = np.zeros(num_bins, dtype=np.int64)
+    bin_labels = np.zeros((num_bins, num_classes), dtype=np.int64)
+    total_views = 0
+
+    scene_dirs = scene_spec.find_scene_specs(raw_dir)[-recent:]
+    for scene_dir in scene_dirs:
+        spec = scene_spec.read_scene_spec(scene_dir)
+        instances = np.zeros(num_classes, dtype=np.int64)
+        for obj in spec["objects"]:
+            if obj["part"] == 0 and obj["class"] in YCB_TO_CLASS:
+                instances[YCB_TO_CLASS[obj["class"]]] += 1
+
+        for cam_idx, pose in enumerate(spec["camera"]["poses"]):
+            label_path = find_label(labels_dir, spec["scene"], cam_idx)
+            if label_path is None:
+                continue  # 변환 전이거나 dedup으로 이동된 뷰
+
+            with open(label_path, 'r') as f:
+                tokens = f.read().split()
+            classes = np.array(tokens[::5], dtype=np.float64).astype(np.int64)
+            counts = np.bincount(classes[classes < num_classes], minlength=num_classes)
+
+            b = int(np.clip(np.searchsorted(edges, camera_rig.camera_elevation(pose)) - 1, 0, num_bins - 1))
+            spawned += instances
+            labeled += counts
+            bin_views[b] += 1
+            bin_labels[b] += counts
+            total_views += 1
+
+    return {
+        "spawned": spawned,
+        "labeled": labeled,
+        "bin_views": bin_views,
+        "bin_labels": bin_labels,
+        "views_per_scene": total_views / max(len(scene_dirs), 1),
+    }
+
+
+# ======================================================
+# 피드백 계산
+# ======================================================
+def class_need(class_counts, class_map, target_count, target_map):
+    """
+    클래스별 부족도 (0: 목표 달성 ~ 1: 전혀 없음)
+    목표 개수 대비 부족분과 목표 mAP 대비 부족분 중 큰 값
+    """
+    need = np.zeros(len(CLASS_NAMES))
+    if target_count:
+        need = np.maximum(need, np.clip((target_count - class_counts) / target_count, 0, 1))
+    if target_map and class_map is not None:
+        gap = np.clip((target_map - np.nan_to_num(class_map, nan=0.0)) / target_map, 0, 1)
+        need = np.maximum(need, gap)
+    return need
+
+
+def instance_ranges(need, max_instances):
+    """부족도 → 클래스별 인스턴스 개수 범위 (목표 달성 클래스는 0~1개로 가림/방해물 역할만)"""
+    ranges = {}
+    for name, class_id in YCB_TO_CLASS.items():
+        p = need[class_id]
+        if p <= 0:
+            ranges[name] = (0, 1)
+        else:
+            ranges[name] = (1, int(np.clip(np.ceil(1 + p * (max_instances - 1)), 1, max_instances)))
+    return ranges
+
+
+def elevation_weights(need, bin_views, bin_labels):
+    """고도 구간별 부족 클래스 라벨 수율 → 샘플링 가중치 (최소 MIN_WEIGHT 비율 보장)"""
+    if not need.any() or not bin_views.any():
+        return np.full(len(bin_views), 1.0 / len(bin_views))
+
+    per_view = bin_labels / np.maximum(bin_views, 1)[:, None]
+    score = per_view @ need
+    # 데이터가 없는 구간은 평균 점수로 취급
+    score = np.where(bin_views > 0, score, score[bin_views > 0].mean())
+    weights = score / score.sum() if score.sum() > 0 else np.full(len(score), 1.0 / len(score))
+    weights = np.maximum(weights, MIN_WEIGHT / len(weights))
+    return weights / weights.sum()
+
+
+def estimate_scenes(class_counts, target_count, ranges, class_yield, views_per_scene):
+    """새 인스턴스 범위 기준 클래스별 목표 개수까지 필요한 씬 수 (가장 느린 클래스 기준)"""
+    per_class = {}
+    for name, class_id in YCB_TO_CLASS.items():
+        deficit = max(target_count - int(class_counts[class_id]), 0)
+        per_scene = np.mean(ranges[name]) * views_per_scene * class_yield[class_id]
+        if deficit == 0:
+            per_class[name] = 0
+        elif per_scene > 0:
+            per_class[name] = int(np.ceil(deficit / per_scene))
+        else:
+            per_class[name] = None  # 수율 정보 없음
+    known = [n for n in per_class.values() if n is not None]
+    return per_class, (max(known) if known else None)
+
+
+def build_feedback(raw_dir, dataset_dir, metrics_path=None, target_count=None, target_map=None,
+                   max_instances=3, elevation=(20.0, 70.0), num_bins=ELEVATION_BINS):
+    """다음 배치 생성용 피드백 (인스턴스 범위 + 카메라 고도 가중치 + 필요 씬 수 추정)"""
+    stats = dataset_stats.compute_stats(dataset_dir, splits=("train",), verbose=False)["all"]
+    class_counts = stats["class_counts"]
+    class_map = load_class_metrics(metrics_path)
+
+    views = collect_view_yield(raw_dir, dataset_dir, elevation, num_bins)
+    class_yield = views["labeled"] / np.maximum(views["spawned"], 1)
+
+    need = class_need(class_counts, class_map, target_count, target_map)
+    ranges = instance_ranges(need, max_instances)
+    weights = elevation_weights(need, views["bin_views"], views["bin_labels"])
+
+    per_class_scenes, scenes_needed = (None, None)
+    if target_count:
+        per_class_scenes, scenes_needed = estimate_scenes(
+            class_counts, target_count, ranges, class_yield, views["views_per_scene"]
+        )
+
+    classes = {}
+    for name, class_id in YCB_TO_CLASS.items():
+        classes[name] = {
+            "labels": int(class_counts[class_id]),
+            "yield": round(float(class_yield[class_id]), 4),
+            "map50_95": None if class_map is None or np.isnan(class_map[class_id]) else float(class_map[class_id]),
+            "need": round(float(need[class_id]), 4),
+            "instances": list(ranges[name]),
+            "scenes_needed": None if per_class_scenes is None else per_class_scenes[name],
+        }
+
+    return {
+        "version": FEEDBACK_VERSION,
+        "target": {"count": target_count, "map50_95": target_map},
+        "classes": classes,
+        "camera": {"elevation": list(elevation), "elevation_weights": [round(float(w), 4) for w in weights]},
+        "scenes_needed": scenes_needed,
+    }
+
+
+# ======================================================
+# 출력
+# ======================================================
+def print_feedback(feedback):
+    """피드백 요약 출력"""
+    print(f"  {'클래스':<16}{'라벨':>8}{'수율':>8}{'mAP':>8}{'부족도':>8}  인스턴스  필요 씬")
+    for name, info in feedback["classes"].items():
+        map_text = "-" if info["map50_95"] is None else f"{info['map50_95']:.3f}"
+        scenes = "-" if info["scenes_needed"] is None else info["scenes_needed"]
+        low, high = info["instances"]
+        print(f"  {name:<16}{info['labels']:>8}{info['yield']:>8.2f}{map_text:>8}{info['need']:>8.2f}  "
+              f"{low}~{high}개{'':<4}{scenes}")
+    weights = ", ".join(f"{w:.2f}" for w in feedback["camera"]["elevation_weights"])
+    low, high = feedback["camera"]["elevation"]
+    print(f"  카메라 고도 가중치 ({low:.0f}°~{high:.0f}°): {weights}")
+    if feedback["scenes_needed"] is not None:
+        print(f"  목표까지 예상 씬 수: {feedback['scenes_needed']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='라벨/학습 결과 기반 다음 배치 씬 생성 피드백')
+    parser.add_argument('--raw_dir', type=str, default='dataset/raw', help='씬 스펙(scene.json) 디렉토리')
+    parser.add_argument('--dataset_dir', type=str, default='dataset/yolo', help='YOLO 데이터셋 디렉토리')
+    parser.add_argument('--metrics', type=str, default=DEFAULT_METRICS, help='클래스별 mAP JSON (train_yolo.py 출력)')
+    parser.add_argument('--target_count', type=int, default=None, help='클래스별 목표 학습 라벨 수')
+    parser.add_argument('--target_map', type=float, default=None, help='클래스별 목표 mAP50-95')
+    parser.add_argument('--max_instances', type=int, default=3, help='부족 클래스 최대 인스턴스 수')
+    parser.add_argument('--camera_elevation', type=float, nargs=2, default=[20.0, 70.0], metavar=('MIN', 'MAX'),
+                        help='카메라 고도각 범위 (generate_dataset.py와 동일하게)')
+    parser.add_argument('--elevation_bins', type=int, default=ELEVATION_BINS, help='고도 구간 수')
+    parser.add_argument('--output', type=str, default=FEEDBACK_FILENAME, help='피드백 JSON 경로')
+    args = parser.parse_args()
+
+    if args.target_count is None and args.target_map is None:
+        parser.error("--target_count 또는 --target_map 중 하나는 지정해야 합니다")
+
+    print("=" * 60)
+    print("씬 생성 피드백")
+    print("=" * 60)
+
+    feedback = build_feedback(
+        args.raw_dir, args.dataset_dir,
+        metrics_path=args.metrics,
+        target_count=args.target_count,
+        target_map=args.target_map,
+        max_instances=args.max_instances,
+        elevation=tuple(args.camera_elevation),
+        num_bins=args.elevation_bins,
+    )
+    print_feedback(feedback)
+    write_feedback(args.output, feedback)
+
+    print(f"\n✓ 저장: {args.output}")
+    scene_dirs = scene_spec.find_scene_specs(args.raw_dir)
+    next_index = int(scene_dirs[-1].name.split("_")[-1]) + 1 if scene_dirs else 0
+    print(f"다음 단계: blenderproc run generate_dataset.py --feedback {args.output} --start_index {next_index}")
+    print("=" * 60)
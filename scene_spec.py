@@ -0,0 +1,101 @@
+import json
+import os
+from pathlib import Path
+
+# ======================================================
+# 씬 스펙 설정
+# ======================================================
+SPEC_FILENAME = "scene.json"   # HDF5 출력과 같은 폴더에 저장
+SPEC_VERSION = 1
+
+
+def _to_list(value):
+    """numpy 배열 → JSON 직렬화 가능한 중첩 리스트"""
+    return value.tolist() if hasattr(value, "tolist") else value
+
+
+def make_scene_spec(scene_name, objects, lights, table_color, camera_K, resolution, camera_poses, render,
+                    materials=None, view_ids=None):
+    """
+    씬 하나를 물리/랜덤 샘플링 없이 다시 만들 수 있는 스펙 생성
+
+    Args:
+        scene_name: 씬 폴더 이름 (예: "scene_0000")
+        objects: [{"class", "instance", "part", "mesh", "category_id", "matrix_world" (4x4)}] - 물리 이후 최종 포즈
+                 mesh는 인스턴스 0 객체 이름 (part 인덱스는 로드 순서에 따라 달라지므로 리플레이는 mesh로 찾음)
+        lights: {조명 이름: energy}
+        table_color: 테이블 Base Color [r, g, b, a]
+        camera_K: 카메라 내부 파라미터 (3x3)
+        resolution: [width, height]
+        camera_poses: 카메라 cam2world 행렬 리스트 (4x4, 렌더 프레임 순서)
+        render: 렌더 설정 {"samples": int, ...}
+        materials: 재질 풀 배정 {"pool", "surfaces", "objects"} (재질 풀 미사용 시 None)
+        view_ids: 프레임별 원래 카메라 후보 번호 (뷰 컬링 시 프레임 번호와 다름, None이면 프레임 번호와 같음)
+    """
+    spec = {
+        "version": SPEC_VERSION,
+        "scene": scene_name,
+        "objects": [{**obj, "matrix_world": _to_list(obj["matrix_world"])} for obj in objects],
+        "lights": {name: float(energy) for name, energy in lights.items()},
+        "table_color": [float(c) for c in table_color],
+        "camera": {
+            "K": _to_list(camera_K),
+            "resolution": [int(resolution[0]), int(resolution[1])],
+            "poses": [_to_list(pose) for pose in camera_poses],
+            "view_ids": [int(v) for v in (view_ids if view_ids is not None else range(len(camera_poses)))],
+        },
+        "render": dict(render),
+    }
+    if materials is not None:
+        spec["materials"] = materials
+    return spec
+
+
+def write_scene_spec(scene_dir, spec):
+    """씬 스펙을 compact JSON으로 저장 (임시 파일 → rename)"""
+    path = os.path.join(scene_dir, SPEC_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(spec, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_scene_spec(scene_dir):
+    """씬 스펙 로드"""
+    with open(os.path.join(scene_dir, SPEC_FILENAME), 'r') as f:
+        spec = json.load(f)
+
+    if spec.get("version") != SPEC_VERSION:
+        raise ValueError(f"지원하지 않는 씬 스펙 버전: {spec.get('version')} ({scene_dir})")
+    return spec
+
+
+def view_ids(spec):
+    """프레임별 원래 카메라 후보 번호 (view_ids가 없는 이전 스펙은 프레임 번호)"""
+    return spec["camera"].get("view_ids", list(range(len(spec["camera"]["poses"]))))
+
+
+def find_scene_specs(root_dir):
+    """root_dir/scene_*/scene.json 을 씬 이름 순서로 찾기"""
+    return sorted(path.parent for path in Path(root_dir).glob(f"scene_*/{SPEC_FILENAME}"))
+
+
+def scale_intrinsics(K, resolution, new_resolution):
+    """해상도 변경에 맞춰 K 행렬 스케일 (fx, cx는 가로 비율, fy, cy는 세로 비율)"""
+    sx = new_resolution[0] / resolution[0]
+    sy = new_resolution[1] / resolution[1]
+    return [
+        [K[0][0] * sx, K[0][1] * sx, K[0][2] * sx],
+        [K[1][0] * sy, K[1][1] * sy, K[1][2] * sy],
+        [K[2][0], K[2][1], K[2][2]],
+    ]
+
+
+def max_instances_per_class(specs):
+    """스펙들에 등장하는 클래스별 최대 인스턴스 수 (리플레이용 인스턴스 풀 크기)"""
+    counts = {}
+    for spec in specs:
+        for obj in spec["objects"]:
+            counts[obj["class"]] = max(counts.get(obj["class"], 0), obj["instance"] + 1)
+    return counts
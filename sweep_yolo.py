@@ -0,0 +1,268 @@
+import argparse
+import csv
+import json
+import math
+import os
+import queue
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# ======================================================
+# 설정
+# ======================================================
+SCRIPT_DIR = Path(__file__).parent
+TRAIN_SCRIPT = SCRIPT_DIR / "train_yolo.py"
+FITNESS_COLUMN = "metrics/mAP50-95(B)"
+LEADERBOARD_FILENAME = "leaderboard.csv"
+STATE_FILENAME = "sweep.json"
+
+# 탐색 공간 - (분포, 인자...) / --space JSON 파일로 교체 가능
+#   log: 로그 균등, uniform: 균등, choice: 목록 중 하나
+SEARCH_SPACE = {
+    "model": ["choice", ["yolo11n.pt", "yolo11s.pt"]],
+    "lr0": ["log", 1e-3, 3e-2],
+    "momentum": ["uniform", 0.85, 0.96],
+    "weight_decay": ["log", 1e-5, 1e-3],
+    "hsv_s": ["uniform", 0.3, 0.9],
+    "hsv_v": ["uniform", 0.2, 0.6],
+    "degrees": ["uniform", 0.0, 20.0],
+    "scale": ["uniform", 0.2, 0.7],
+    "mosaic": ["choice", [0.5, 1.0]],
+    "mixup": ["choice", [0.0, 0.1]],
+}
+
+# 모든 trial에 공통으로 적용 (스윕 중에는 plot/patience 비활성화)
+SWEEP_ARGS = {"plots": False, "verbose": False}
+
+
+# ======================================================
+# 탐색 공간 샘플링
+# ======================================================
+def sample_params(space, rng):
+    """탐색 공간에서 하이퍼파라미터 조합 하나 샘플링"""
+    params = {}
+    for key, (kind, *spec) in space.items():
+        if kind == "choice":
+            params[key] = rng.choice(spec[0])
+        elif kind == "uniform":
+            params[key] = round(rng.uniform(spec[0], spec[1]), 4)
+        elif kind == "log":
+            params[key] = float(f"{math.exp(rng.uniform(math.log(spec[0]), math.log(spec[1]))):.3g}")
+        else:
+            raise ValueError(f"알 수 없는 분포: {kind} ({key})")
+    return params
+
+
+def halving_rungs(min_epochs, max_epochs, eta):
+    """successive halving 단계별 누적 에포크 (예: 2, 6, 18, 50)"""
+    rungs = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        rungs.append(epochs)
+        epochs *= eta
+    rungs.append(max_epochs)
+    return rungs
+
+
+# ======================================================
+# CPU 예산
+# ======================================================
+def cpu_slots(parallel):
+    """
+    동시 실행 trial마다 겹치지 않는 CPU 코어 집합 할당
+    Returns: trial 슬롯별 코어 리스트
+    """
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    per_trial = max(len(cores) // parallel, 1)
+    return [cores[i * per_trial:(i + 1) * per_trial] or cores[-per_trial:] for i in range(parallel)]
+
+
+def trial_env(cores):
+    """trial 프로세스 스레드 수를 코어 예산에 맞춤 (BLAS/OpenMP 과다 구독 방지)"""
+    env = os.environ.copy()
+    threads = str(len(cores))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        env[var] = threads
+    return env
+
+
+# ======================================================
+# trial 실행
+# ======================================================
+def read_fitness(trial_dir):
+    """results.csv에서 지금까지의 최고 mAP50-95 (없으면 None)"""
+    results_csv = Path(trial_dir) / "results.csv"
+    if not results_csv.exists():
+        return None
+    with open(results_csv, 'r', newline='') as f:
+        rows = list(csv.DictReader(f))
+    values = []
+    for row in rows:
+        row = {k.strip(): v for k, v in row.items()}
+        if row.get(FITNESS_COLUMN):
+            values.append(float(row[FITNESS_COLUMN]))
+    return max(values) if values else None
+
+
+def run_trial(trial, epochs, project, cores, workers):
+    """
+    trial 하나를 epochs 에포크까지 학습 (이전 단계 paused.pt가 있으면 이어서)
+    Returns: trial (status/fitness 갱신)
+    """
+    trial_dir = Path(project) / trial["name"]
+    paused = trial_dir / "weights" / "paused.pt"
+
+    cmd = [sys.executable, str(TRAIN_SCRIPT)]
+    if paused.exists():
+        cmd += ["--resume", str(paused)]
+    else:
+        params = {k: v for k, v in trial["params"].items() if k != "model"}
+        cmd += ["--model", trial["params"].get("model", "yolo11n.pt"),
+                "--project", str(project), "--name", trial["name"],
+                "--set", f"epochs={trial['max_epochs']}", "--set", f"patience={trial['max_epochs']}",
+                "--set", f"workers={workers}"]
+        for key, value in {**SWEEP_ARGS, **params}.items():
+            cmd += ["--set", f"{key}={value!r}"]
+    if epochs < trial["max_epochs"]:
+        cmd += ["--stop_epoch", str(epochs)]
+
+    start = time.perf_counter()
+    log_path = Path(project) / f"{trial['name']}.log"
+    with open(log_path, 'a') as log:
+        log.write(f"\n$ {' '.join(cmd)}\n")
+        log.flush()
+        # 스레드에서 fork하므로 preexec_fn 대신 시작 직후 부모에서 affinity 지정 (자식 스레드는 생성 시 상속)
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=trial_env(cores))
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(process.pid, cores)
+            except OSError:
+                pass    # 이미 종료된 경우
+        returncode = process.wait()
+
+    trial["seconds"] = trial.get("seconds", 0.0) + time.perf_counter() - start
+    fitness = read_fitness(trial_dir)
+    if returncode != 0 or fitness is None:
+        trial["status"] = "failed"
+        print(f"  [FAILED] {trial['name']} (exit {returncode}, 로그: {log_path})")
+    else:
+        trial["epochs"] = epochs
+        trial["fitness"] = fitness
+        trial["status"] = "done" if epochs >= trial["max_epochs"] else "running"
+        print(f"  {trial['name']}: {epochs} 에포크, mAP50-95 {fitness:.4f} ({trial['seconds']:.0f}s)")
+    return trial
+
+
+def run_rung(trials, epochs, project, parallel, workers):
+    """단계 하나 - 살아남은 trial들을 CPU 슬롯 수만큼 동시에 실행"""
+    free = queue.Queue()
+    for cores in cpu_slots(parallel):
+        free.put(cores)
+
+    def worker(trial):
+        cores = free.get()
+        try:
+            return run_trial(trial, epochs, project, cores, workers)
+        finally:
+            free.put(cores)
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        return list(executor.map(worker, trials))
+
+
+# ======================================================
+# 결과 기록
+# ======================================================
+def write_leaderboard(trials, project):
+    """fitness 순 리더보드 CSV + 스윕 상태 JSON 저장"""
+    ranked = sorted(trials, key=lambda t: (t.get("fitness") is None, -(t.get("fitness") or 0.0), -t.get("epochs", 0)))
+    param_keys = sorted({k for t in trials for k in t["params"]})
+
+    with open(Path(project) / LEADERBOARD_FILENAME, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "trial", "fitness", "epochs", "status", "seconds", *param_keys])
+        for rank, t in enumerate(ranked, 1):
+            fitness = "" if t.get("fitness") is None else f"{t['fitness']:.4f}"
+            writer.writerow([rank, t["name"], fitness, t.get("epochs", 0), t["status"],
+                             f"{t.get('seconds', 0.0):.0f}", *[t["params"].get(k, "") for k in param_keys]])
+
+    with open(Path(project) / STATE_FILENAME, 'w') as f:
+        json.dump(trials, f, indent=2)
+    return ranked
+
+
+def sweep(num_trials, min_epochs, max_epochs, eta, parallel, project, space=SEARCH_SPACE, seed=0, workers=0):
+    """
+    successive halving 스윕
+    - 모든 trial을 min_epochs까지 학습 → 상위 1/eta만 eta배 에포크까지 이어 학습 → ... → max_epochs
+    - 학습률 스케줄은 처음부터 max_epochs 기준이므로 중간 단계 점수가 최종 학습과 같은 궤적 위에 있음
+    """
+    project = Path(project).resolve()
+    project.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    trials = [
+        {"name": f"trial_{i:03d}", "params": sample_params(space, rng), "max_epochs": max_epochs,
+         "status": "pending", "epochs": 0, "fitness": None}
+        for i in range(num_trials)
+    ]
+    rungs = halving_rungs(min_epochs, max_epochs, eta)
+    print(f"trial {num_trials}개, 단계(누적 에포크): {rungs}, 동시 실행 {parallel}개 "
+          f"(trial당 코어 {len(cpu_slots(parallel)[0])}개)")
+
+    alive = trials
+    for rung_idx, epochs in enumerate(rungs):
+        print(f"\n[단계 {rung_idx + 1}/{len(rungs)}] {len(alive)}개 trial → {epochs} 에포크")
+        run_rung(alive, epochs, project, parallel, workers)
+        write_leaderboard(trials, project)
+
+        finished = [t for t in alive if t["status"] != "failed"]
+        if rung_idx == len(rungs) - 1 or not finished:
+            break
+        keep = max(len(finished) // eta, 1)
+        alive = sorted(finished, key=lambda t: -t["fitness"])[:keep]
+        for t in finished:
+            if t not in alive:
+                t["status"] = "stopped"
+        write_leaderboard(trials, project)
+
+    return write_leaderboard(trials, project)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='YOLO 하이퍼파라미터 스윕 (successive halving)')
+    parser.add_argument('--trials', type=int, default=9, help='처음 시작하는 trial 수')
+    parser.add_argument('--min_epochs', type=int, default=2, help='첫 단계 에포크')
+    parser.add_argument('--max_epochs', type=int, default=50, help='최종 단계 에포크 (학습률 스케줄 기준)')
+    parser.add_argument('--eta', type=int, default=3, help='단계마다 남기는 비율의 역수')
+    parser.add_argument('--parallel', type=int, default=2, help='동시에 실행할 trial 수 (CPU 코어를 나눠 가짐)')
+    parser.add_argument('--workers', type=int, default=0, help='trial별 dataloader worker 수')
+    parser.add_argument('--space', type=str, default=None, help='탐색 공간 JSON 파일 (기본값: SEARCH_SPACE)')
+    parser.add_argument('--project', type=str, default='runs/sweep', help='결과 디렉토리')
+    parser.add_argument('--seed', type=int, default=0, help='샘플링 시드')
+    args = parser.parse_args()
+
+    space = SEARCH_SPACE
+    if args.space is not None:
+        with open(args.space, 'r') as f:
+            space = json.load(f)
+
+    print("=" * 60)
+    print("YOLO 하이퍼파라미터 스윕")
+    print("=" * 60)
+
+    ranked = sweep(args.trials, args.min_epochs, args.max_epochs, args.eta, args.parallel,
+                   args.project, space=space, seed=args.seed, workers=args.workers)
+
+    print("\n" + "=" * 60)
+    print("리더보드 (상위 5개)")
+    print("=" * 60)
+    for rank, t in enumerate(ranked[:5], 1):
+        fitness = "-" if t.get("fitness") is None else f"{t['fitness']:.4f}"
+        print(f"  {rank}. {t['name']}  mAP50-95 {fitness}  ({t['epochs']} 에포크, {t['status']})  {t['params']}")
+    print(f"\n✓ 리더보드: {Path(args.project) / LEADERBOARD_FILENAME}")
+    print("=" * 60)
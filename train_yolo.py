@@ -1,24 +1,25 @@
+import argparse
+import ast
+import json
+import shutil
+from pathlib import Path
+
 import torch
 from ultralytics import YOLO
 
-# GPU 사용 가능 여부 확인
-if torch.cuda.is_available():
-    device = 0
-    print(f"✓ GPU 사용: {torch.cuda.get_device_name(0)}")
-else:
-    device = 'cpu'
-    print("⚠ CPU 사용")
+import autotune
 
-# 모델 로드
-model = YOLO('yolo11n.pt')
+# ======================================================
+# 학습 설정 (sweep_yolo.py 등에서 덮어쓰기 가능)
+# ======================================================
+MODEL = 'yolo11n.pt'
+PAUSED_CHECKPOINT = "paused.pt"   # --stop_epoch 로 중단할 때 저장하는 이어 학습용 체크포인트
 
-# 학습 시작
-results = model.train(
+TRAIN_ARGS = dict(
     data='dataset/yolo/data.yaml',
     epochs=50,
     batch=16,
     imgsz=640,
-    device=device,
     project='runs/detect',
     name='train',
     exist_ok=True,
@@ -49,8 +50,136 @@ results = model.train(
     copy_paste=0.0,
 )
 
-print("\n" + "=" * 60)
-print("학습 완료!")
-print("=" * 60)
-print(f"가중치 저장 위치: runs/detect/train/weights/best.pt")
-print("=" * 60)
+
+def select_device():
+    """GPU 사용 가능 여부 확인"""
+    if torch.cuda.is_available():
+        print(f"✓ GPU 사용: {torch.cuda.get_device_name(0)}")
+        return 0
+    print("⚠ CPU 사용")
+    return 'cpu'
+
+
+def save_class_metrics(results, save_dir):
+    """클래스별 검증 mAP 저장 (scene_feedback.py 입력)"""
+    metrics_path = Path(save_dir) / "class_metrics.json"
+    with open(metrics_path, 'w') as f:
+        json.dump({
+            "names": [results.names[i] for i in range(len(results.names))],
+            "map50_95": [float(v) for v in results.box.maps],
+            "map50_95_all": float(results.box.map),
+        }, f, indent=2)
+    return metrics_path
+
+
+def add_stop_callback(model, stop_epoch):
+    """
+    stop_epoch 에포크까지만 학습하고 중단 (학습률 스케줄은 전체 epochs 기준 유지)
+    last.pt는 종료 시 optimizer가 제거되므로 이어 학습용으로 paused.pt를 따로 보관
+    Returns: 중단 여부 {"stopped": bool}
+    """
+    state = {"stopped": False}
+
+    def on_fit_epoch_end(trainer):
+        if trainer.epoch + 1 >= stop_epoch and trainer.epoch + 1 < trainer.epochs:
+            shutil.copy(trainer.last, trainer.wdir / PAUSED_CHECKPOINT)
+            trainer.stop = True
+            state["stopped"] = True
+
+    model.add_callback("on_fit_epoch_end", on_fit_epoch_end)
+    return state
+
+
+def train(model_path=MODEL, resume=None, stop_epoch=None, **overrides):
+    """
+    YOLO 학습 실행
+    Args:
+        model_path: 시작 가중치
+        resume: 이어 학습할 체크포인트 (paused.pt) - 지정 시 저장된 학습 설정 사용
+        stop_epoch: 이 에포크까지만 학습하고 중단
+        overrides: TRAIN_ARGS 덮어쓰기
+    Returns: (model, results, save_dir, 중단 여부)
+    """
+    device = select_device()
+
+    model = YOLO(resume if resume is not None else model_path)
+    state = add_stop_callback(model, stop_epoch) if stop_epoch is not None else {"stopped": False}
+    if resume is not None:
+        results = model.train(resume=resume, device=device)
+    else:
+        results = model.train(**{**TRAIN_ARGS, "device": device, **overrides})
+
+    save_dir = Path(model.trainer.save_dir)
+    save_class_metrics(results, save_dir)
+    if not state["stopped"]:
+        # 끝까지 학습했으면 이전 중단 체크포인트는 더 이상 필요 없음
+        (save_dir / "weights" / PAUSED_CHECKPOINT).unlink(missing_ok=True)
+    return model, results, save_dir, state["stopped"]
+
+
+def parse_override(text):
+    """"key=value" → (key, value) (값은 숫자/bool/리스트면 변환, 아니면 문자열)"""
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"key=value 형식이어야 합니다: {text}")
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='YOLO 모델 학습')
+    parser.add_argument('--model', type=str, default=MODEL, help='시작 가중치')
+    parser.add_argument('--project', type=str, default=TRAIN_ARGS['project'], help='결과 상위 디렉토리')
+    parser.add_argument('--name', type=str, default=TRAIN_ARGS['name'], help='결과 디렉토리 이름')
+    parser.add_argument('--set', type=parse_override, action='append', default=[], metavar='KEY=VALUE',
+                        help='학습 인자 덮어쓰기 (예: --set lr0=0.005 --set epochs=30)')
+    parser.add_argument('--stop_epoch', type=int, default=None, help='이 에포크까지만 학습 (paused.pt로 이어 학습 가능)')
+    parser.add_argument('--resume', type=str, default=None, help='이어 학습할 체크포인트 (paused.pt)')
+    parser.add_argument('--autotune', action='store_true',
+                        help='CPU 학습 전 스레드/배치/worker/캐시를 짧게 측정하여 처리량 최고 설정으로 학습')
+    parser.add_argument('--retune', action='store_true', help='저장된 autotune.json을 무시하고 다시 측정')
+    args = parser.parse_args()
+
+    overrides = dict(args.set)
+    if args.autotune and torch.cuda.is_available():
+        print("⚠ GPU 학습에는 --autotune을 적용하지 않습니다")
+    elif args.autotune:
+        data = overrides.get("data", TRAIN_ARGS["data"])
+        imgsz = overrides.get("imgsz", TRAIN_ARGS["imgsz"])
+        autotune_path = Path(args.project) / autotune.AUTOTUNE_FILENAME
+
+        tuned = None if args.retune else autotune.load_autotune(autotune_path, data, imgsz, args.model)
+        if tuned is None:
+            print("=" * 60)
+            print("CPU 학습 처리량 측정")
+            print("=" * 60)
+            tuned = autotune.autotune(data, imgsz, args.model, base_batch=overrides.get("batch", TRAIN_ARGS["batch"]))
+            autotune.save_autotune(autotune_path, tuned)
+        else:
+            print(f"✓ 저장된 autotune 설정 사용: {autotune_path}")
+
+        chosen = tuned["chosen"]
+        print(f"✓ 선택: threads={chosen['threads']} batch={chosen['batch']} workers={chosen['workers']} "
+              f"cache={chosen['cache']} ({tuned['images_per_sec']:.1f} img/s)")
+        autotune.apply_threads(chosen["threads"])
+        # 직접 --set 으로 지정한 값이 우선
+        overrides = {"batch": chosen["batch"], "workers": chosen["workers"], "cache": chosen["cache"], **overrides}
+
+    model, results, save_dir, stopped = train(
+        model_path=args.model,
+        resume=args.resume,
+        stop_epoch=args.stop_epoch,
+        project=args.project,
+        name=args.name,
+        **overrides,
+    )
+
+    print("\n" + "=" * 60)
+    print(f"학습 중단 ({args.stop_epoch} 에포크, 이어 학습: --resume {save_dir / 'weights' / PAUSED_CHECKPOINT})"
+          if stopped else "학습 완료!")
+    print("=" * 60)
+    print(f"가중치 저장 위치: {save_dir / 'weights' / 'best.pt'}")
+    print(f"클래스별 mAP: {save_dir / 'class_metrics.json'}")
+    print("=" * 60)
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+
+# ======================================================
+# 경로 설정
+# ======================================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+YCB_DIR = os.path.join(SCRIPT_DIR, "assets", "ycb_obj")
+CACHE_DIR = os.path.join(SCRIPT_DIR, "assets", "ycb_cache")
+
+CACHE_BLEND = "ycb_library.blend"
+CACHE_MANIFEST = "ycb_library.json"
+CACHE_VERSION = 1
+
+# ======================================================
+# YCB 객체 정의
+# ======================================================
+YCB_OBJECTS_INFO = [
+    {"name": "PottedMeatCan", "file": "010_potted_meat_can.obj", "category_id": 1, "color": [0.8, 0.6, 0.4, 1.0]},
+    {"name": "Banana", "file": "011_banana.obj", "category_id": 2, "color": [0.9, 0.8, 0.2, 1.0]},
+    {"name": "LargeMarker", "file": "040_large_marker.obj", "category_id": 3, "color": [0.2, 0.3, 0.8, 1.0]},
+    {"name": "TomatoSoupCan", "file": "005_tomato_soup_can.obj", "category_id": 4, "color": [0.9, 0.2, 0.2, 1.0]},
+]
+
+# 강체(rigid body) 설정
+RIGIDBODY_PARAMS = {"mass": 0.1, "friction": 1.0, "linear_damping": 0.99, "angular_damping": 0.99}
+
+
+# ======================================================
+# 캐시 무효화 (소스 OBJ 지문)
+# ======================================================
+def file_sha256(path, chunk_size=1 << 20):
+    """파일 SHA-256 해시 계산"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(ycb_dir=YCB_DIR, known=None):
+    """
+    소스 OBJ 파일 + 객체/강체 설정으로부터 캐시 지문 생성
+    OBJ 내용이나 설정이 바뀌면 지문이 달라져 캐시가 자동으로 무효화됨
+
+    Args:
+        known: 이전 지문 - (크기, mtime_ns)가 같은 파일은 다시 읽지 않고 기록된 해시 재사용
+    """
+    known = known or {}
+    sources, stats = {}, {}
+    for obj_info in YCB_OBJECTS_INFO:
+        obj_path = os.path.join(ycb_dir, obj_info["file"])
+        if not os.path.exists(obj_path):
+            continue
+        st = os.stat(obj_path)
+        stats[obj_info["file"]] = [st.st_size, st.st_mtime_ns]
+        if known.get("stats", {}).get(obj_info["file"]) == stats[obj_info["file"]] \
+                and obj_info["file"] in known.get("sources", {}):
+            sources[obj_info["file"]] = known["sources"][obj_info["file"]]
+        else:
+            sources[obj_info["file"]] = file_sha256(obj_path)
+
+    config = json.dumps({"objects": YCB_OBJECTS_INFO, "rigidbody": RIGIDBODY_PARAMS}, sort_keys=True)
+
+    return {
+        "version": CACHE_VERSION,
+        "config": hashlib.sha256(config.encode()).hexdigest(),
+        "sources": sources,
+        "stats": stats,
+    }
+
+
+def check_asset_cache(cache_dir=CACHE_DIR, ycb_dir=YCB_DIR):
+    """
+    캐시 유효성 검사
+    Returns: None (유효) 또는 무효 사유 문자열
+    """
+    blend_path = os.path.join(cache_dir, CACHE_BLEND)
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+
+    if not os.path.exists(blend_path) or not os.path.exists(manifest_path):
+        return "캐시 파일 없음"
+
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        return f"manifest 읽기 실패: {e}"
+
+    cached = manifest.get("fingerprint", {})
+    current = source_fingerprint(ycb_dir, known=cached)
+
+    if cached.get("version") != current["version"]:
+        return "캐시 버전 변경"
+    if cached.get("config") != current["config"]:
+        return "객체/강체 설정 변경"
+
+    changed = sorted(
+        name for name in set(cached.get("sources", {})) | set(current["sources"])
+        if cached.get("sources", {}).get(name) != current["sources"].get(name)
+    )
+    if changed:
+        return f"소스 OBJ 변경: {', '.join(changed)}"
+
+    # 내용은 같고 mtime만 바뀐 경우 - 다음 실행에서 다시 해시하지 않도록 stat 갱신
+    if cached.get("stats") != current["stats"]:
+        manifest["fingerprint"] = current
+        _write_json_atomic(manifest_path, manifest)
+
+    return None
+
+
+def _write_json_atomic(path, data):
+    """임시 파일에 쓰고 rename (여러 워커가 동시에 써도 깨지지 않음)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ======================================================
+# 객체 로드 (Blender 내부에서만 사용)
+# ======================================================
+def load_ycb_objects(ycb_dir=YCB_DIR):
+    """
+    OBJ 파싱 → 재질/강체 설정까지 적용하여 YCB 객체 로드
+    Returns: {객체 이름: [MeshObject, ...]}
+    """
+    import blenderproc as bproc
+
+    objects = {}
+    for obj_info in YCB_OBJECTS_INFO:
+        obj_path = os.path.join(ycb_dir, obj_info["file"])
+
+        if not os.path.exists(obj_path):
+            continue
+
+        # 재질 생성
+        mat = bproc.material.create(f'{obj_info["name"]}_Mat')
+        mat.set_principled_shader_value("Base Color", obj_info["color"])
+        mat.set_principled_shader_value("Roughness", 0.5)
+
+        # OBJ 로드
+        loaded_objs = bproc.loader.load_obj(obj_path)
+
+        for idx, obj in enumerate(loaded_objs):
+            obj.set_name(f"{obj_info['name']}_{idx}" if len(loaded_objs) > 1 else obj_info["name"])
+            obj.set_cp("category_id", obj_info["category_id"])
+            obj.set_cp("ycb_class", obj_info["name"])
+            obj.clear_materials()
+            obj.add_material(mat)
+            obj.enable_rigidbody(True, **RIGIDBODY_PARAMS)
+
+        objects[obj_info["name"]] = loaded_objs
+        print(f"  ✓ {obj_info['name']}: {len(loaded_objs)}개 메쉬")
+
+    return objects
+
+
+def write_asset_cache(objects, cache_dir=CACHE_DIR, ycb_dir=YCB_DIR):
+    """로드된 객체(메쉬/재질/강체 포함)를 .blend 라이브러리로 저장"""
+    import bpy
+
+    os.makedirs(cache_dir, exist_ok=True)
+    blend_path = os.path.join(cache_dir, CACHE_BLEND)
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+
+    # 여러 워커가 동시에 써도 깨지지 않도록 임시 파일에 쓰고 rename
+    tmp_blend = f"{blend_path}.{os.getpid()}.tmp"
+    datablocks = {obj.blender_obj for objs in objects.values() for obj in objs}
+    bpy.data.libraries.write(tmp_blend, datablocks, fake_user=True)
+    os.replace(tmp_blend, blend_path)
+
+    manifest = {
+        "blend": CACHE_BLEND,
+        "fingerprint": source_fingerprint(ycb_dir),
+        "objects": {name: [obj.get_name() for obj in objs] for name, objs in objects.items()},
+    }
+    _write_json_atomic(manifest_path, manifest)
+
+    print(f"[CACHE] 에셋 캐시 저장: {blend_path}")
+
+
+def load_ycb_objects_from_cache(cache_dir=CACHE_DIR):
+    """
+    .blend 라이브러리에서 객체 append (OBJ 파싱/재질 생성 생략)
+    Returns: {객체 이름: [MeshObject, ...]}
+    """
+    import blenderproc as bproc
+
+    loaded_objs = bproc.loader.load_blend(os.path.join(cache_dir, CACHE_BLEND), obj_types=["mesh"])
+
+    grouped = {}
+    for obj in loaded_objs:
+        # append된 객체는 현재 씬의 rigid body world에 등록되지 않으므로 다시 등록
+        _register_rigidbody(obj)
+        grouped.setdefault(obj.get_cp("ycb_class"), []).append(obj)
+
+    # YCB_OBJECTS_INFO 순서 유지
+    objects = {}
+    for obj_info in YCB_OBJECTS_INFO:
+        if obj_info["name"] in grouped:
+            objects[obj_info["name"]] = sorted(grouped[obj_info["name"]], key=lambda o: o.get_name())
+            print(f"  ✓ {obj_info['name']}: {len(objects[obj_info['name']])}개 메쉬 (캐시)")
+
+    return objects
+
+
+def load_ycb_assets(ycb_dir=YCB_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    YCB 객체 로드 - 유효한 캐시가 있으면 캐시에서, 없으면 OBJ에서 로드 후 캐시 갱신
+    Returns: ({객체 이름: [MeshObject, ...]}, "cache" | "obj")
+    """
+    if use_cache:
+        reason = check_asset_cache(cache_dir, ycb_dir)
+        if reason is None:
+            return load_ycb_objects_from_cache(cache_dir), "cache"
+        print(f"[CACHE] 캐시 사용 불가 ({reason}) → OBJ에서 로드")
+
+    objects = load_ycb_objects(ycb_dir)
+
+    if use_cache and objects:
+        write_asset_cache(objects, cache_dir, ycb_dir)
+
+    return objects, "obj"
+
+
+# ======================================================
+# 인스턴스 풀 (linked duplicate)
+# ======================================================
+# 사용하지 않는 인스턴스를 보관하는 위치 (카메라/물리 영역 밖)
+PARKING_LOCATION = [0.0, 0.0, -100.0]
+
+
+def parse_instance_counts(spec, class_names):
+    """
+    클래스별 인스턴스 개수 분포 파싱
+    "1-3" → 모든 클래스 1~3개, "Banana=0-4,PottedMeatCan=2" → 지정 클래스만 변경 (나머지 1개)
+    Returns: {클래스 이름: (min, max)}
+    """
+    def parse_range(text):
+        low, _, high = text.partition("-")
+        low, high = int(low), int(high or low)
+        if low < 0 or high < low:
+            raise ValueError(f"잘못된 개수 범위: {text}")
+        return low, high
+
+    default = (1, 1)
+    explicit = {}
+    for token in filter(None, (t.strip() for t in spec.split(","))):
+        if "=" in token:
+            name, _, value = token.partition("=")
+            name = name.strip()
+            if name not in class_names:
+                raise ValueError(f"알 수 없는 클래스: {name} (가능: {', '.join(class_names)})")
+            explicit[name] = parse_range(value.strip())
+        else:
+            default = parse_range(token)
+    return {name: explicit.get(name, default) for name in class_names}
+
+
+def sample_instance_counts(instance_counts, rng=None):
+    """분포에서 씬별 클래스 인스턴스 개수 샘플링 (균등 분포)"""
+    import numpy as np
+
+    rng = rng or np.random
+    return {name: int(rng.randint(low, high + 1)) for name, (low, high) in instance_counts.items()}
+
+
+def _register_rigidbody(obj):
+    """복제/append 된 객체를 현재 씬의 rigid body world에 (재)등록"""
+    if obj.has_rigidbody_enabled():
+        obj.disable_rigidbody()
+    obj.enable_rigidbody(True, **RIGIDBODY_PARAMS)
+
+
+def create_instance_pool(objects, instance_counts):
+    """
+    클래스별 최대 개수만큼 linked duplicate 인스턴스를 미리 생성
+    복제본은 메쉬 데이터를 공유하므로 메모리/로드 비용이 개수에 비례해 늘지 않음
+    segmentation 에서는 각 복제본이 별도 객체이므로 instance id 가 따로 부여됨
+
+    Returns: {클래스 이름: [[MeshObject, ...] (인스턴스 0), [...] (인스턴스 1), ...]}
+    """
+    pool = {}
+    for name, meshes in objects.items():
+        _, max_count = instance_counts.get(name, (1, 1))
+        instances = [meshes]
+        for obj in meshes:
+            obj.set_cp("ycb_instance", 0)
+
+        for inst_idx in range(1, max_count):
+            copies = []
+            for obj in meshes:
+                copy = obj.duplicate(linked=True)
+                copy.set_name(f"{obj.get_name()}_inst{inst_idx:02d}")
+                copy.set_cp("ycb_instance", inst_idx)
+                _register_rigidbody(copy)
+                copies.append(copy)
+            instances.append(copies)
+
+        pool[name] = instances
+    return pool
+
+
+def activate_instances(pool, counts):
+    """
+    씬별 인스턴스 개수 적용 - 사용하는 인스턴스만 보이고 물리 시뮬레이션에 참여
+    Returns: 활성화된 MeshObject 리스트
+    """
+    active_objects = []
+    for name, instances in pool.items():
+        for inst_idx, meshes in enumerate(instances):
+            active = inst_idx < counts.get(name, 0)
+            for obj in meshes:
+                obj.hide(not active)
+                if active:
+                    if not obj.has_rigidbody_enabled():
+                        obj.enable_rigidbody(True, **RIGIDBODY_PARAMS)
+                    active_objects.append(obj)
+                else:
+                    if obj.has_rigidbody_enabled():
+                        obj.disable_rigidbody()
+                    obj.set_location(PARKING_LOCATION)
+    return active_objects